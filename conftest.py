@@ -0,0 +1,21 @@
+import os
+import pytest
+from dotenv import load_dotenv
+
+# load .env file, this conftest is loaded before the one of tests/steps
+load_dotenv()
+
+from utils.device_matrix import device_matrix
+from utils.device_pool import DEFAULT_POOL_FILE, load_slots
+
+# Hooks that pytest calls before collection only run from an initial conftest, i.e. the one of
+# the rootdir or of the paths given on the command line; this one is found by every invocation
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_auto_num_workers(config):
+    """-n auto starts one worker per device: DEVICE_COUNT on the cloud grid, the pool slots locally"""
+    if os.getenv('CI') == 'true' or os.getenv('IS_CI') == 'true' or os.getenv('TEST_ENV') == 'github_actions':
+        return len(device_matrix(os.environ))
+    pool_file = os.getenv('DEVICE_POOL_FILE', DEFAULT_POOL_FILE)
+    return len(load_slots(pool_file)) if os.path.exists(pool_file) else 1
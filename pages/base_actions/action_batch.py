@@ -0,0 +1,328 @@
+import json
+import time
+from typing import Any, List, Optional, Tuple
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.command import Command
+from pages.base_actions.gestures import Gesture
+
+EXECUTE_DRIVER = 'execute_driver'
+
+# WebdriverIO interpreter of the steps built by ActionBatch. Every step waits for its element
+# with its own timeout, the first failing step stops the script, and one result per executed
+# step is returned so the client can map results and errors back to the original calls.
+_SCRIPT_TEMPLATE = """
+const steps = %s;
+const results = [];
+const element = async (step) => {
+    const el = await driver.$(step.selector);
+    await el.waitForDisplayed({timeout: step.timeout});
+    return el;
+};
+for (const step of steps) {
+    try {
+        let value = true;
+        if (step.op === 'wait_visible') {
+            await element(step);
+        } else if (step.op === 'click') {
+            await (await element(step)).click();
+        } else if (step.op === 'clear') {
+            await (await element(step)).clearValue();
+        } else if (step.op === 'send_keys') {
+            await (await element(step)).addValue(step.text);
+        } else if (step.op === 'set_text') {
+            await (await element(step)).setValue(step.text);
+        } else if (step.op === 'get_attribute') {
+            value = await (await element(step)).getAttribute(step.name);
+        } else if (step.op === 'read') {
+            // Hidden elements can be read too, so only wait for the element to exist
+            const el = await driver.$(step.selector);
+            await el.waitForExist({timeout: step.timeout});
+            value = {};
+            for (const name of step.fields) {
+                if (name === 'text') {
+                    value[name] = await el.getText();
+                } else if (name === 'rect') {
+                    value[name] = await driver.getElementRect(el.elementId);
+                } else if (name === 'visible') {
+                    value[name] = await el.isDisplayed();
+                } else if (name === 'enabled') {
+                    value[name] = await el.isEnabled();
+                } else if (name === 'selected') {
+                    value[name] = await el.isSelected();
+                } else {
+                    value[name] = await el.getAttribute(name);
+                }
+            }
+        } else if (step.op === 'gesture') {
+            await driver.performActions(step.payload.actions);
+            await driver.releaseActions();
+        } else if (step.op === 'pause') {
+            await driver.pause(step.ms);
+        } else if (step.op === 'settle') {
+            let previous = null;
+            let stable = 1;
+            const end = Date.now() + step.timeout;
+            value = false;
+            while (Date.now() < end) {
+                const source = await driver.getPageSource();
+                stable = source === previous ? stable + 1 : 1;
+                if (stable >= step.stable_samples) { value = true; break; }
+                previous = source;
+                await driver.pause(step.interval);
+            }
+        } else {
+            throw new Error('Unknown batch step: ' + step.op);
+        }
+        results.push({ok: true, value: value});
+    } catch (e) {
+        results.push({ok: false, error: String((e && e.message) || e)});
+        break;
+    }
+}
+return results;
+"""
+
+UNSUPPORTED_MESSAGES = ('unknown command', 'not implemented', 'not supported', 'insecure feature',
+                        'has not been enabled')
+
+
+class BatchStep:
+    """
+    One queued call of an ActionBatch and, once the batch ran, its outcome
+    """
+
+    def __init__(self, op: str, description: str, locator: Optional[Tuple[str, str]] = None, **params):
+        self.op = op
+        self.description = description
+        self.locator = locator
+        self.params = params
+        self.executed = False
+        self.ok = False
+        self.value: Any = None
+        self.error: Optional[str] = None
+
+    def __repr__(self):
+        state = 'pending' if not self.executed else ('ok' if self.ok else f"failed: {self.error}")
+        return f"<BatchStep {self.description} ({state})>"
+
+
+class ActionBatch:
+    """
+    Queue of finds, clicks, text entries and gestures executed together when the context exits.
+
+    With server batching the whole queue is shipped as one Appium execute_driver (WebdriverIO)
+    script, i.e. one HTTP call whatever the number of steps. Otherwise, or when the server
+    refuses driver scripts, the steps run one at a time through the regular BaseActions
+    primitives. Either way every queued call gets its result or error on its BatchStep.
+
+    Ex.
+    with self.batch() as batch:
+        batch.clear(*OnboardingLocators.EMOJI_SEARCH_FIELD)
+        batch.send_keys(*OnboardingLocators.EMOJI_SEARCH_FIELD, "stock")
+        name = batch.get_attribute(*OnboardingLocators.EMOJI_SEARCH_FIELD, "value")
+    name.value
+    """
+
+    def __init__(self, actions, server_side: bool = True, timeout: float = None, raise_on_error: bool = True):
+        """
+        Args:
+            actions: BaseActions instance the steps run against
+            server_side: Ship the steps as one execute_driver script when the server supports it
+            timeout: Per-step element wait (seconds), default is the timeout of the actions
+            raise_on_error: Raise when a step failed once the batch ran
+        """
+        self.actions = actions
+        self.server_side = server_side
+        self.timeout = actions.default_timeout if timeout is None else timeout
+        self.raise_on_error = raise_on_error
+        self.steps: List[BatchStep] = []
+        self.ran_on_server = False
+
+    def __enter__(self) -> 'ActionBatch':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.run()
+        return False
+
+    def _queue(self, op: str, description: str, locator: Tuple[str, str] = None, **params) -> BatchStep:
+        step = BatchStep(op, description, tuple(locator) if locator else None, **params)
+        self.steps.append(step)
+        return step
+
+    def wait_visible(self, locator_type: str, locator_value: str) -> BatchStep:
+        return self._queue('wait_visible', f"Wait for {locator_value}", (locator_type, locator_value))
+
+    def click(self, locator_type: str, locator_value: str) -> BatchStep:
+        return self._queue('click', f"Click {locator_value}", (locator_type, locator_value))
+
+    def clear(self, locator_type: str, locator_value: str) -> BatchStep:
+        return self._queue('clear', f"Clear {locator_value}", (locator_type, locator_value))
+
+    def send_keys(self, locator_type: str, locator_value: str, text: str) -> BatchStep:
+        return self._queue('send_keys', f"Send '{text}' to {locator_value}", (locator_type, locator_value), text=text)
+
+    def set_text(self, locator_type: str, locator_value: str, text: str) -> BatchStep:
+        return self._queue('set_text', f"Set '{text}' in {locator_value}", (locator_type, locator_value), text=text)
+
+    def get_attribute(self, locator_type: str, locator_value: str, name: str) -> BatchStep:
+        return self._queue('get_attribute', f"Read {name} of {locator_value}", (locator_type, locator_value),
+                           name=name)
+
+    def read(self, locator_type: str, locator_value: str, fields: Tuple[str, ...]) -> BatchStep:
+        return self._queue('read', f"Read {', '.join(fields)} of {locator_value}", (locator_type, locator_value),
+                           fields=list(fields))
+
+    def tap(self, x_ratio: float, y_ratio: float) -> BatchStep:
+        return self.gesture(self.actions.gesture().tap(x_ratio, y_ratio), f"Tap at ({x_ratio}, {y_ratio})")
+
+    def gesture(self, gesture: Gesture, description: str = "Perform gesture") -> BatchStep:
+        return self._queue('gesture', description, payload=gesture.compile())
+
+    def pause(self, seconds: float) -> BatchStep:
+        return self._queue('pause', f"Pause {seconds:g} seconds", ms=int(seconds * 1000))
+
+    def settle(self, timeout: float = 1.0, stable_samples: int = 2) -> BatchStep:
+        return self._queue('settle', "Wait for the UI to settle", timeout=timeout, stable_samples=stable_samples)
+
+    def _selector(self, locator: Tuple[str, str]) -> str:
+        """
+        WebdriverIO selector of a locator, XPath being promoted to a native query when possible
+        """
+        locator_type, locator_value = self.actions._native_locator(*locator)
+        if locator_type in (AppiumBy.ACCESSIBILITY_ID, AppiumBy.ID, AppiumBy.NAME):
+            return f"~{locator_value}"
+        if locator_type == AppiumBy.IOS_PREDICATE:
+            return f"-ios predicate string:{locator_value}"
+        if locator_type == AppiumBy.IOS_CLASS_CHAIN:
+            return f"-ios class chain:{locator_value}"
+        if locator_type == AppiumBy.CLASS_NAME:
+            return f"-ios class chain:**/{locator_value}"
+        if locator_type == By.XPATH:
+            return locator_value
+        raise ValueError(f"Locator type not supported in a driver script: {locator_type}")
+
+    def script(self) -> str:
+        """
+        WebdriverIO script executing the queued steps
+        """
+        payload = []
+        for step in self.steps:
+            entry = {'op': step.op}
+            if step.locator is not None:
+                entry['selector'] = self._selector(step.locator)
+                entry['timeout'] = int(self.timeout * 1000)
+            if step.op == 'settle':
+                entry.update(timeout=int(step.params['timeout'] * 1000), stable_samples=step.params['stable_samples'],
+                             interval=int(self.actions.SETTLE_INTERVAL * 1000))
+            else:
+                entry.update(step.params)
+            payload.append(entry)
+        return _SCRIPT_TEMPLATE % json.dumps(payload, ensure_ascii=False)
+
+    def _script_timeout(self) -> int:
+        total = 0.0
+        for step in self.steps:
+            if step.locator is not None:
+                total += self.timeout
+            elif step.op == 'settle':
+                total += step.params['timeout']
+            elif step.op == 'pause':
+                total += step.params['ms'] / 1000
+        return int((total + 30) * 1000)
+
+    def run_on_server(self) -> bool:
+        """
+        Execute the steps in one execute_driver call
+
+        Returns:
+            bool: False if the server does not support driver scripts
+        """
+        unsupported = self.actions.session_state.unsupported_commands
+        if EXECUTE_DRIVER in unsupported:
+            return False
+        try:
+            response = self.actions.driver.execute_driver(self.script(), timeout_ms=self._script_timeout())
+        except WebDriverException as e:
+            message = str(e.msg or '').lower()
+            if any(text in message for text in UNSUPPORTED_MESSAGES):
+                print(f"Driver scripts are not available, running the batch one command at a time: {e.msg}")
+                unsupported.add(EXECUTE_DRIVER)
+                return False
+            raise
+        for step, outcome in zip(self.steps, response.result or []):
+            step.executed = True
+            step.ok = bool(outcome.get('ok'))
+            step.value = outcome.get('value')
+            step.error = outcome.get('error')
+        self.ran_on_server = True
+        return True
+
+    def run_locally(self):
+        """
+        Execute the steps one command at a time through the BaseActions primitives
+        """
+        actions = self.actions
+        for step in self.steps:
+            step.executed = True
+            try:
+                if step.op == 'wait_visible':
+                    step.value = actions.wait_for_element_visible(*step.locator, timeout=self.timeout)
+                elif step.op == 'click':
+                    actions.click_element(*step.locator, timeout=self.timeout)
+                    step.value = True
+                elif step.op == 'clear':
+                    actions.clear_text(*step.locator)
+                    step.value = True
+                elif step.op == 'send_keys':
+                    actions.send_keys_to_element(*step.locator, step.params['text'])
+                    step.value = True
+                elif step.op == 'set_text':
+                    actions.set_text(*step.locator, step.params['text'], timeout=self.timeout)
+                    step.value = True
+                elif step.op == 'get_attribute':
+                    step.value = actions.get_element_attribute(*step.locator, step.params['name'])
+                elif step.op == 'read':
+                    step.value = actions.element_snapshot(*step.locator, fields=step.params['fields'],
+                                                          timeout=self.timeout).as_dict()
+                elif step.op == 'gesture':
+                    actions.driver.execute(Command.W3C_ACTIONS, step.params['payload'])
+                    step.value = True
+                elif step.op == 'pause':
+                    time.sleep(step.params['ms'] / 1000)
+                    step.value = True
+                else:
+                    step.value = actions.wait_for_settle(timeout=step.params['timeout'],
+                                                         stable_samples=step.params['stable_samples'])
+                step.ok = True
+            except Exception as e:
+                step.error = str(e)
+                break
+
+    def run(self) -> List[BatchStep]:
+        """
+        Execute the queued steps, on the server when possible
+
+        Returns:
+            List[BatchStep]: The queued steps with their results
+
+        Raises:
+            WebDriverException: If raise_on_error is set and a step failed
+        """
+        if not self.steps:
+            return self.steps
+        try:
+            if not (self.server_side and self.actions._is_xcuitest() and self.run_on_server()):
+                # One implicit wait switch for the whole batch instead of one per primitive
+                with self.actions.wait_mode(0):
+                    self.run_locally()
+        finally:
+            self.actions.invalidate_snapshot()
+
+        failed = next((step for step in self.steps if step.executed and not step.ok), None)
+        if failed is not None and self.raise_on_error:
+            raise WebDriverException(f"Batch step failed: {failed.description}: {failed.error}")
+        return self.steps
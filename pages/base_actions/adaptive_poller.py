@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict, namedtuple
+from typing import Callable, Dict, List, Optional
+from pages.base_actions.file_lock import file_lock
+from pages.base_actions.retry_policy import RetryPolicy
+
+DEFAULT_HISTORY_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "logs",
+                                    "poll_history.json")
+
+# One finished wait: polls is the number of probes, wasted_latency the expected delay between
+# the condition becoming true and the probe noticing it (half of the last interval slept)
+PollStats = namedtuple('PollStats', ['key', 'polls', 'elapsed', 'wasted_latency', 'found'])
+
+
+class PollHistory:
+    """
+    Time-to-appear samples and poll statistics per wait key, persisted in a local JSON store.
+
+    save() merges what this process recorded into the store while holding a file lock, so
+    parallel workers do not overwrite each other's samples.
+    """
+    MAX_SAMPLES = 20
+
+    def __init__(self, history_file: str = None):
+        """
+        Args:
+            history_file: JSON store, default is POLL_HISTORY_FILE or logs/poll_history.json
+        """
+        self.history_file = history_file or os.getenv('POLL_HISTORY_FILE', DEFAULT_HISTORY_FILE)
+        self._stored: Optional[Dict[str, dict]] = None
+        self._recorded: Dict[str, dict] = defaultdict(lambda: {'samples': [], 'waits': 0, 'polls': 0, 'wasted': 0.0})
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.history_file, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def samples(self, key: str) -> List[float]:
+        """
+        Most recent time-to-appear samples of the key, stored ones first
+        """
+        if self._stored is None:
+            self._stored = self._load()
+        stored = self._stored.get(key, {}).get('samples', [])
+        recorded = self._recorded[key]['samples'] if key in self._recorded else []
+        return (stored + recorded)[-self.MAX_SAMPLES:]
+
+    def expected(self, key: str) -> Optional[float]:
+        """
+        Median time-to-appear of the key, None without history
+        """
+        samples = self.samples(key)
+        return statistics.median(samples) if samples else None
+
+    def record(self, stats: PollStats):
+        with self._lock:
+            entry = self._recorded[stats.key]
+            entry['waits'] += 1
+            entry['polls'] += stats.polls
+            entry['wasted'] += stats.wasted_latency
+            if stats.found:
+                entry['samples'].append(round(stats.elapsed, 3))
+                del entry['samples'][:-self.MAX_SAMPLES]
+
+    def save(self):
+        """
+        Merge the samples and statistics recorded by this process into the store, the read-merge-write
+        being done under the store's file lock
+        """
+        with self._lock:
+            if not self._recorded:
+                return
+            with file_lock(self.history_file):
+                merged = self._load()
+                for key, recorded in self._recorded.items():
+                    entry = merged.setdefault(key, {'samples': [], 'waits': 0, 'polls': 0, 'wasted': 0.0})
+                    entry['samples'] = (entry['samples'] + recorded['samples'])[-self.MAX_SAMPLES:]
+                    entry['waits'] += recorded['waits']
+                    entry['polls'] += recorded['polls']
+                    entry['wasted'] = round(entry['wasted'] + recorded['wasted'], 3)
+                temporary_file = f"{self.history_file}.{os.getpid()}.tmp"
+                with open(temporary_file, 'w', encoding='utf-8') as f:
+                    json.dump(merged, f, indent=2, ensure_ascii=False, sort_keys=True)
+                os.replace(temporary_file, self.history_file)
+            self._stored = merged
+            self._recorded.clear()
+
+    def report(self, limit: int = 20) -> str:
+        """
+        Waits sorted by total wasted latency
+        """
+        entries = self._load()
+        rows = []
+        for key, entry in entries.items():
+            waits = entry['waits'] or 1
+            median = statistics.median(entry['samples']) if entry['samples'] else float('nan')
+            rows.append((entry['wasted'], key, entry['polls'] / waits, median, entry['waits']))
+        lines = [f"{'wasted':>9} {'polls/wait':>10} {'median':>8} {'waits':>6}  wait"]
+        for wasted, key, polls, median, waits in sorted(rows, reverse=True)[:limit]:
+            lines.append(f"{wasted:>8.2f}s {polls:>10.1f} {median:>7.2f}s {waits:>6}  {key}")
+        return '\n'.join(lines) if rows else "No poll history recorded yet"
+
+
+poll_history = PollHistory()
+
+
+class AdaptivePolicy(RetryPolicy):
+    """
+    RetryPolicy whose polling schedule is learned per wait key.
+
+    Without history it polls tightly (INITIAL_INTERVAL) and backs off exponentially. With
+    history the first pause jumps to LEAD times the median time-to-appear of the key, then
+    polling is tight again, so a slow element is not hammered and a fast one is seen early.
+    Each call records its PollStats (last_stats) and the time-to-appear into the history.
+    """
+    INITIAL_INTERVAL = 0.05
+    MULTIPLIER = 1.5
+    LEAD = 0.8
+
+    def __init__(self, key: str, history: PollHistory = None, **settings):
+        """
+        Args:
+            key: Wait key the schedule is learned for, e.g. "appear:accessibility id=Get Started"
+            history: Poll history, default is the shared one
+            settings: RetryPolicy settings
+        """
+        settings.setdefault('initial_backoff', self.INITIAL_INTERVAL)
+        settings.setdefault('multiplier', self.MULTIPLIER)
+        super().__init__(**settings)
+        self.key = key
+        self.history = history or poll_history
+        self.expected = self.history.expected(key)
+        self.last_stats: Optional[PollStats] = None
+        self._last_delay = 0.0
+
+    @classmethod
+    def from_policy(cls, policy: RetryPolicy, key: str, history: PollHistory = None) -> 'AdaptivePolicy':
+        """
+        Adaptive policy keeping the deadline, cap, jitter and classification of another policy
+        """
+        return cls(key, history, deadline=policy.deadline, max_backoff=policy.max_backoff, jitter=policy.jitter,
+                   max_attempts=policy.max_attempts, classification=policy.classification)
+
+    def with_overrides(self, **overrides) -> 'AdaptivePolicy':
+        policy = super().with_overrides(**overrides)
+        policy.last_stats = None
+        return policy
+
+    def backoff(self, attempt: int) -> float:
+        if self.expected and attempt == 1:
+            # The learned jump is not randomised, the lead already keeps it short of the median
+            self._last_delay = max(self.initial_backoff, self.expected * self.LEAD)
+            return self._last_delay
+        steps = attempt - (2 if self.expected else 1)
+        delay = min(self.max_backoff, self.initial_backoff * (self.multiplier ** max(0, steps)))
+        self._last_delay = delay
+        return random.uniform(delay * (1 - self.jitter), delay)
+
+    def call(self, probe: Callable, timeout: Optional[float] = None, description: str = "Condition",
+             final_probe: Callable = None):
+        polls = []
+        self._last_delay = 0.0
+
+        def counted_probe():
+            polls.append(None)
+            return probe()
+
+        start_time = time.monotonic()
+        found = False
+        try:
+            result = super().call(counted_probe, timeout=timeout, description=description, final_probe=final_probe)
+            found = True
+            return result
+        finally:
+            elapsed = time.monotonic() - start_time
+            wasted = self._last_delay / 2 if found and len(polls) > 1 else 0.0
+            self.last_stats = PollStats(self.key, len(polls), elapsed, wasted, found)
+            self.history.record(self.last_stats)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Poll history report")
+    parser.add_argument('--limit', type=int, default=20, help="number of waits listed")
+    args = parser.parse_args()
+    print(poll_history.report(args.limit))
@@ -1,35 +1,271 @@
+import os
+import re
 import time
-from typing import Tuple, Union
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from appium.webdriver.webdriver import WebDriver
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException, WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.common.actions import interaction
-from selenium.webdriver.common.actions.pointer_input import PointerInput
-from selenium.webdriver.common.actions.action_builder import ActionBuilder
+from pages.base_actions.action_batch import ActionBatch
+from pages.base_actions.adaptive_poller import AdaptivePolicy, PollStats
+from pages.base_actions.batch_resolver import BatchResolver, compile_conditions, quote_predicate_value
+from pages.base_actions.element_record import (
+    ATTRIBUTE_FIELDS, DEFAULT_FIELDS, ElementRecord, check_fields, record_from_element, record_from_node,
+    record_from_values)
+from pages.base_actions.gestures import Gesture
+from pages.base_actions.locator_compiler import promote_locator
+from pages.base_actions.page_snapshot import PageSnapshot, UnsupportedLocatorError, parse_xpath
+from pages.base_actions.retry_policy import RetryPolicy
+from pages.base_actions.screen_identifier import Screen, screen_identifier
+from pages.base_actions.session_state import get_session_state
+from pages.base_actions.settle import SettleDetector
+from pages.locators.registry import locator_registry
 
 class BaseActions:
-    def __init__(self, driver: WebDriver, default_timeout: int = 10):
+    SETTLE_INTERVAL = 0.15
+    ATTRIBUTE_POLL_INITIAL = 0.05
+    ATTRIBUTE_POLL_MAX = 0.5
+    # Translate XPath locators to native -ios predicate string / class chain queries on XCUITest
+    PROMOTE_XPATH = True
+
+    def __init__(self, driver: WebDriver, default_timeout: int = 10, use_snapshot: bool = False,
+                 retry_policy: RetryPolicy = None):
         """
         Args:
             driver: WebDriver instance
             default_timeout: default timeout (seconds)
+            use_snapshot: resolve read-only checks against a cached page source snapshot
+            retry_policy: retry/backoff policy of the primitives, default is a policy whose deadline is default_timeout
         """
         self.driver = driver
-        self.wait = WebDriverWait(driver, default_timeout)
         self.default_timeout = default_timeout
+        self.use_snapshot = use_snapshot
+        self.retry_policy = retry_policy or RetryPolicy(deadline=default_timeout)
+        self.session_state = get_session_state(driver)
+        self.last_wait_policy: Optional[AdaptivePolicy] = None
 
-    def find_element(self, locator_type: str, locator_value: str, timeout: int = None):
+    @contextmanager
+    def snapshot_mode(self):
         """
-        Use explicit wait to find element and return
+        Resolve read-only checks (is_element_present, is_element_visible, wait_for_element_present)
+        against one page source snapshot instead of one WebDriver call per lookup
+
+        Ex.
+        with self.snapshot_mode():
+            self.is_element_visible(*A)
+            self.is_element_visible(*B)
+        """
+        previous = self.use_snapshot
+        self.use_snapshot = True
+        try:
+            yield self
+        finally:
+            self.use_snapshot = previous
+
+    def get_page_snapshot(self, refresh: bool = False) -> PageSnapshot:
+        """
+        Return the snapshot of the current screen, fetching page_source only when there is no valid one
+
+        Args:
+            refresh: Force a new page_source fetch
+
+        Returns:
+            PageSnapshot: Parsed snapshot of the current screen
+        """
+        state = self.session_state
+        if refresh or state.snapshot is None or state.snapshot.generation != state.generation:
+            state.snapshot = PageSnapshot(self.driver.page_source, state.generation)
+        return state.snapshot
+
+    def batch(self, server_side: bool = None, timeout: float = None, raise_on_error: bool = True) -> ActionBatch:
+        """
+        Queue several actions and execute them together when the with block exits
+
+        Args:
+            server_side: Ship the queue as one execute_driver script, default is the APPIUM_BATCH_MODE env setting.
+                         Without it, or when the server refuses driver scripts, the steps run one at a time.
+            timeout: Per-step element wait (seconds), default is default_timeout
+            raise_on_error: Raise when a step failed
+
+        Ex.
+        with self.batch() as batch:
+            batch.click(*A)
+            batch.send_keys(*B, "text")
+        """
+        if server_side is None:
+            server_side = os.getenv('APPIUM_BATCH_MODE', 'false').lower() == 'true'
+        return ActionBatch(self, server_side=server_side, timeout=timeout, raise_on_error=raise_on_error)
+
+    @property
+    def implicit_wait(self):
+        """
+        Client-side tracker of the session implicit wait, exposes sent_calls and avoided_calls
+        """
+        return self.session_state.implicit_wait
+
+    def wait_mode(self, implicit_wait: float):
+        """
+        Context manager running the block with the given implicit wait, implicitly_wait is only
+        sent to the server when the value actually changes (never for 0, the session default)
+
+        Ex.
+        with self.wait_mode(0):
+            self.driver.find_elements(...)
+        """
+        return self.implicit_wait.override(implicit_wait)
+
+    def invalidate_snapshot(self, screen_changed: bool = True):
+        """
+        Drop the cached snapshot, called by every action that may change the screen
+
+        Args:
+            screen_changed: Start a new screen generation, which also drops the cached element handles.
+                            Text entry passes False: values change but the elements stay the same.
+        """
+        if screen_changed:
+            self.session_state.generation += 1
+            self.session_state.element_cache.clear()
+        self.session_state.snapshot = None
+
+    def _native_locator(self, locator_type: str, locator_value: str) -> Tuple[str, str]:
+        """
+        Locator actually sent to the server: XPath is replaced by its native equivalent when one exists
+        """
+        if self.PROMOTE_XPATH and locator_type == By.XPATH and self._is_xcuitest():
+            return promote_locator(locator_type, locator_value)
+        return locator_type, locator_value
+
+    def _find(self, locator_type: str, locator_value: str) -> WebElement:
+        """
+        driver.find_element through the registered strategy chain, or with XPath promotion for plain locators
+        """
+        if self._has_strategy_chain(locator_type, locator_value):
+            return locator_registry.resolve(locator_type, locator_value, self.driver.find_element)
+        return self.driver.find_element(*self._native_locator(locator_type, locator_value))
+
+    def _find_all(self, locator_type: str, locator_value: str) -> List[WebElement]:
+        """
+        driver.find_elements through the registered strategy chain, or with XPath promotion for plain locators
+        """
+        if self._has_strategy_chain(locator_type, locator_value):
+            return locator_registry.resolve(locator_type, locator_value, self.driver.find_elements)
+        return self.driver.find_elements(*self._native_locator(locator_type, locator_value))
+
+    @staticmethod
+    def _has_strategy_chain(locator_type: str, locator_value: str) -> bool:
+        """
+        Whether the locator declares alternative strategies; they are sent as declared, without XPath
+        promotion, so their statistics compare the declared queries
+        """
+        locator = locator_registry.lookup(locator_type, locator_value)
+        return locator is not None and len(locator.strategies) > 1
+
+    @staticmethod
+    def _with_alternatives(probe: Callable) -> Callable:
+        """
+        Final attempt of a wait: the probe with the alternative strategies of registered locators enabled
+        """
+        def final_probe():
+            with locator_registry.alternatives():
+                return probe()
+        return final_probe
+
+    def _locate(self, locator_type: str, locator_value: str) -> WebElement:
+        """
+        Return the handle cached for the locator in the current screen generation, finding it on a miss
+        """
+        cache = self.session_state.element_cache
+        element = cache.get((locator_type, locator_value))
+        if element is None:
+            element = self._find(locator_type, locator_value)
+            cache.put((locator_type, locator_value), element)
+        return element
+
+    def _use_element(self, locator_type: str, locator_value: str, action):
+        """
+        Call action(element) on the cached handle, re-finding the element once if the handle went stale
+        """
+        cache = self.session_state.element_cache
+        element = self._locate(locator_type, locator_value)
+        try:
+            return action(element)
+        except StaleElementReferenceException:
+            cache.forget((locator_type, locator_value))
+            return action(self._locate(locator_type, locator_value))
+
+    def _wait_policy(self, locator_type: str, locator_value: str, policy: RetryPolicy = None,
+                     event: str = 'appear') -> RetryPolicy:
+        """
+        Policy of one wait on a locator: the given one, or an adaptive copy of self.retry_policy
+        whose polling schedule is learned from the history of the locator
+        """
+        if policy is not None:
+            return policy
+        self.last_wait_policy = AdaptivePolicy.from_policy(self.retry_policy, f"{event}:{locator_type}={locator_value}")
+        return self.last_wait_policy
+
+    @property
+    def last_poll_stats(self) -> Optional[PollStats]:
+        """
+        Poll count, elapsed time and wasted-latency estimate of the last adaptive wait
+        """
+        return self.last_wait_policy.last_stats if self.last_wait_policy is not None else None
+
+    def _act_on_element(self, locator_type: str, locator_value: str, action, timeout: int = None):
+        """
+        Locate the element under the retry policy and call action(element) on it, action must return a truthy value
+        """
+        with self.wait_mode(0):
+            probe = lambda: self._use_element(locator_type, locator_value, action)
+            return self._wait_policy(locator_type, locator_value).call(
+                probe,
+                timeout=timeout,
+                description=f"Element ({locator_type}={locator_value}) not found",
+                final_probe=self._with_alternatives(probe)
+            )
+
+    def _is_displayed(self, locator_type: str, locator_value: str) -> bool:
+        """
+        is_displayed on the cached handle, remembering a positive answer for the current generation
+        """
+        if self._use_element(locator_type, locator_value, lambda element: element.is_displayed()):
+            self.session_state.element_cache.mark_visible((locator_type, locator_value))
+            return True
+        return False
+
+    def _wait_in_snapshot(self, locator_type: str, locator_value: str, timeout: float, visible: bool) -> bool:
+        """
+        Poll the locator against page source snapshots, reusing the cached one for the first check
+
+        Raises:
+            UnsupportedLocatorError: If the locator cannot be resolved against a snapshot
+        """
+        ticks = []
+
+        def found():
+            # The cached snapshot is only trusted on the first tick
+            ticks.append(len(ticks))
+            snapshot = self.get_page_snapshot(refresh=len(ticks) > 1)
+            if visible:
+                return snapshot.is_visible(locator_type, locator_value)
+            return snapshot.is_present(locator_type, locator_value)
+
+        try:
+            return self._wait_policy(locator_type, locator_value).call(found, timeout=timeout or 0)
+        except TimeoutException:
+            return False
+
+    def find_element(self, locator_type: str, locator_value: str, timeout: int = None, policy: RetryPolicy = None):
+        """
+        Find element under the retry policy and return it
 
         Args:
             locator_type: Locator type
             locator_value: Locator value
-            timeout: Optional waiting time, if not specified, use default value
+            timeout: Optional deadline (seconds), if not specified, use the deadline of the policy
+            policy: Optional retry policy overriding self.retry_policy for this call
 
         Returns:
             WebElement: Found element
@@ -37,75 +273,81 @@ class BaseActions:
         Raises:
             TimeoutException: If the element is not found within the specified time
         """
-        if timeout is None:
-            timeout = self.default_timeout
-
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                return WebDriverWait(self.driver, timeout).until(
-                    EC.presence_of_element_located((locator_type, locator_value))
-                )
-            except (TimeoutException, StaleElementReferenceException) as e:
-                if attempt == max_attempts - 1:
-                    raise TimeoutException(
-                        f"Element ({locator_type}={locator_value}) not found after {max_attempts} attempts"
-                    ) from e
-                time.sleep(1)
-                return None
-        return None
+        with self.wait_mode(0):
+            probe = lambda: self._locate(locator_type, locator_value)
+            return self._wait_policy(locator_type, locator_value, policy).call(
+                probe,
+                timeout=timeout,
+                description=f"Element ({locator_type}={locator_value}) not found",
+                final_probe=self._with_alternatives(probe)
+            )
 
-    def is_element_visible(self, locator_type: str, locator_value: str, timeout: int = None):
+    def is_element_visible(self, locator_type: str, locator_value: str, timeout: int = None, policy: RetryPolicy = None):
         """
         Check if the element exists and is visible
         """
-        if timeout is None:
-            timeout = self.default_timeout
+        policy = self._wait_policy(locator_type, locator_value, policy)
 
-        max_attempts = 3
-        for attempt in range(max_attempts):
+        if self.use_snapshot:
             try:
-                WebDriverWait(self.driver, timeout).until(
-                    EC.visibility_of_element_located((locator_type, locator_value))
+                return self._wait_in_snapshot(locator_type, locator_value,
+                                              policy.deadline if timeout is None else timeout, visible=True)
+            except UnsupportedLocatorError:
+                pass
+
+        try:
+            with self.wait_mode(0):
+                probe = lambda: self._is_displayed(locator_type, locator_value)
+                return policy.call(
+                    probe,
+                    timeout=timeout,
+                    description=f"Element ({locator_type}={locator_value}) not visible",
+                    final_probe=self._with_alternatives(probe)
                 )
-                return True
-            except (TimeoutException, StaleElementReferenceException):
-                if attempt == max_attempts - 1:
-                    return False
-                time.sleep(1)
-        return False
+        except TimeoutException:
+            return False
 
     def is_element_present(self, locator_type: str, locator_value: str) -> bool:
         """
         Check if the element exists
         """
+        if self.use_snapshot:
+            try:
+                return self.get_page_snapshot().is_present(locator_type, locator_value)
+            except UnsupportedLocatorError:
+                pass
+
         try:
-            self.driver.find_element(locator_type, locator_value)
+            with self.wait_mode(0):
+                self.session_state.element_cache.put(
+                    (locator_type, locator_value), self._find(locator_type, locator_value))
             return True
         except NoSuchElementException:
             return False
 
-    def click_element(self, locator_type: str, locator_value: str, timeout: int = None):
+    def click_element(self, locator_type: str, locator_value: str, timeout: int = None, policy: RetryPolicy = None):
         """
         Click the clickable element
         """
-        if timeout is None:
-             timeout = self.default_timeout
+        known_visible = self.session_state.element_cache.is_known_visible((locator_type, locator_value))
 
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                element = WebDriverWait(self.driver, timeout).until(
-                    EC.element_to_be_clickable((locator_type, locator_value))
-                )
-                element.click()
-                return
-            except (TimeoutException, StaleElementReferenceException) as e:
-                if attempt == max_attempts - 1:
-                    raise TimeoutException(
-                        f"Element ({locator_type}={locator_value}) not clickable after {max_attempts} attempts"
-                    ) from e
-                time.sleep(1)
+        def click(element):
+            if not ((known_visible or element.is_displayed()) and element.is_enabled()):
+                return False
+            element.click()
+            return True
+
+        def click_when_clickable():
+            return self._use_element(locator_type, locator_value, click)
+
+        with self.wait_mode(0):
+            self._wait_policy(locator_type, locator_value, policy).call(
+                click_when_clickable,
+                timeout=timeout,
+                description=f"Element ({locator_type}={locator_value}) not clickable",
+                final_probe=self._with_alternatives(click_when_clickable)
+            )
+        self.invalidate_snapshot()
 
     def click_if_exists(self, locator_type: str, locator_value: str) -> bool:
         """
@@ -120,24 +362,126 @@ class BaseActions:
         """
         Send keyboard input to the specified element
         """
-        element = self.find_element(locator_type, locator_value)
-        # element.clear()
-        element.send_keys(text)
+        def send_keys(element):
+            # element.clear()
+            element.send_keys(text)
+            return element
+
+        element = self._act_on_element(locator_type, locator_value, send_keys)
+        self.invalidate_snapshot(screen_changed=False)
         return element
 
     def clear_text(self, locator_type: str, locator_value: str):
         """
         Clear the text of the specified element
         """
-        element = self.find_element(locator_type, locator_value)
-        element.clear()
+        def clear(element):
+            element.clear()
+            return True
+
+        self._act_on_element(locator_type, locator_value, clear)
+        self.invalidate_snapshot(screen_changed=False)
+
+    def set_text(self, locator_type: str, locator_value: str, text: str, verify: bool = False,
+                 hide_keyboard: bool = False, timeout: int = None) -> WebElement:
+        """
+        Replace the text of a field, locating it once
+
+        The value is replaced in one call with 'mobile: replaceElementValue' where the driver
+        supports it, otherwise the field is cleared and typed into through the same handle.
+
+        Args:
+            locator_type: Locator type
+            locator_value: Locator value
+            text: New text of the field
+            verify: Read the value attribute back and retry until it equals the text
+            hide_keyboard: Dismiss the keyboard afterwards, only if one is showing
+            timeout: Maximum waiting time (seconds), default is the retry policy deadline
+
+        Returns:
+            WebElement: The field
+        """
+        unsupported = self.session_state.unsupported_commands
+        replace_command = 'mobile: replaceElementValue'
+
+        def replace_value(element):
+            # XCUITest has no replace command, don't spend a round trip finding that out
+            if not self._is_xcuitest() and replace_command not in unsupported:
+                try:
+                    self.driver.execute_script(replace_command, {'elementId': element.id, 'text': text})
+                    return element
+                except WebDriverException as e:
+                    message = str(e.msg or '').lower()
+                    if 'unknown' not in message and 'not supported' not in message and 'not implemented' not in message:
+                        raise
+                    unsupported.add(replace_command)
+            element.clear()
+            element.send_keys(text)
+            return element
+
+        def set_and_verify(element):
+            replace_value(element)
+            if verify and element.get_attribute("value") != text:
+                return False
+            return element
+
+        element = self._act_on_element(locator_type, locator_value, set_and_verify, timeout=timeout)
+        self.invalidate_snapshot(screen_changed=False)
+        if hide_keyboard and self.driver.is_keyboard_shown():
+            self.hide_keyboard()
+        return element
+
+    def element_snapshot(self, locator_type: str, locator_value: str, fields: Tuple[str, ...] = DEFAULT_FIELDS,
+                         timeout: int = None) -> ElementRecord:
+        """
+        Read several properties of an element at once
+
+        In snapshot mode the properties come from the page source snapshot of the current screen
+        (no server call once it is fetched). Otherwise, on XCUITest, several fields are read by one
+        execute_driver script; when the server refuses driver scripts (or for a single field) they
+        are read from the cached element handle, one call per field, the rect being a single call.
+
+        Args:
+            locator_type: Locator type
+            locator_value: Locator value
+            fields: Any of 'text', 'rect', 'value', 'label', 'name', 'type', 'visible', 'enabled', 'selected'
+            timeout: Maximum waiting time (seconds) for the element, default is the retry policy deadline
+
+        Returns:
+            ElementRecord: Immutable record holding the requested fields
+
+        Raises:
+            TimeoutException: If the element is not found within the timeout
+
+        Ex.
+        record = self.element_snapshot(*locator, fields=('text', 'rect', 'enabled'))
+        assert record.text == "Stock" and record.enabled
+        """
+        fields = check_fields(fields)
+        if self.use_snapshot:
+            try:
+                nodes = self.get_page_snapshot().find_all(locator_type, locator_value)
+                if nodes:
+                    return record_from_node(nodes[0], fields)
+            except UnsupportedLocatorError:
+                pass
+        if len(fields) > 1 and self._is_xcuitest():
+            batch = self.batch(server_side=True, timeout=self.default_timeout if timeout is None else timeout,
+                               raise_on_error=False)
+            step = batch.read(locator_type, locator_value, fields)
+            # Reading changes nothing on screen, so run_on_server directly and keep the snapshot
+            if batch.run_on_server():
+                if not step.ok:
+                    raise TimeoutException(f"Element ({locator_type}={locator_value}) not found: {step.error}")
+                return record_from_values(step.value, fields)
+        return self._act_on_element(locator_type, locator_value, lambda element: record_from_element(element, fields),
+                                    timeout=timeout)
 
     def get_element_text(self, locator_type: str, locator_value: str) -> str:
         """
         Get the text of the specified element
         """
-        element = self.find_element(locator_type, locator_value)
-        return element.text
+        return self.element_snapshot(locator_type, locator_value, fields=('text',)).text
 
     def wait_for_element_visible(self, locator_type: str, locator_value: str, timeout: int = 30):
         """
@@ -155,12 +499,16 @@ class BaseActions:
         Raises:
             TimeoutException: If the element is not visible within the specified time
         """
+        def visible_element():
+            if self._is_displayed(locator_type, locator_value):
+                return self._locate(locator_type, locator_value)
+            return None
+
         try:
-            self.driver.implicitly_wait(0)
-            wait = WebDriverWait(self.driver, timeout)
-            return wait.until(
-                EC.visibility_of_element_located((locator_type, locator_value))
-            )
+            with self.wait_mode(0):
+                return self._wait_policy(locator_type, locator_value).call(
+                    visible_element, timeout=timeout, description=f"Element ({locator_type}={locator_value}) not visible",
+                    final_probe=self._with_alternatives(visible_element))
         except NoSuchElementException:
             return False
         except TimeoutException:
@@ -173,10 +521,13 @@ class BaseActions:
         """
         Wait until the specified element is clickable
         """
+        def clickable(element):
+            return element.is_displayed() and element.is_enabled()
+
         try:
-            self.wait.until(
-                EC.element_to_be_clickable((locator_type, locator_value))
-            )
+            with self.wait_mode(0):
+                probe = lambda: self._use_element(locator_type, locator_value, clickable)
+                self._wait_policy(locator_type, locator_value).call(probe, final_probe=self._with_alternatives(probe))
             return True
         except TimeoutException:
             return False
@@ -192,53 +543,48 @@ class BaseActions:
         """
         Scroll vertically in the UIScrollView until the specified element is found
 
+        The search is pushed to the server with XCUITest 'mobile: scroll' when the locator can be
+        expressed as a name or predicate, otherwise the client swipes until the element is visible
+        or two consecutive pages are identical (end of the list).
+
         Args:
             locator_type: Locator type (e.g. AppiumBy.ID)
             locator_value: Locator value
             scroll_container: ScrollView container xpath, default is "//XCUIElementTypeScrollView"
             max_swipes: Maximum number of swipes, default is 5
-            timeout: Waiting time after each swipe (seconds), default is 0.5 seconds
+            timeout: Maximum time to wait for the UI to settle after each swipe (seconds), default is 0.5 seconds
 
         Returns:
             bool: If the element is found and visible, return True, otherwise return False
         """
-        self.driver.implicitly_wait(0)
-        try:
-            element = self.driver.find_element(locator_type, locator_value)
-            if element.is_displayed():
+        with self.wait_mode(0):
+            if self._is_visible_now(locator_type, locator_value):
                 return True
-        except (NoSuchElementException, StaleElementReferenceException):
-            pass
-
-        try:
-            # Find UIScrollView container
-            container = self.driver.find_element(By.XPATH, scroll_container)
-            container_rect = container.rect
 
-            # Use the size and position of the container
-            start_y = container_rect['y'] + int(container_rect['height'] * 0.8)
-            end_y = container_rect['y'] + int(container_rect['height'] * 0.2)
-            start_x = container_rect['x'] + (container_rect['width'] // 2)
+            found = self._server_scroll_to(locator_type, locator_value, scroll_container)
+            if found is not None:
+                return found
 
-        except NoSuchElementException:
-            print("Can't find the UIScrollView container")
-            # When the container is not found, use the size of the entire screen
-            screen_width, screen_height = self.get_screen_size()
-            start_y = int(screen_height * 0.8)
-            end_y = int(screen_height * 0.2)
-            start_x = screen_width // 2
-
-        for _ in range(max_swipes):
-            self.swipe(start_x, start_y, start_x, end_y)
-            time.sleep(timeout)
             try:
-                element = self.driver.find_element(locator_type, locator_value)
-                if element.is_displayed():
-                    return True
-            except (NoSuchElementException, StaleElementReferenceException):
-                continue
-
-        return False
+                # Find UIScrollView container
+                container = self._find(By.XPATH, scroll_container)
+                container_rect = container.rect
+
+                # Use the size and position of the container
+                start_y = container_rect['y'] + int(container_rect['height'] * 0.8)
+                end_y = container_rect['y'] + int(container_rect['height'] * 0.2)
+                start_x = container_rect['x'] + (container_rect['width'] // 2)
+
+            except NoSuchElementException:
+                print("Can't find the UIScrollView container")
+                # When the container is not found, use the size of the entire screen
+                screen_width, screen_height = self.get_screen_size()
+                start_y = int(screen_height * 0.8)
+                end_y = int(screen_height * 0.2)
+                start_x = screen_width // 2
+
+            return self._swipe_until_visible(locator_type, locator_value, (start_x, start_y, start_x, end_y),
+                                             max_swipes, timeout)
     
     def simple_scroll_to_element(self, locator_type: str, locator_value: str, max_swipes: int = 3) -> bool:
         """
@@ -252,91 +598,197 @@ class BaseActions:
         Returns:
             bool: If the element is found, return True, otherwise return False
         """
-        self.driver.implicitly_wait(0)
+        with self.wait_mode(0):
+            # Check if the element is already visible
+            if self._is_visible_now(locator_type, locator_value):
+                return True
 
-        # Check if the element is already visible
-        try:
-            element = self.driver.find_element(locator_type, locator_value)
-            if element.is_displayed():
+            # Get screen size
+            screen_width, screen_height = self.get_screen_size()
+
+            # Fixed swipe parameters
+            start_x = screen_width // 2
+            start_y = int(screen_height * 0.8)
+            end_y = int(screen_height * 0.2)
+
+            if self._swipe_until_visible(locator_type, locator_value, (start_x, start_y, start_x, end_y),
+                                         max_swipes, settle_timeout=1, duration=1000):
+                print("Found the target element!")
                 return True
-        except (NoSuchElementException, StaleElementReferenceException):
-            pass
 
-        # Get screen size
-        screen_width, screen_height = self.get_screen_size()
+            print(f"Simple swipe {max_swipes} times but still not found the target element")
+            return False
 
-        # Fixed swipe parameters
-        start_x = screen_width // 2
-        start_y = int(screen_height * 0.8)
-        end_y = int(screen_height * 0.2)
+    def _is_visible_now(self, locator_type: str, locator_value: str) -> bool:
+        """
+        One-shot visibility check, answered from a page source snapshot when the locator allows it
+        """
+        try:
+            return self.get_page_snapshot().is_visible(locator_type, locator_value)
+        except UnsupportedLocatorError:
+            pass
+        try:
+            return self._is_displayed(locator_type, locator_value)
+        except (NoSuchElementException, StaleElementReferenceException):
+            return False
 
+    def _swipe_until_visible(self, locator_type: str, locator_value: str, swipe: Tuple[int, int, int, int],
+                             max_swipes: int, settle_timeout: float, duration: int = 800) -> bool:
+        """
+        Client-side scroll loop: swipe, wait for the UI to settle and check the settled snapshot,
+        stopping early when a swipe no longer changes the page (end of the list)
+        """
+        previous_fingerprint = self.get_page_snapshot().fingerprint()
         for i in range(max_swipes):
             try:
-                print(f"Executing swipe {i + 1} times")
-
-                # Execute swipe
-                self.driver.swipe(start_x, start_y, start_x, end_y, 1000)
-                time.sleep(1) 
-
-                # Check if the element is visible
-                try:
-                    element = self.driver.find_element(
-                        locator_type, locator_value)
-                    if element.is_displayed():
-                        print("Found the target element!")
-                        return True
-                except (NoSuchElementException, StaleElementReferenceException):
-                    pass
-
-            except Exception as e:
+                self.swipe(*swipe, duration=duration)
+            except WebDriverException as e:
                 print(f"Error during swipe: {str(e)}")
                 continue
-
-        print(f"Simple swipe {max_swipes} times but still not found the target element")
+            self.wait_for_settle(timeout=settle_timeout)
+            if self._is_visible_now(locator_type, locator_value):
+                return True
+            fingerprint = self.get_page_snapshot().fingerprint()
+            if fingerprint == previous_fingerprint:
+                print(f"Reached the end of the list after {i + 1} swipes")
+                return False
+            previous_fingerprint = fingerprint
         return False
 
+    def _is_xcuitest(self) -> bool:
+        """
+        Whether the session runs the XCUITest driver, which understands predicates and 'mobile:' commands
+        """
+        capabilities = getattr(self.driver, 'capabilities', None) or {}
+        automation_name = capabilities.get('automationName') or capabilities.get('appium:automationName') or ''
+        return automation_name.lower() == 'xcuitest'
+
+    def _native_scroll_params(self, locator_type: str, locator_value: str) -> Optional[dict]:
+        """
+        'mobile: scroll' parameters locating the target element, None if the locator cannot be expressed
+        """
+        if locator_type in (AppiumBy.ACCESSIBILITY_ID, AppiumBy.ID, AppiumBy.NAME):
+            return {'name': locator_value}
+        if locator_type == AppiumBy.IOS_PREDICATE:
+            return {'predicateString': locator_value}
+        if locator_type == AppiumBy.CLASS_NAME:
+            return {'predicateString': f"type == '{locator_value}'"}
+        if locator_type == By.XPATH:
+            native_type, native_value = self._native_locator(locator_type, locator_value)
+            if native_type == AppiumBy.IOS_PREDICATE:
+                return {'predicateString': native_value}
+        return None
+
+    def _server_scroll_to(self, locator_type: str, locator_value: str, scroll_container: str) -> Optional[bool]:
+        """
+        Let XCUITest scroll to the element in one call
+
+        Returns:
+            Optional[bool]: True/False if the server performed the search, None if the client loop has to be used
+        """
+        unsupported = self.session_state.unsupported_commands
+        params = self._native_scroll_params(locator_type, locator_value)
+        if params is None or not self._is_xcuitest() or 'mobile: scroll' in unsupported:
+            return None
+
+        try:
+            params['elementId'] = self._find(By.XPATH, scroll_container).id
+        except NoSuchElementException:
+            pass
+        try:
+            self.driver.execute_script('mobile: scroll', params)
+        except WebDriverException as e:
+            message = str(e.msg or '').lower()
+            if 'unknown' in message or 'not supported' in message or 'not implemented' in message:
+                unsupported.add('mobile: scroll')
+                return None
+            print(f"Server-side scroll did not reach the element: {e.msg}")
+            return False
+        finally:
+            self.invalidate_snapshot()
+        return self._is_visible_now(locator_type, locator_value)
+
 
     def swipe(self, start_x: int, start_y: int, end_x: int, end_y: int, duration: int = 800):
         """
-        Execute swipe gesture
+        Execute swipe gesture, coordinates in pixels and duration in milliseconds
         """
-        self.driver.swipe(start_x, start_y, end_x, end_y, duration)
+        self.gesture().swipe(start_x, start_y, end_x, end_y, duration=duration / 1000, unit='px').perform()
+        self.invalidate_snapshot()
 
-    def tap(self, x_ratio: float, y_ratio: float):
+    def tap(self, x_ratio: float, y_ratio: float, within_safe_area: bool = False):
         """
         Use W3C Actions API to tap on the screen at the specified ratio position
 
         Args:
             x_ratio (float): x coordinate of the screen ratio (0.0 ~ 1.0)
             y_ratio (float): y coordinate of the screen ratio (0.0 ~ 1.0)
+            within_safe_area (bool): apply the ratios to the safe area instead of the full screen
         Ex.
         self.common_actions.tap(0.5, 0.9)
         """
-        size = self.get_screen_size()
-        x = int(size[0] * x_ratio)
-        y = int(size[1] * y_ratio)
-        actions = ActionChains(self.driver)
-        pointer = PointerInput(interaction.POINTER_TOUCH, "touch")
+        self.tap_at(*self.viewport.resolve(x_ratio, y_ratio, within_safe_area=within_safe_area))
 
-        actions.w3c_actions = ActionBuilder(self.driver, mouse=pointer)
-        actions.w3c_actions.pointer_action.move_to_location(x, y)
-        actions.w3c_actions.pointer_action.pointer_down()
-        actions.w3c_actions.pointer_action.pause(0.1)
-        actions.w3c_actions.pointer_action.pointer_up()
-        actions.perform()
+    def tap_element_at(self, locator_type: str, locator_value: str, x_ratio: float = 0.5, y_ratio: float = 0.5):
+        """
+        Tap at a position relative to the element rect
+
+        Args:
+            locator_type: Locator type
+            locator_value: Locator value
+            x_ratio (float): x coordinate of the element ratio (0.0 ~ 1.0)
+            y_ratio (float): y coordinate of the element ratio (0.0 ~ 1.0)
+        """
+        rect = self.find_element(locator_type, locator_value).rect
+        self.tap_at(*self.viewport.resolve(x_ratio, y_ratio, element_rect=rect))
+
+    def tap_at(self, x: int, y: int):
+        """
+        Use W3C Actions API to tap on the screen at absolute pixel coordinates
+        """
+        self.gesture().tap(x, y, unit='px').perform()
+        self.invalidate_snapshot()
+
+    def gesture(self) -> Gesture:
+        """
+        Compose taps, long presses, swipes and pauses performed in one W3C actions call,
+        call invalidate_snapshot() afterwards if the gesture changes the screen
+
+        Ex.
+        self.gesture().tap(0.5, 0.2).pause(0.3).tap(0.85, 0.92).perform()
+        """
+        return Gesture(self.driver, self.viewport)
 
     def hide_keyboard(self):
         """
         Hide keyboard
         """
         self.driver.hide_keyboard()
+        self.invalidate_snapshot()
+
+    @property
+    def viewport(self):
+        """
+        Session-scoped window geometry, the window size is fetched once per session
+        """
+        return self.session_state.viewport
 
     def get_screen_size(self) -> Tuple[int, int]:
         """
         Get screen size
         """
-        size = self.driver.get_window_size()
-        return size['width'], size['height']
+        return self.viewport.size()
+
+    def set_orientation(self, orientation: str):
+        """
+        Rotate the device and drop the cached viewport
+
+        Args:
+            orientation: 'PORTRAIT' or 'LANDSCAPE'
+        """
+        self.driver.orientation = orientation
+        self.viewport.invalidate()
+        self.invalidate_snapshot()
 
     def wait_for_element_present(self, locator_type: str, locator_value: str, timeout: int = 30) -> bool:
         """
@@ -350,17 +802,282 @@ class BaseActions:
         Returns:
             bool: If the element appears and is visible, return True, otherwise return False
         """
+        # The visible handle stays cached, so a following click_element does not locate it again
+        return self.is_element_visible(locator_type, locator_value, timeout=timeout)
+
+    def current_screen(self, refresh: bool = True) -> Optional[str]:
+        """
+        Name of the registered screen currently shown, answered from one page source fetch
+
+        Args:
+            refresh: Fetch a new page source instead of trusting the cached snapshot
+
+        Returns:
+            Optional[str]: Screen name, None if no registered screen matches
+        """
+        match = screen_identifier.identify(self.get_page_snapshot(refresh=refresh))
+        return match.name if match is not None else None
+
+    def wait_for_screen(self, screen: Union[Screen, str], timeout: float = 30) -> bool:
+        """
+        Wait until the app shows the screen, one page source fetch per poll whatever the number of anchors
+
+        Args:
+            screen: Screen or screen name
+            timeout: Maximum waiting time (seconds)
+
+        Returns:
+            bool: True if the screen is shown before the timeout, otherwise False
+        """
+        name = screen if isinstance(screen, str) else screen.name
+        ticks = []
+
+        def shown():
+            # The cached snapshot is only trusted on the first tick
+            ticks.append(len(ticks))
+            return self.current_screen(refresh=len(ticks) > 1) == name
+
+        self.last_wait_policy = AdaptivePolicy.from_policy(self.retry_policy, f"screen:{name}")
         try:
-            # Temporarily disable implicit wait to avoid conflict with explicit wait
-            self.driver.implicitly_wait(0)
-            wait = WebDriverWait(self.driver, timeout)
-            wait.until(
-                EC.visibility_of_element_located((locator_type, locator_value))
-            )
-            return True
+            return self.last_wait_policy.call(shown, timeout=timeout)
+        except TimeoutException:
+            print(f"Screen {name} not shown after {timeout} seconds, current screen: {self.current_screen()}")
+            return False
+
+    def ensure_screen(self, screen: Union[Screen, str], timeout: float = 10) -> bool:
+        """
+        Bring the app to the screen, following the cheapest registered transitions from the current one
+
+        Args:
+            screen: Screen or screen name
+            timeout: Maximum waiting time for each screen on the way (seconds)
+
+        Returns:
+            bool: True if the screen is shown, False if it cannot be reached
+        """
+        name = screen if isinstance(screen, str) else screen.name
+        current = self.current_screen()
+        route = screen_identifier.route(current, name) if current is not None else None
+        if route is None:
+            print(f"No known way from screen {current} to {name}")
+            return False
+        for transition in route:
+            print(f"Going from screen {transition.source} to {transition.target}")
+            transition.action(self.driver)
+            self.invalidate_snapshot()
+            if not self.wait_for_screen(transition.target, timeout=timeout):
+                return False
+        return True
+
+    def wait_for_settle(self, locator_type: str = None, locator_value: str = None, timeout: float = 1.0,
+                        stable_samples: int = 2) -> bool:
+        """
+        Wait until the UI is idle instead of sleeping a fixed time after a gesture or toggle
+
+        Without a locator the page source structure is sampled (the last sample is kept as the
+        snapshot of the settled screen). With a locator only the rect and value of that element are sampled.
+
+        Args:
+            locator_type: Optional locator type of the element to watch
+            locator_value: Optional locator value of the element to watch
+            timeout: Maximum waiting time (seconds)
+            stable_samples: Number of consecutive equal fingerprints meaning the UI is idle
+
+        Returns:
+            bool: True if the UI settled before the timeout, otherwise False
+        """
+        if locator_type is None:
+            sample = lambda: self.get_page_snapshot(refresh=True).fingerprint()
+        else:
+            sample = self._element_fingerprint_sampler(locator_type, locator_value)
+        with self.wait_mode(0):
+            return SettleDetector(sample, self.SETTLE_INTERVAL, stable_samples).wait(timeout)
+
+    def _element_fingerprint_sampler(self, locator_type: str, locator_value: str):
+        """
+        Sampler returning (rect, value) of the element, locating it again only when the handle goes stale
+        """
+        def fingerprint(element):
+            return tuple(sorted(element.rect.items())), element.get_attribute("value")
+
+        def sample():
+            try:
+                return self._use_element(locator_type, locator_value, fingerprint)
+            except (NoSuchElementException, StaleElementReferenceException):
+                return None
+
+        return sample
+
+    def visible_snapshot_nodes(self, locator_type: str, locator_value: str, timeout: float = 30,
+                               min_count: int = 1) -> list:
+        """
+        Poll page source snapshots until at least min_count matching nodes are visible
+
+        Args:
+            locator_type: Locator type
+            locator_value: Locator value
+            timeout: Maximum waiting time (seconds)
+            min_count: Minimum number of visible nodes
+
+        Returns:
+            list: The visible snapshot nodes (xml.etree elements, their attributes hold name, value, rect...)
+
+        Raises:
+            UnsupportedLocatorError: If the locator cannot be resolved on a snapshot
+            TimeoutException: If the count is not reached in time
+
+        Ex.
+        rows = self.visible_snapshot_nodes(AppiumBy.CLASS_NAME, "XCUIElementTypeCell", min_count=3)
+        names = [row.attrib.get('name') for row in rows]
+        """
+        ticks = []
+        unsupported = []
+
+        def enough_visible():
+            # The cached snapshot is only trusted on the first tick
+            ticks.append(len(ticks))
+            snapshot = self.get_page_snapshot(refresh=len(ticks) > 1)
+            try:
+                nodes = snapshot.find_all(locator_type, locator_value)
+            except UnsupportedLocatorError as e:
+                unsupported.append(e)
+                return True
+            visible_nodes = [node for node in nodes if node.attrib.get('visible') == 'true']
+            return visible_nodes if len(visible_nodes) >= min_count else None
+
+        result = self.retry_policy.call(enough_visible, timeout=timeout,
+                                        description=f"Visible nodes ({locator_type}={locator_value}) not reached")
+        if unsupported:
+            raise unsupported[0]
+        return result
+
+    def _locator_matches(self, locator: Tuple[str, str], visible: bool, snapshot: Optional[PageSnapshot]) -> bool:
+        """
+        Check one locator against the snapshot if there is one, otherwise with a single find_elements call
+        """
+        if snapshot is not None:
+            try:
+                return snapshot.is_visible(*locator) if visible else snapshot.is_present(*locator)
+            except UnsupportedLocatorError:
+                pass
+        elements = self._find_all(*locator)
+        return bool(elements) and (not visible or elements[0].is_displayed())
+
+    def _poll_snapshot(self, ticks: list) -> Optional[PageSnapshot]:
+        """
+        Snapshot for one polling tick of the multi-locator waits, the cached one is only trusted on the first tick
+        """
+        if not self.use_snapshot:
+            return None
+        ticks.append(len(ticks))
+        return self.get_page_snapshot(refresh=len(ticks) > 1)
+
+    def wait_for_any(self, *locators: Tuple[str, str], timeout: int = 30, visible: bool = True) -> Optional[Tuple[str, str]]:
+        """
+        Poll every locator in one loop under one deadline and return the first one that matches
+
+        Args:
+            locators: (locator_type, locator_value) tuples
+            timeout: Maximum waiting time (seconds) for all locators together
+            visible: Require the element to be visible, not only present
+
+        Returns:
+            Optional[Tuple[str, str]]: The matching locator, None if nothing matched before the deadline
+
+        Ex.
+        screen = self.wait_for_any(WELCOME_TEXT, HOME_TAB)
+        """
+        ticks = []
+
+        def first_match():
+            snapshot = self._poll_snapshot(ticks)
+            for locator in locators:
+                if self._locator_matches(locator, visible, snapshot):
+                    return locator
+            return None
+
+        try:
+            with self.wait_mode(0):
+                return self.retry_policy.call(first_match, timeout=timeout,
+                                              description=f"None of {len(locators)} locators matched")
         except TimeoutException:
+            return None
+
+    def wait_for_all(self, *locators: Tuple[str, str], timeout: int = 30, visible: bool = True) -> bool:
+        """
+        Poll every locator in one loop under one deadline until all of them match
+
+        Args:
+            locators: (locator_type, locator_value) tuples
+            timeout: Maximum waiting time (seconds) for all locators together
+            visible: Require the elements to be visible, not only present
+
+        Returns:
+            bool: True if every locator matched before the deadline, otherwise False
+        """
+        ticks = []
+        pending = list(locators)
+
+        def all_matched():
+            snapshot = self._poll_snapshot(ticks)
+            if snapshot is None and self._is_xcuitest():
+                found = self.find_elements_batch(*pending, visible=visible, require_all=True)
+                pending[:] = [locator for locator in pending if not found.get(locator)]
+            else:
+                pending[:] = [locator for locator in pending if not self._locator_matches(locator, visible, snapshot)]
+            return not pending
+
+        try:
+            with self.wait_mode(0):
+                return self.retry_policy.call(all_matched, timeout=timeout,
+                                              description=f"{len(pending)} of {len(locators)} locators not matched")
+        except TimeoutException:
+            print(f"Locators not matched after {timeout} seconds: {pending}")
             return False
 
+    def find_elements_batch(self, *locators: Tuple[str, str], visible: bool = False,
+                            require_all: bool = False) -> Dict[Tuple[str, str], List[WebElement]]:
+        """
+        Resolve several locators with one compound -ios predicate string query
+
+        Accessibility-id and simple attribute locators are OR-ed into one find_elements call and
+        the results are mapped back by the attributes of one page source snapshot; other locators
+        fall back to one find_elements each.
+        The first element found for each locator is kept in the element cache.
+
+        Args:
+            locators: (locator_type, locator_value) tuples
+            visible: Only return visible elements
+            require_all: Skip mapping the results back when fewer elements than locators were returned,
+                         the returned dict is then empty
+
+        Returns:
+            Dict[Tuple[str, str], List[WebElement]]: Elements per locator
+        """
+        batchable, others = BatchResolver.split(locators)
+        result = {}
+        with self.wait_mode(0):
+            if batchable:
+                resolver = BatchResolver(batchable, visible=visible)
+                elements = self._find_all(AppiumBy.IOS_PREDICATE, resolver.query())
+                if require_all and len(elements) < len(batchable):
+                    return {}
+                snapshot = None
+                if len(batchable) > 1 and elements:
+                    snapshot = self.get_page_snapshot(refresh=True)
+                result.update(resolver.demux(elements, stop_when_all_found=require_all, snapshot=snapshot))
+            for locator in others:
+                elements = self._find_all(*locator)
+                result[locator] = [element for element in elements if not visible or element.is_displayed()]
+
+        cache = self.session_state.element_cache
+        for locator, elements in result.items():
+            if elements:
+                cache.put(locator, elements[0])
+                if visible:
+                    cache.mark_visible(locator)
+        return result
+
     def wait_for_element_disappear(self, locator_type: str, locator_value: str, timeout: int = 30) -> Union[WebElement, bool]:
         """
         Quickly check if the element exists and is visible
@@ -377,11 +1094,16 @@ class BaseActions:
         Raises:
             TimeoutException: If the element does not disappear within the specified time
         """
+        def invisible():
+            try:
+                return not any(element.is_displayed() for element in self._find_all(locator_type, locator_value))
+            except StaleElementReferenceException:
+                # The element went away between the lookup and the visibility check
+                return True
+
         try:
-            self.driver.implicitly_wait(0)
-            return WebDriverWait(self.driver, timeout).until(EC.invisibility_of_element_located((locator_type, locator_value)))
-        except NoSuchElementException:
-            return True
+            with self.wait_mode(0):
+                return self._wait_policy(locator_type, locator_value, event='disappear').call(invisible, timeout=timeout)
         except TimeoutException:
             raise TimeoutException(f"Element ({locator_type}={locator_value}) still visible after {timeout} seconds")
 
@@ -389,29 +1111,34 @@ class BaseActions:
         """
         Scroll to the left in the specified UICollectionView until the specified element is found
 
+        Like scroll_to_element, the search runs server-side when possible and the client loop
+        stops early at the end of the list.
+
         Args:
             locator_type: Locator type (e.g. AppiumBy.ID)
             locator_value: Locator value
             scroll_container: CollectionView container xpath, default is "//XCUIElementTypeCollectionView"
             max_swipes: Maximum number of swipes, default is 3
-            timeout: Waiting time after each swipe (seconds), default is 0.5 seconds
+            timeout: Maximum time to wait for the UI to settle after each swipe (seconds), default is 0.5 seconds
 
         Returns:
             bool: If the element is found and visible, return True, otherwise return False
         """
-
-        self.driver.implicitly_wait(0)
-        try:
-            element = self.driver.find_element(locator_type, locator_value)
-            if element.is_displayed():
+        with self.wait_mode(0):
+            if self._is_visible_now(locator_type, locator_value):
                 return True
-        except (NoSuchElementException, StaleElementReferenceException):
-            pass
 
-        # Get the position and size of the UICollectionView
-        try:
-            collection_view = self.driver.find_element(By.XPATH, scroll_container)
-            container_rect = collection_view.rect
+            found = self._server_scroll_to(locator_type, locator_value, scroll_container)
+            if found is not None:
+                return found
+
+            # Get the position and size of the UICollectionView
+            try:
+                collection_view = self._find(By.XPATH, scroll_container)
+                container_rect = collection_view.rect
+            except NoSuchElementException:
+                print("Can't find the specified UICollectionView")
+                return False
 
             # Get the coordinates and size of the scroll container
             container_x = container_rect['x']
@@ -424,21 +1151,8 @@ class BaseActions:
             end_x = container_x + int(container_width * 0.2)    # 20% of the container width
             swipe_y = container_y + (container_height // 2)     # Vertical center of the container
 
-            for _ in range(max_swipes):
-                self.swipe(start_x, swipe_y, end_x, swipe_y)
-                time.sleep(timeout)
-                try:
-                    element = self.driver.find_element(locator_type, locator_value)
-                    if element.is_displayed():
-                        return True
-                except (NoSuchElementException, StaleElementReferenceException):
-                    continue
-
-        except NoSuchElementException:
-            print("Can't find the specified UICollectionView")
-            return False
-
-        return False
+            return self._swipe_until_visible(locator_type, locator_value, (start_x, swipe_y, end_x, swipe_y),
+                                             max_swipes, timeout)
 
     def get_element_attribute(self, locator_type: str, locator_value: str, attribute: str) -> str:
         """
@@ -452,8 +1166,10 @@ class BaseActions:
         Returns:
             str: Attribute value
         """
-        element = self.find_element(locator_type, locator_value)
-        return element.get_attribute(attribute)
+        if attribute in ATTRIBUTE_FIELDS:
+            return getattr(self.element_snapshot(locator_type, locator_value, fields=(attribute,)), attribute)
+        # The action result must be truthy, hence the tuple around a possibly empty attribute value
+        return self._act_on_element(locator_type, locator_value, lambda element: (element.get_attribute(attribute),))[0]
 
 
     def get_element_location(self, locator_type: str, locator_value: str) -> Tuple[int, int]:
@@ -467,9 +1183,7 @@ class BaseActions:
         Returns:
             Tuple[int, int]: The x, y coordinates of the element
         """
-        element = self.find_element(locator_type, locator_value)
-        location = element.location
-        return location['x'], location['y']
+        return self.element_snapshot(locator_type, locator_value, fields=('rect',)).location
 
     def get_element_size(self, locator_type: str, locator_value: str) -> Tuple[int, int]:
         """
@@ -482,9 +1196,7 @@ class BaseActions:
         Returns:
             Tuple[int, int]: The width and height of the element
         """
-        element = self.find_element(locator_type, locator_value)
-        size = element.size
-        return size['width'], size['height']
+        return self.element_snapshot(locator_type, locator_value, fields=('rect',)).size
 
     def is_toggle_on(self, locator_type: str, locator_value: str) -> bool:
         """
@@ -492,13 +1204,57 @@ class BaseActions:
         value="1" means ON, value="0" means OFF (iOS UISwitch)
         """
         try:
-            element = self.find_element(locator_type, locator_value)
-            value = element.get_attribute("value")
+            value = self.element_snapshot(locator_type, locator_value, fields=('value',)).value
             print(f"Toggle value attribute: {value}")
             return value == "1"
         except (NoSuchElementException, TimeoutException):
             return False
 
+    def wait_for_attribute(self, locator_type: str, locator_value: str, name: str,
+                           predicate: Union[Callable[[Optional[str]], bool], str], timeout: float = 5) -> Optional[str]:
+        """
+        Poll an attribute on the cached element handle until the predicate accepts its value
+
+        Polling starts every ATTRIBUTE_POLL_INITIAL seconds and backs off up to ATTRIBUTE_POLL_MAX,
+        so a quick change (a switch flipping) is seen within a few tens of milliseconds.
+
+        Args:
+            locator_type: Locator type
+            locator_value: Locator value
+            name: Attribute name, e.g. "value"
+            predicate: Callable receiving the attribute value, or the expected value itself
+            timeout: Maximum waiting time (seconds)
+
+        Returns:
+            Optional[str]: The attribute value accepted by the predicate
+
+        Raises:
+            TimeoutException: If the predicate does not accept the value within the timeout
+
+        Ex.
+        self.wait_for_attribute(*locator, "value", "1", timeout=1)
+        """
+        accepts = predicate if callable(predicate) else (lambda value: value == predicate)
+        observed = []
+
+        def read_attribute(element):
+            value = element.get_attribute(name)
+            observed.append(value)
+            # Wrapped so an accepted empty value still ends the retry loop
+            return (value,) if accepts(value) else None
+
+        policy = self.retry_policy.with_overrides(initial_backoff=self.ATTRIBUTE_POLL_INITIAL, multiplier=1.5,
+                                                  max_backoff=self.ATTRIBUTE_POLL_MAX, jitter=0)
+        try:
+            with self.wait_mode(0):
+                return policy.call(lambda: self._use_element(locator_type, locator_value, read_attribute),
+                                   timeout=timeout)[0]
+        except TimeoutException:
+            last_value = observed[-1] if observed else None
+            raise TimeoutException(
+                f"Attribute {name} of element ({locator_type}={locator_value}) still {last_value!r} after {timeout} seconds"
+            )
+
     def toggle_switch(self, locator_type: str, locator_value: str, should_be_on: bool = True) -> bool:
         """
         Toggle the state of the toggle
@@ -515,9 +1271,8 @@ class BaseActions:
             current_state = self.is_toggle_on(locator_type, locator_value)
             if current_state != should_be_on:
                 self.click_element(locator_type, locator_value)
-                # Wait for the state to change
-                time.sleep(0.5)
-                return self.is_toggle_on(locator_type, locator_value) == should_be_on
+                # Returns as soon as the value flips
+                self.wait_for_attribute(locator_type, locator_value, "value", "1" if should_be_on else "0", timeout=1)
             return True
         except (NoSuchElementException, TimeoutException):
             return False
@@ -557,38 +1312,45 @@ class BaseActions:
         """Get readable text for toggle state"""
         return 'On' if state else 'Off'
 
-    def _perform_toggle_switch(self, locator_type: str, locator_value: str, should_be_on: bool) -> bool:
+    def _perform_toggle_switch(self, locator_type: str, locator_value: str, should_be_on: bool,
+                               policy: RetryPolicy = None) -> bool:
         """Perform the actual toggle switch with retry logic"""
         print(f"Switching toggle to {self._get_toggle_state_text(should_be_on)} state")
-        
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            if self._attempt_single_toggle_click(locator_type, locator_value, should_be_on, attempt + 1):
-                return True
-            
-            if attempt < max_attempts - 1:
-                print(f"Attempt {attempt + 1} failed, trying again...")
-                time.sleep(1)
-        
-        print(f"Warning: Failed to switch toggle to {self._get_toggle_state_text(should_be_on)} state after {max_attempts} attempts")
-        return False
+
+        # Every attempt clicks the switch, so cap the attempts as well as the deadline
+        policy = (policy or self.retry_policy).with_overrides(max_attempts=3)
+        attempts = []
+
+        def attempt_toggle():
+            attempts.append(len(attempts) + 1)
+            if attempts[-1] > 1:
+                print(f"Attempt {attempts[-1] - 1} failed, trying again...")
+            return self._attempt_single_toggle_click(locator_type, locator_value, should_be_on, attempts[-1])
+
+        try:
+            with self.wait_mode(0):
+                return policy.call(attempt_toggle, description=f"Toggle ({locator_type}={locator_value}) not switched")
+        except TimeoutException:
+            print(f"Warning: Failed to switch toggle to {self._get_toggle_state_text(should_be_on)} state after {len(attempts)} attempts")
+            return False
 
     def _attempt_single_toggle_click(self, locator_type: str, locator_value: str, should_be_on: bool, attempt_num: int) -> bool:
         """Attempt a single toggle click and verify the result"""
         try:
-            element = self.wait.until(EC.element_to_be_clickable((locator_type, locator_value)))
+            element = self._locate(locator_type, locator_value)
+            if not element.is_enabled():
+                return False
             element.click()
-            time.sleep(1)
-            
-            new_state = self.is_toggle_on(locator_type, locator_value)
-            print(f"Toggle New State (Attempt {attempt_num}): {self._get_toggle_state_text(new_state)}")
-            
-            if new_state == should_be_on:
-                print(f"Toggle switched to {self._get_toggle_state_text(should_be_on)} state successfully")
-                return True
-                
-            return False
-            
+            self.invalidate_snapshot()
+            try:
+                self.wait_for_attribute(locator_type, locator_value, "value", "1" if should_be_on else "0", timeout=1)
+            except TimeoutException:
+                print(f"Toggle New State (Attempt {attempt_num}): {self._get_toggle_state_text(not should_be_on)}")
+                return False
+
+            print(f"Toggle switched to {self._get_toggle_state_text(should_be_on)} state successfully")
+            return True
+
         except Exception as e:
             print(f"Error during attempt {attempt_num}: {str(e)}")
             return False
@@ -605,22 +1367,76 @@ class BaseActions:
         """
         Find all matching elements and return the number
         """
-        elements = self.driver.find_elements(locator_type, locator_value)
+        with self.wait_mode(0):
+            elements = self._find_all(locator_type, locator_value)
         return len(elements)
     
-    def wait_for_elements_visible(self, locator_type: str, locator_value: str, timeout: int = 30, min_count: int = 1):
-        '''wait for multiple elements to be visible'''
-        try:
-            self.driver.implicitly_wait(0)
-            wait = WebDriverWait(self.driver, timeout)
+    def _visible_only_locator(self, locator_type: str, locator_value: str) -> Optional[Tuple[str, str]]:
+        """
+        Rewrite the locator so the server only returns visible elements, None if it cannot be rewritten
+        """
+        if not self._is_xcuitest():
+            return None
+        if locator_type == AppiumBy.IOS_PREDICATE:
+            return AppiumBy.IOS_PREDICATE, f"({locator_value}) AND visible == 1"
+        if locator_type == AppiumBy.IOS_CLASS_CHAIN:
+            # An index as the last filter would be applied before the visibility filter
+            if re.search(r'\[-?\d+\]$', locator_value):
+                return None
+            return AppiumBy.IOS_CLASS_CHAIN, f"{locator_value}[`visible == 1`]"
+        conditions = compile_conditions((locator_type, locator_value))
+        if conditions is not None:
+            clause = ' AND '.join(f"{attribute} == {quote_predicate_value(value)}" for attribute, value in conditions)
+            return AppiumBy.IOS_PREDICATE, f"{clause} AND visible == 1"
+        if locator_type == AppiumBy.XPATH:
+            try:
+                parse_xpath(locator_value)
+            except UnsupportedLocatorError:
+                return None
+            return AppiumBy.XPATH, f'{locator_value}[@visible="true"]'
+        return None
+
+    def wait_for_elements_visible(self, locator_type: str, locator_value: str, timeout: int = 30, min_count: int = 1,
+                                  bulk_visibility: bool = True):
+        '''
+        wait for multiple elements to be visible
+
+        With bulk_visibility the visibility filter is pushed into the locator query (or resolved
+        from the page source snapshot in snapshot mode), so a poll costs one call whatever the
+        number of elements; otherwise is_displayed is called on every element.
 
-            def elements_visible(driver):
-                elements = driver.find_elements(locator_type, locator_value)
+        In snapshot mode the count is awaited on page source snapshots and the elements are then
+        fetched with a single lookup; the live elements are only polled when the locator cannot be
+        resolved on a snapshot or the screen changed in between. visible_snapshot_nodes returns the
+        snapshot nodes themselves.
+
+        Returns:
+            List[WebElement]: The visible elements
+        '''
+        visible_locator = self._visible_only_locator(locator_type, locator_value) if bulk_visibility else None
+
+        def elements_visible():
+            if visible_locator is not None:
+                visible_elements = self._find_all(*visible_locator)
+            else:
+                elements = self._find_all(locator_type, locator_value)
                 visible_elements = [
                     elem for elem in elements if elem.is_displayed()]
-                return visible_elements if len(visible_elements) >= min_count else None
+            return visible_elements if len(visible_elements) >= min_count else None
 
-            return wait.until(elements_visible)
+        try:
+            with self.wait_mode(0):
+                if bulk_visibility and self.use_snapshot and visible_locator is not None:
+                    try:
+                        self.visible_snapshot_nodes(locator_type, locator_value, timeout, min_count)
+                        visible_elements = elements_visible()
+                        if visible_elements:
+                            return visible_elements
+                    except UnsupportedLocatorError:
+                        pass
+                return self._wait_policy(locator_type, locator_value, event=f'appear[{min_count}]').call(
+                    elements_visible, timeout=timeout, description=f"Elements ({locator_type}={locator_value}) not visible",
+                    final_probe=self._with_alternatives(elements_visible))
         except TimeoutException:
             raise TimeoutException(
                 f"Expected at least {min_count} elements ({locator_type}={locator_value}) not visible after {timeout} seconds")
\ No newline at end of file
@@ -0,0 +1,160 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.webdriver.remote.webelement import WebElement
+from pages.base_actions.page_snapshot import PageSnapshot, UnsupportedLocatorError, parse_predicate, parse_xpath
+
+Locator = Tuple[str, str]
+Conditions = Tuple[Tuple[str, str], ...]
+
+_BATCHABLE_ATTRIBUTES = ('name', 'label', 'value', 'type')
+
+
+def quote_predicate_value(value: str) -> str:
+    """
+    Quote a string for use in an -ios predicate string
+    """
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def compile_conditions(locator: Locator) -> Optional[Conditions]:
+    """
+    Express a locator as attribute equality conditions, None if it is not a simple attribute locator
+
+    Supported: accessibility id / id / name, class name, predicates made of `attr == 'value'`
+    joined by AND, and single-step XPath like //Type[@attr="value" and ...].
+    """
+    locator_type, locator_value = locator
+    if locator_type in (AppiumBy.ACCESSIBILITY_ID, AppiumBy.ID, AppiumBy.NAME):
+        return (('name', locator_value),)
+    if locator_type == AppiumBy.CLASS_NAME:
+        return (('type', locator_value),)
+    try:
+        if locator_type == AppiumBy.IOS_PREDICATE:
+            return _predicate_conditions(parse_predicate(locator_value))
+        if locator_type == AppiumBy.XPATH:
+            return _xpath_conditions(parse_xpath(locator_value))
+    except UnsupportedLocatorError:
+        return None
+    return None
+
+
+def _predicate_conditions(expression: tuple) -> Optional[Conditions]:
+    operands = expression[1] if expression[0] == 'and' else (expression,)
+    conditions = []
+    for operand in operands:
+        if operand[0] != 'cmp':
+            return None
+        _, attribute, operator, value, flags = operand
+        if operator != '==' or flags or attribute not in _BATCHABLE_ATTRIBUTES or not isinstance(value, str):
+            return None
+        conditions.append((attribute, value))
+    return tuple(conditions)
+
+
+def _xpath_conditions(steps: tuple) -> Optional[Conditions]:
+    if len(steps) != 1 or steps[0].axis != 'descendant':
+        return None
+    step = steps[0]
+    conditions = [] if step.tag == '*' else [('type', step.tag)]
+    for predicate in step.predicates:
+        operands = predicate[1] if predicate[0] == 'and' else (predicate,)
+        for operand in operands:
+            if operand[0] != 'eq' or operand[1] not in _BATCHABLE_ATTRIBUTES:
+                return None
+            conditions.append((operand[1], operand[2]))
+    return tuple(conditions) if conditions else None
+
+
+class BatchResolver:
+    """
+    Resolve several locators with one find_elements call.
+
+    The locators are compiled into a single -ios predicate string OR query; the returned
+    elements are demultiplexed back to the requesting locators by the attributes the conditions
+    are made of (only when more than one locator is involved). The attributes are taken from one
+    page source snapshot when it lists the same hits, otherwise they are read element by element.
+    """
+
+    def __init__(self, locators: Iterable[Locator], visible: bool = False):
+        """
+        Args:
+            locators: Locators accepted by compile_conditions
+            visible: Only match visible elements
+        """
+        self.conditions: Dict[Locator, Conditions] = OrderedDict()
+        for locator in locators:
+            conditions = compile_conditions(locator)
+            if conditions is None:
+                raise UnsupportedLocatorError(f"Locator {locator} cannot be batched")
+            self.conditions[tuple(locator)] = conditions
+        self.visible = visible
+        self.attribute_reads = 0
+
+    @staticmethod
+    def split(locators: Sequence[Locator]) -> Tuple[List[Locator], List[Locator]]:
+        """
+        Split locators into (batchable, others)
+        """
+        batchable, others = [], []
+        for locator in locators:
+            (batchable if compile_conditions(locator) is not None else others).append(tuple(locator))
+        return batchable, others
+
+    def query(self) -> str:
+        """
+        The compound -ios predicate string
+        """
+        clauses = []
+        for conditions in dict.fromkeys(self.conditions.values()):
+            clauses.append(' AND '.join(f"{attribute} == {quote_predicate_value(value)}"
+                                        for attribute, value in conditions))
+        query = ' OR '.join(f"({clause})" for clause in clauses)
+        return f"({query}) AND visible == 1" if self.visible else query
+
+    def demux(self, elements: List[WebElement], stop_when_all_found: bool = False,
+              snapshot: PageSnapshot = None) -> Dict[Locator, List[WebElement]]:
+        """
+        Map the elements returned by the compound query back to the locators
+
+        Args:
+            elements: Result of find_elements with query()
+            stop_when_all_found: Stop reading attributes once every locator has at least one element
+            snapshot: Page source snapshot taken right after the query; when the compound query matches
+                      as many nodes in it as elements were returned, the nodes give the attributes in
+                      document order and no get_attribute call is made
+
+        Returns:
+            Dict[Locator, List[WebElement]]: Matching elements per locator, in document order
+        """
+        result = OrderedDict((locator, []) for locator in self.conditions)
+        if len(self.conditions) == 1:
+            result[next(iter(self.conditions))] = list(elements)
+            return result
+
+        nodes = self._snapshot_nodes(snapshot)
+        if nodes is not None and len(nodes) != len(elements):
+            nodes = None
+        attributes = sorted({attribute for conditions in self.conditions.values() for attribute, _ in conditions})
+        for index, element in enumerate(elements):
+            if nodes is not None:
+                values = {attribute: nodes[index].attrib.get(attribute) for attribute in attributes}
+            else:
+                values = {}
+                for attribute in attributes:
+                    values[attribute] = element.get_attribute(attribute)
+                    self.attribute_reads += 1
+            for locator, conditions in self.conditions.items():
+                if all(values[attribute] == value for attribute, value in conditions):
+                    result[locator].append(element)
+            if stop_when_all_found and all(result.values()):
+                break
+        return result
+
+    def _snapshot_nodes(self, snapshot: Optional[PageSnapshot]) -> Optional[list]:
+        if snapshot is None:
+            return None
+        try:
+            return snapshot.find_all(AppiumBy.IOS_PREDICATE, self.query())
+        except UnsupportedLocatorError:
+            return None
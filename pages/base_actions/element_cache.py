@@ -0,0 +1,47 @@
+from typing import Dict, Optional, Set, Tuple
+from selenium.webdriver.remote.webelement import WebElement
+
+Locator = Tuple[str, str]
+
+
+class ElementCache:
+    """
+    Resolved WebElement handles of the current screen generation, keyed by locator.
+
+    The cache is cleared whenever an action may have changed the screen; a handle that
+    turns out to be stale within the same generation is dropped and looked up again.
+    """
+
+    def __init__(self):
+        self._elements: Dict[Locator, WebElement] = {}
+        self._visible: Set[Locator] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, locator: Locator) -> Optional[WebElement]:
+        element = self._elements.get(locator)
+        if element is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return element
+
+    def put(self, locator: Locator, element: WebElement):
+        self._elements[locator] = element
+
+    def forget(self, locator: Locator):
+        self._elements.pop(locator, None)
+        self._visible.discard(locator)
+
+    def mark_visible(self, locator: Locator):
+        """
+        Remember that the cached handle was seen displayed in this generation
+        """
+        self._visible.add(locator)
+
+    def is_known_visible(self, locator: Locator) -> bool:
+        return locator in self._visible
+
+    def clear(self):
+        self._elements.clear()
+        self._visible.clear()
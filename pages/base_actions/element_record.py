@@ -0,0 +1,127 @@
+from collections import namedtuple
+from typing import Dict, Iterable, Tuple
+import xml.etree.ElementTree as ET
+
+Rect = namedtuple('Rect', ['x', 'y', 'width', 'height'])
+
+# Fields element_snapshot can fetch; string attributes are read with get_attribute on a live element
+ATTRIBUTE_FIELDS = ('value', 'label', 'name', 'type')
+STATE_FIELDS = ('visible', 'enabled', 'selected')
+FIELDS = ('text', 'rect') + ATTRIBUTE_FIELDS + STATE_FIELDS
+DEFAULT_FIELDS = ('text', 'value', 'rect', 'visible')
+
+
+class ElementRecord:
+    """
+    Immutable properties of one element, read in one go by BaseActions.element_snapshot.
+
+    Only the requested fields are set, reading another one raises AttributeError, so an
+    assertion can never silently trigger more I/O.
+    """
+    __slots__ = FIELDS + ('fields',)
+
+    def __init__(self, values: Dict[str, object]):
+        unknown = set(values) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown element fields: {sorted(unknown)}")
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, 'fields', tuple(values))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ElementRecord is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("ElementRecord is immutable")
+
+    def __eq__(self, other):
+        return isinstance(other, ElementRecord) and self.as_dict() == other.as_dict()
+
+    def __hash__(self):
+        return hash(tuple(sorted(self.as_dict().items())))
+
+    def __repr__(self):
+        return f"ElementRecord({', '.join(f'{name}={getattr(self, name)!r}' for name in self.fields)})"
+
+    def as_dict(self) -> Dict[str, object]:
+        return {name: getattr(self, name) for name in self.fields}
+
+    @property
+    def location(self) -> Tuple[int, int]:
+        return self.rect.x, self.rect.y
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.rect.width, self.rect.height
+
+
+def check_fields(fields: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Validate requested field names, keeping their order and dropping duplicates
+    """
+    fields = tuple(dict.fromkeys(fields))
+    unknown = [name for name in fields if name not in FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown element fields: {unknown}, available fields: {FIELDS}")
+    return fields
+
+
+def _text(value, label):
+    # XCUITest reports the value as the element text, or the label when the value is empty
+    return value if value else label
+
+
+def record_from_node(node: ET.Element, fields: Tuple[str, ...]) -> ElementRecord:
+    """
+    Build a record from a page source node, without any server call
+    """
+    values = {}
+    for name in fields:
+        if name == 'text':
+            values[name] = _text(node.get('value'), node.get('label'))
+        elif name == 'rect':
+            values[name] = Rect(*(int(float(node.get(key, 0))) for key in Rect._fields))
+        elif name == 'type':
+            values[name] = node.get('type', node.tag)
+        elif name in STATE_FIELDS:
+            values[name] = node.get(name) == 'true'
+        else:
+            values[name] = node.get(name)
+    return ElementRecord(values)
+
+
+def record_from_values(values: Dict[str, object], fields: Tuple[str, ...]) -> ElementRecord:
+    """
+    Build a record from the field values returned by the 'read' step of a driver script
+    """
+    record = {}
+    for name in fields:
+        value = values.get(name)
+        if name == 'rect':
+            value = Rect(**{key: int((value or {}).get(key, 0)) for key in Rect._fields})
+        elif name in STATE_FIELDS:
+            value = bool(value)
+        record[name] = value
+    return ElementRecord(record)
+
+
+def record_from_element(element, fields: Tuple[str, ...]) -> ElementRecord:
+    """
+    Build a record from a live element handle, one call per field (the rect is one call)
+    """
+    values = {}
+    for name in fields:
+        if name == 'text':
+            values[name] = element.text
+        elif name == 'rect':
+            rect = element.rect
+            values[name] = Rect(**{key: int(rect[key]) for key in Rect._fields})
+        elif name == 'visible':
+            values[name] = element.is_displayed()
+        elif name == 'enabled':
+            values[name] = element.is_enabled()
+        elif name == 'selected':
+            values[name] = element.is_selected()
+        else:
+            values[name] = element.get_attribute(name)
+    return ElementRecord(values)
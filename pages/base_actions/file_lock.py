@@ -0,0 +1,45 @@
+import fcntl
+import os
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def file_lock(path: str, timeout: float = 10):
+    """
+    Hold an exclusive lock on "<path>.lock", shared by all processes of the machine
+
+    The lock file is never removed: flock locks belong to the open file and the kernel drops
+    them when the holder exits, so a crashed process cannot leave a stale lock behind.
+
+    Args:
+        path: File guarded by the lock
+        timeout: Maximum waiting time (seconds) for the lock
+
+    Raises:
+        TimeoutError: If the lock is still held by another process after the timeout
+
+    Ex.
+    with file_lock(self.history_file):
+        merged = self._load()
+        ...
+    """
+    lock_file = f"{path}.lock"
+    os.makedirs(os.path.dirname(os.path.abspath(lock_file)), exist_ok=True)
+    fd = os.open(lock_file, os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        end_time = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= end_time:
+                    raise TimeoutError(f"Lock of {path} still held after {timeout} seconds")
+                time.sleep(0.02)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
@@ -0,0 +1,317 @@
+import os
+import time
+import weakref
+from collections import Counter, namedtuple
+from typing import List, Optional, Sequence, Tuple
+from pages.base_actions.base_action import BaseActions
+
+# One declared step of a flow. target is a locator, a tuple of locators (verify) or (x_ratio, y_ratio) (tap)
+FlowStep = namedtuple('FlowStep', ['action', 'target', 'text', 'changes_screen', 'description'])
+# One operation of the compiled plan, estimate is the minimum number of server commands it needs
+PlannedOperation = namedtuple('PlannedOperation', ['action', 'target', 'text', 'changes_screen', 'description',
+                                                   'estimate'])
+
+
+def verify(*locators: Tuple[str, str], description: str = None) -> FlowStep:
+    """
+    Declare that every locator must be visible before the flow goes on
+    """
+    return FlowStep('verify', tuple(locators), None, False, description or f"Verify {len(locators)} element(s)")
+
+
+def click(locator: Tuple[str, str], description: str = None, changes_screen: bool = True) -> FlowStep:
+    """
+    Declare a click, waiting for the element is implied
+    """
+    return FlowStep('click', tuple(locator), None, changes_screen, description or f"Click {locator[1]}")
+
+
+def enter_text(locator: Tuple[str, str], text: str, description: str = None) -> FlowStep:
+    """
+    Declare replacing the text of a field
+    """
+    return FlowStep('enter_text', tuple(locator), text, False, description or f"Enter '{text}' in {locator[1]}")
+
+
+def tap(x_ratio: float, y_ratio: float, description: str = None, changes_screen: bool = True) -> FlowStep:
+    """
+    Declare a tap at a screen ratio position
+    """
+    return FlowStep('tap', (x_ratio, y_ratio), None, changes_screen,
+                    description or f"Tap at ({x_ratio}, {y_ratio})")
+
+
+def settle(timeout: float = 1.0, description: str = None) -> FlowStep:
+    """
+    Declare an explicit wait for the UI to be idle
+    """
+    return FlowStep('settle', timeout, None, False, description or "Wait for the UI to settle")
+
+
+class FlowCommandCounter:
+    """
+    Count the server commands sent through a driver while the context is active
+
+    One execute wrapper is installed per driver, shared by the active counters, so counters can
+    be nested or exit in any order; the previous execute attribute is put back when the last one
+    exits. The wrapper calls the execute method of the driver itself, so a session adopted while
+    counting (a new session_id and command_executor) is counted too.
+    """
+    _active = weakref.WeakKeyDictionary()
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.commands = Counter()
+
+    @property
+    def total(self) -> int:
+        return sum(self.commands.values())
+
+    def __enter__(self):
+        active = self._active.get(self.driver)
+        if active is None:
+            active = self._install(self.driver)
+        active['counters'].append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        active = self._active.get(self.driver)
+        if active is not None and self in active['counters']:
+            active['counters'].remove(self)
+            if not active['counters']:
+                self._uninstall(self.driver, active)
+        return False
+
+    @classmethod
+    def _install(cls, driver) -> dict:
+        previous = driver.__dict__.get('execute')
+        original_execute = driver.execute
+        active = {'counters': [], 'previous': previous}
+
+        def execute(driver_command, params=None):
+            for counter in active['counters']:
+                counter.commands[driver_command] += 1
+            return original_execute(driver_command, params)
+
+        active['wrapper'] = execute
+        driver.execute = execute
+        cls._active[driver] = active
+        return active
+
+    @classmethod
+    def _uninstall(cls, driver, active: dict):
+        del cls._active[driver]
+        if driver.__dict__.get('execute') is not active['wrapper']:
+            # Someone else wrapped execute after us, leave their wrapper in place
+            return
+        if active['previous'] is None:
+            del driver.execute
+        else:
+            driver.execute = active['previous']
+
+
+class FlowResult:
+    """
+    Outcome of one flow run
+    """
+
+    def __init__(self, plan: List[PlannedOperation]):
+        self.plan = plan
+        self.success = False
+        self.failed_operation: Optional[PlannedOperation] = None
+        self.error: Optional[Exception] = None
+        self.executed_commands: List[int] = []
+        self.elapsed = 0.0
+        self.server_side = False
+
+    @property
+    def planned_command_count(self) -> int:
+        return sum(operation.estimate for operation in self.plan)
+
+    @property
+    def executed_command_count(self) -> int:
+        return sum(self.executed_commands)
+
+    def report(self) -> str:
+        lines = [f"{'planned':>8} {'executed':>8}  operation"]
+        for operation, executed in zip(self.plan, self.executed_commands):
+            lines.append(f"{operation.estimate:>8} {executed:>8}  {operation.description}")
+        lines.append(f"{self.planned_command_count:>8} {self.executed_command_count:>8}  total "
+                     f"({len(self.plan)} operations, {self.elapsed:.1f} seconds)")
+        if self.server_side:
+            lines.append("Executed server-side as one execute_driver script")
+        if not self.success and self.failed_operation is not None:
+            lines.append(f"Failed at: {self.failed_operation.description} ({self.error})")
+        return '\n'.join(lines)
+
+
+class FlowExecutor:
+    """
+    Compile a declarative sequence of page-object steps into a minimal command plan and run it.
+
+    The compiler
+    - folds the wait into each click and text entry (one retry loop per element, no separate presence check),
+    - drops a verify whose elements were already verified on the same screen,
+    - clears and types through one element handle,
+    - removes explicit settles in front of element steps (they wait on their element anyway) and
+      only inserts one settle before a coordinate tap that follows a screen change.
+    The whole run happens under a zero implicit wait, so primitives do not toggle it per call.
+    """
+    SETTLE_TIMEOUT = 1.5
+    STABLE_SAMPLES = 2
+
+    def __init__(self, driver, timeout: float = 10, server_side: bool = None):
+        """
+        Args:
+            driver: WebDriver instance
+            timeout: Deadline of each element operation (seconds)
+            server_side: Run the plan as one execute_driver script, default is the APPIUM_BATCH_MODE env setting.
+                         The operations run one at a time when the server does not support driver scripts.
+        """
+        self.driver = driver
+        self.timeout = timeout
+        if server_side is None:
+            server_side = os.getenv('APPIUM_BATCH_MODE', 'false').lower() == 'true'
+        self.server_side = server_side
+        self.actions = BaseActions(driver, default_timeout=timeout)
+
+    def _estimate(self, action: str, target, known_visible: set, window_size_known: bool) -> int:
+        if action == 'verify':
+            # Compound predicate query plus one attribute read per element to map the results back
+            return 1 + len(target) if self.actions._is_xcuitest() else 2 * len(target)
+        if action == 'click':
+            # find, is_displayed (skipped once verified), is_enabled, click
+            return 3 if target in known_visible else 4
+        if action == 'enter_text':
+            return 3
+        if action == 'tap':
+            # The window size is fetched once per session, before the first tap
+            return 1 if window_size_known else 2
+        return self.STABLE_SAMPLES
+
+    def compile(self, steps: Sequence[FlowStep]) -> List[PlannedOperation]:
+        """
+        Turn declared steps into the operations that are actually executed
+
+        Args:
+            steps: FlowStep sequence
+
+        Returns:
+            List[PlannedOperation]: Planned operations with their command estimates
+        """
+        plan = []
+        verified = set()
+        screen_changed = False
+        window_size_known = self.actions.viewport.cached
+        for step in steps:
+            if step.action == 'verify':
+                pending = tuple(locator for locator in step.target if locator not in verified)
+                if not pending:
+                    continue
+                step = step._replace(target=pending)
+            elif step.action == 'settle':
+                # A settle is only useful in front of a coordinate tap, which is added below when needed
+                continue
+            elif step.action == 'tap' and screen_changed:
+                plan.append(PlannedOperation('settle', self.SETTLE_TIMEOUT, None, False,
+                                             "Wait for the UI to settle",
+                                             self._estimate('settle', None, verified, window_size_known)))
+
+            plan.append(PlannedOperation(*step, self._estimate(step.action, step.target, verified, window_size_known)))
+            window_size_known = window_size_known or step.action == 'tap'
+            if step.action == 'verify':
+                verified.update(step.target)
+            if step.changes_screen:
+                verified.clear()
+            screen_changed = step.changes_screen
+        return plan
+
+    def _execute(self, operation: PlannedOperation) -> bool:
+        actions = self.actions
+        if operation.action == 'verify':
+            return actions.wait_for_all(*operation.target, timeout=self.timeout)
+        if operation.action == 'click':
+            actions.click_element(*operation.target, timeout=self.timeout)
+            return True
+        if operation.action == 'enter_text':
+            actions.set_text(*operation.target, operation.text, timeout=self.timeout)
+            return True
+        if operation.action == 'tap':
+            actions.tap(*operation.target)
+            return True
+        actions.wait_for_settle(timeout=operation.target, stable_samples=self.STABLE_SAMPLES)
+        return True
+
+    def _run_on_server(self, result: FlowResult, counter: FlowCommandCounter) -> bool:
+        """
+        Ship the whole plan as one execute_driver script
+
+        Returns:
+            bool: False if the server does not support driver scripts and nothing was executed
+        """
+        batch = self.actions.batch(server_side=True, timeout=self.timeout, raise_on_error=False)
+        batch_steps = []
+        for operation in result.plan:
+            if operation.action == 'verify':
+                queued = [batch.wait_visible(*locator) for locator in operation.target]
+            elif operation.action == 'click':
+                queued = [batch.click(*operation.target)]
+            elif operation.action == 'enter_text':
+                queued = [batch.set_text(*operation.target, operation.text)]
+            elif operation.action == 'tap':
+                queued = [batch.tap(*operation.target)]
+            else:
+                queued = [batch.settle(timeout=operation.target, stable_samples=self.STABLE_SAMPLES)]
+            batch_steps.append(queued)
+
+        try:
+            if not batch.run_on_server():
+                return False
+        finally:
+            self.actions.invalidate_snapshot()
+
+        result.server_side = True
+        for index, (operation, queued) in enumerate(zip(result.plan, batch_steps), 1):
+            print(f"Step {index}: {operation.description}...")
+            # The whole script is one command, it is accounted to the first operation
+            result.executed_commands.append(counter.total if index == 1 else 0)
+            failed = next((step for step in queued if not step.ok), None)
+            if failed is not None:
+                result.failed_operation = operation
+                result.error = failed.error if failed.executed else "not executed"
+                return True
+        result.success = True
+        return True
+
+    def run(self, steps: Sequence[FlowStep]) -> FlowResult:
+        """
+        Compile and execute the steps, stopping at the first failing operation
+
+        Args:
+            steps: FlowStep sequence
+
+        Returns:
+            FlowResult: Success flag, plan, and planned versus executed command counts
+        """
+        result = FlowResult(self.compile(steps))
+        start_time = time.monotonic()
+        with FlowCommandCounter(self.driver) as counter, self.actions.wait_mode(0):
+            if self.server_side and self.actions._is_xcuitest() and self._run_on_server(result, counter):
+                result.elapsed = time.monotonic() - start_time
+                return result
+            for index, operation in enumerate(result.plan, 1):
+                print(f"Step {index}: {operation.description}...")
+                before = counter.total
+                try:
+                    succeeded = self._execute(operation)
+                except Exception as e:
+                    succeeded = False
+                    result.error = e
+                result.executed_commands.append(counter.total - before)
+                if not succeeded:
+                    result.failed_operation = operation
+                    break
+            else:
+                result.success = True
+        result.elapsed = time.monotonic() - start_time
+        return result
@@ -0,0 +1,126 @@
+from functools import lru_cache
+from typing import List, Tuple
+from selenium.webdriver.remote.command import Command
+
+TAP_HOLD = 0.1
+
+Segment = Tuple
+
+
+def _move(x: int, y: int, duration: float = 0) -> dict:
+    return {'type': 'pointerMove', 'duration': int(duration * 1000), 'x': int(x), 'y': int(y), 'origin': 'viewport'}
+
+
+def _pause(seconds: float) -> dict:
+    return {'type': 'pause', 'duration': int(seconds * 1000)}
+
+
+_DOWN = {'type': 'pointerDown', 'button': 0}
+_UP = {'type': 'pointerUp', 'button': 0}
+
+
+@lru_cache(maxsize=256)
+def compile_gesture(segments: Tuple[Segment, ...]) -> dict:
+    """
+    Compile gesture segments into one W3C actions payload, cached per segment sequence
+
+    Args:
+        segments: ('tap', x, y, hold), ('long_press', x, y, hold), ('swipe', x1, y1, x2, y2, duration)
+                  or ('pause', seconds) tuples, in pixels and seconds
+
+    Returns:
+        dict: Parameters of the W3C "perform actions" command. Do not modify, the dict is shared.
+    """
+    actions: List[dict] = []
+    for segment in segments:
+        kind = segment[0]
+        if kind in ('tap', 'long_press'):
+            _, x, y, hold = segment
+            actions += [_move(x, y), _DOWN, _pause(hold), _UP]
+        elif kind == 'swipe':
+            _, start_x, start_y, end_x, end_y, duration = segment
+            actions += [_move(start_x, start_y), _DOWN, _move(end_x, end_y, duration), _UP]
+        elif kind == 'pause':
+            actions.append(_pause(segment[1]))
+        else:
+            raise ValueError(f"Unknown gesture segment: {kind}")
+    return {'actions': [{'type': 'pointer', 'id': 'finger', 'parameters': {'pointerType': 'touch'},
+                         'actions': actions}]}
+
+
+class Gesture:
+    """
+    Builder composing taps, long presses, swipes and pauses into one W3C actions payload,
+    performed with a single HTTP call.
+
+    Coordinates are resolved through the session viewport, so ratios and pixels can be mixed.
+
+    Ex.
+    self.gesture().tap(0.5, 0.2).pause(0.3).tap(0.85, 0.92).perform()
+    self.gesture().swipe(0.5, 0.8, 0.5, 0.2, duration=0.5, unit='ratio').perform()
+    """
+
+    def __init__(self, driver, viewport):
+        """
+        Args:
+            driver: WebDriver instance
+            viewport: Viewport of the session, used to resolve ratio coordinates
+        """
+        self.driver = driver
+        self.viewport = viewport
+        self.segments: List[Segment] = []
+
+    def _point(self, x: float, y: float, unit: str) -> Tuple[int, int]:
+        return self.viewport.resolve(x, y, unit=unit)
+
+    def tap(self, x: float, y: float, unit: str = 'ratio', hold: float = TAP_HOLD) -> 'Gesture':
+        """
+        Args:
+            x: x coordinate
+            y: y coordinate
+            unit: 'ratio' (0.0 ~ 1.0 of the window) or 'px'
+            hold: Time between touch down and up (seconds)
+        """
+        self.segments.append(('tap', *self._point(x, y, unit), hold))
+        return self
+
+    def long_press(self, x: float, y: float, duration: float = 1.0, unit: str = 'ratio') -> 'Gesture':
+        """
+        Args:
+            x: x coordinate
+            y: y coordinate
+            duration: Press duration (seconds)
+            unit: 'ratio' (0.0 ~ 1.0 of the window) or 'px'
+        """
+        self.segments.append(('long_press', *self._point(x, y, unit), duration))
+        return self
+
+    def swipe(self, start_x: float, start_y: float, end_x: float, end_y: float, duration: float = 0.8,
+              unit: str = 'ratio') -> 'Gesture':
+        """
+        Args:
+            start_x, start_y: Start point
+            end_x, end_y: End point
+            duration: Time of the move (seconds)
+            unit: 'ratio' (0.0 ~ 1.0 of the window) or 'px'
+        """
+        self.segments.append(('swipe', *self._point(start_x, start_y, unit), *self._point(end_x, end_y, unit),
+                              duration))
+        return self
+
+    def pause(self, seconds: float) -> 'Gesture':
+        self.segments.append(('pause', seconds))
+        return self
+
+    def compile(self) -> dict:
+        """
+        W3C actions payload of the gesture, reused from the cache for a repeated gesture
+        """
+        return compile_gesture(tuple(self.segments))
+
+    def perform(self):
+        """
+        Send the whole gesture in one "perform actions" command
+        """
+        if self.segments:
+            self.driver.execute(Command.W3C_ACTIONS, self.compile())
@@ -0,0 +1,60 @@
+import weakref
+from contextlib import contextmanager
+from typing import Optional
+
+
+class ImplicitWaitManager:
+    """
+    Client-side mirror of the server-side implicit wait of one session.
+
+    implicitly_wait is only sent when the requested value differs from the tracked one.
+    Sessions start with an implicit wait of 0 (AppiumSetup), which is what the explicit waits
+    of BaseActions need, so their override(0) blocks send nothing. A block that needs another
+    value sends it once; the value is not restored on exit but by the next block asking for a
+    different one, so consecutive blocks with the same value never toggle it.
+    """
+
+    def __init__(self, driver):
+        """
+        Args:
+            driver: WebDriver instance whose implicit wait is tracked
+        """
+        self._driver = weakref.ref(driver)
+        self.current: Optional[float] = None
+        self.sent_calls = 0
+        self.avoided_calls = 0
+
+    def set(self, seconds: float):
+        """
+        Set the implicit wait, skipping the HTTP call when the value is already active
+
+        Args:
+            seconds: Implicit wait (seconds)
+        """
+        if self.current == seconds:
+            self.avoided_calls += 1
+            return
+        self._driver().implicitly_wait(seconds)
+        self.current = seconds
+        self.sent_calls += 1
+
+    def get(self) -> float:
+        """
+        Return the active implicit wait, asking the server once if it has never been set through the manager
+        """
+        if self.current is None:
+            self.current = self._driver().timeouts.implicit_wait
+            self.sent_calls += 1
+        return self.current
+
+    @contextmanager
+    def override(self, seconds: float):
+        """
+        Run the block with the given implicit wait, sent only if another value is active
+
+        Ex.
+        with manager.override(0):
+            driver.find_elements(...)
+        """
+        self.set(seconds)
+        yield self
@@ -0,0 +1,166 @@
+import argparse
+import importlib
+import inspect
+import pkgutil
+import sys
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from appium.webdriver.common.appiumby import AppiumBy
+from pages.base_actions.batch_resolver import quote_predicate_value
+from pages.base_actions.page_snapshot import UnsupportedLocatorError, parse_xpath
+
+Locator = Tuple[str, str]
+
+_APPLICATION_ROOT = ('AppiumAUT', 'XCUIElementTypeApplication')
+_STRING_ATTRIBUTES = {'name', 'label', 'value', 'type'}
+_BOOLEAN_ATTRIBUTES = {'visible', 'enabled', 'accessible', 'selected'}
+
+
+class _Untranslatable(Exception):
+    pass
+
+
+def _condition(expression: tuple) -> str:
+    """
+    Translate an XPath predicate expression into NSPredicate syntax
+    """
+    operator = expression[0]
+    if operator in ('and', 'or'):
+        joined = f" {operator.upper()} ".join(_condition(operand) for operand in expression[1])
+        return f"({joined})"
+    if operator == 'not':
+        return f"NOT ({_condition(expression[1])})"
+    if operator not in ('eq', 'contains', 'starts-with'):
+        raise _Untranslatable(operator)
+    attribute, value = expression[1], expression[2]
+    if attribute in _BOOLEAN_ATTRIBUTES and operator == 'eq' and value in ('true', 'false'):
+        return f"{attribute} == {1 if value == 'true' else 0}"
+    if attribute not in _STRING_ATTRIBUTES:
+        raise _Untranslatable(attribute)
+    comparison = {'eq': '==', 'contains': 'CONTAINS', 'starts-with': 'BEGINSWITH'}[operator]
+    return f"{attribute} {comparison} {quote_predicate_value(value)}"
+
+
+def _step_filters(step) -> Tuple[List[str], List[str]]:
+    """
+    Split the predicates of a step into NSPredicate conditions and class chain indexes
+    """
+    conditions, indexes = [], []
+    for predicate in step.predicates:
+        if predicate[0] in ('position', 'last'):
+            # XPath positions are per parent, class chain indexes are only equivalent on child steps
+            if step.axis != 'child' or conditions:
+                raise _Untranslatable('position')
+            indexes.append('-1' if predicate[0] == 'last' else str(predicate[1]))
+        else:
+            if indexes:
+                raise _Untranslatable('condition after position')
+            conditions.append(_condition(predicate))
+    return conditions, indexes
+
+
+@lru_cache(maxsize=512)
+def compile_xpath(xpath: str) -> Optional[Locator]:
+    """
+    Translate an XPath locator into an equivalent -ios predicate string or -ios class chain locator
+
+    A single //Type[...] step becomes a predicate string, longer paths become a class chain.
+
+    Args:
+        xpath: XPath expression
+
+    Returns:
+        Optional[Tuple[str, str]]: Native locator, None if the expression cannot be translated
+    """
+    try:
+        steps = list(parse_xpath(xpath))
+    except UnsupportedLocatorError:
+        return None
+
+    # Class chains start below the application element
+    if len(steps) >= 2 and steps[0].axis == 'child' and tuple(step.tag for step in steps[:2]) == _APPLICATION_ROOT \
+            and not steps[0].predicates and not steps[1].predicates:
+        steps = steps[2:]
+        if not steps:
+            return None
+    elif steps[0].axis == 'child':
+        return None
+
+    try:
+        if len(steps) == 1 and steps[0].axis == 'descendant':
+            conditions, indexes = _step_filters(steps[0])
+            if not indexes:
+                if steps[0].tag != '*':
+                    conditions.insert(0, f"type == {quote_predicate_value(steps[0].tag)}")
+                if conditions:
+                    return AppiumBy.IOS_PREDICATE, ' AND '.join(conditions)
+
+        segments = []
+        for step in steps:
+            conditions, indexes = _step_filters(step)
+            segment = ('**/' if step.axis == 'descendant' else '') + step.tag
+            if conditions:
+                segment += f"[`{' AND '.join(conditions)}`]"
+            segment += ''.join(f"[{index}]" for index in indexes)
+            segments.append(segment)
+        return AppiumBy.IOS_CLASS_CHAIN, '/'.join(segments)
+    except _Untranslatable:
+        return None
+
+
+def promote_locator(locator_type: str, locator_value: str) -> Locator:
+    """
+    Return the native equivalent of an XPath locator, or the locator unchanged
+    """
+    if locator_type == AppiumBy.XPATH:
+        native = compile_xpath(locator_value)
+        if native is not None:
+            return native
+    return locator_type, locator_value
+
+
+def iter_declared_locators(package: str = 'pages.locators'):
+    """
+    Yield (owner, attribute, locator) for every locator tuple declared on a class in the package
+    """
+    module = importlib.import_module(package)
+    for info in pkgutil.iter_modules(module.__path__):
+        submodule = importlib.import_module(f"{package}.{info.name}")
+        for class_name, cls in inspect.getmembers(submodule, inspect.isclass):
+            if cls.__module__ != submodule.__name__:
+                continue
+            for attribute, value in vars(cls).items():
+                if isinstance(value, tuple) and len(value) == 2 and all(isinstance(part, str) for part in value):
+                    yield f"{class_name}", attribute, value
+
+
+def check(package: str = 'pages.locators') -> int:
+    """
+    Report how every XPath locator of the package is translated
+
+    Returns:
+        int: Number of XPath locators that could not be translated
+    """
+    untranslated = 0
+    for owner, attribute, (locator_type, locator_value) in iter_declared_locators(package):
+        if locator_type != AppiumBy.XPATH:
+            continue
+        native = compile_xpath(locator_value)
+        if native is None:
+            untranslated += 1
+            print(f"NOT TRANSLATED  {owner}.{attribute}: {locator_value}")
+        else:
+            print(f"OK              {owner}.{attribute}: {locator_value} -> {native[0]}: {native[1]}")
+    print(f"{untranslated} XPath locator(s) could not be translated")
+    return untranslated
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="XPath to native iOS locator compiler")
+    parser.add_argument('--check', action='store_true', help="report locators in pages/locators that cannot be translated")
+    parser.add_argument('xpath', nargs='*', help="XPath expressions to translate")
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(1 if check() else 0)
+    for expression in args.xpath:
+        print(compile_xpath(expression) or f"NOT TRANSLATED: {expression}")
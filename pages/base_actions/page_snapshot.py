@@ -0,0 +1,447 @@
+import re
+import fnmatch
+import unicodedata
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from functools import lru_cache
+from typing import Dict, List
+from appium.webdriver.common.appiumby import AppiumBy
+
+
+class UnsupportedLocatorError(ValueError):
+    """Raised when a locator cannot be resolved against a local page-source snapshot"""
+
+
+XPathStep = namedtuple('XPathStep', ['axis', 'tag', 'predicates'])
+
+_XPATH_TOKEN = re.compile(r'''
+    (?P<dslash>//) | (?P<slash>/) | (?P<ne>!=) | (?P<op>[\[\]()@=,*]) |
+    (?P<string>"[^"]*"|'[^']*') | (?P<number>\d+) |
+    (?P<name>[A-Za-z_][\w.\-]*) | (?P<space>\s+) | (?P<other>.)
+''', re.VERBOSE)
+
+_PREDICATE_TOKEN = re.compile(r'''
+    (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*') | (?P<number>-?\d+(?:\.\d+)?) |
+    (?P<op>==|!=|<>|<=|>=|&&|\|\||[=<>!(){},]) | (?P<modifier>\[[cdn]+\]) |
+    (?P<name>[A-Za-z_]\w*) | (?P<space>\s+) | (?P<other>.)
+''', re.VERBOSE)
+
+_PREDICATE_KEYWORDS = {'AND', 'OR', 'NOT', 'CONTAINS', 'BEGINSWITH', 'ENDSWITH', 'LIKE', 'MATCHES', 'IN',
+                       'TRUE', 'FALSE', 'YES', 'NO', 'NIL'}
+_PREDICATE_ATTRIBUTES = {
+    'type': 'type', 'wdType': 'type',
+    'name': 'name', 'wdName': 'name',
+    'label': 'label', 'wdLabel': 'label',
+    'value': 'value', 'wdValue': 'value',
+    'visible': 'visible', 'wdVisible': 'visible', 'isVisible': 'visible',
+    'enabled': 'enabled', 'wdEnabled': 'enabled', 'isEnabled': 'enabled',
+    'accessible': 'accessible', 'wdAccessible': 'accessible', 'isAccessible': 'accessible',
+    'selected': 'selected', 'wdSelected': 'selected', 'isSelected': 'selected',
+}
+_BOOLEAN_ATTRIBUTES = {'visible', 'enabled', 'accessible', 'selected'}
+
+
+def _tokenize(pattern, expression: str) -> List[tuple]:
+    tokens = []
+    for match in pattern.finditer(expression):
+        kind = match.lastgroup
+        if kind == 'space':
+            continue
+        if kind == 'other':
+            raise UnsupportedLocatorError(f"Unexpected character {match.group()!r} in {expression!r}")
+        tokens.append((kind, match.group()))
+    return tokens
+
+
+class _TokenStream:
+    def __init__(self, tokens: List[tuple], expression: str):
+        self.tokens = tokens
+        self.position = 0
+        self.expression = expression
+
+    def peek(self, offset: int = 0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def expect(self, text: str):
+        kind, value = self.next()
+        if value != text:
+            raise UnsupportedLocatorError(f"Expected {text!r} but got {value!r} in {self.expression!r}")
+
+    def at_end(self) -> bool:
+        return self.position >= len(self.tokens)
+
+
+@lru_cache(maxsize=256)
+def parse_xpath(expression: str) -> tuple:
+    """
+    Parse the XPath subset used by our locators into a tuple of XPathStep
+
+    Supported: absolute child (/) and descendant (//) steps, element names or *,
+    and predicates built from @attr, @attr="v", @attr!="v", contains(), starts-with(),
+    not(), and/or and positional indexes.
+
+    Raises:
+        UnsupportedLocatorError: If the expression uses anything outside the subset
+    """
+    stream = _TokenStream(_tokenize(_XPATH_TOKEN, expression), expression)
+    steps = []
+    while not stream.at_end():
+        kind, value = stream.next()
+        if kind not in ('slash', 'dslash'):
+            raise UnsupportedLocatorError(f"Relative or unsupported XPath: {expression!r}")
+        axis = 'descendant' if kind == 'dslash' else 'child'
+        kind, tag = stream.next()
+        if kind != 'name' and tag != '*':
+            raise UnsupportedLocatorError(f"Unsupported XPath step {tag!r} in {expression!r}")
+        if stream.peek()[1] == '(':
+            raise UnsupportedLocatorError(f"XPath functions and axes are not supported: {expression!r}")
+        predicates = []
+        while stream.peek()[1] == '[':
+            stream.next()
+            predicates.append(_parse_xpath_or(stream))
+            stream.expect(']')
+        steps.append(XPathStep(axis, tag, tuple(predicates)))
+    if not steps:
+        raise UnsupportedLocatorError(f"Empty XPath: {expression!r}")
+    return tuple(steps)
+
+
+def _parse_xpath_or(stream: _TokenStream) -> tuple:
+    operands = [_parse_xpath_and(stream)]
+    while stream.peek()[1] == 'or':
+        stream.next()
+        operands.append(_parse_xpath_and(stream))
+    return operands[0] if len(operands) == 1 else ('or', tuple(operands))
+
+
+def _parse_xpath_and(stream: _TokenStream) -> tuple:
+    operands = [_parse_xpath_term(stream)]
+    while stream.peek()[1] == 'and':
+        stream.next()
+        operands.append(_parse_xpath_term(stream))
+    return operands[0] if len(operands) == 1 else ('and', tuple(operands))
+
+
+def _parse_xpath_term(stream: _TokenStream) -> tuple:
+    kind, value = stream.next()
+    if kind == 'number':
+        return ('position', int(value))
+    if value == '(':
+        expression = _parse_xpath_or(stream)
+        stream.expect(')')
+        return expression
+    if value == '@':
+        kind, attribute = stream.next()
+        if kind != 'name':
+            raise UnsupportedLocatorError(f"Invalid attribute in {stream.expression!r}")
+        operator = stream.peek()[1]
+        if operator in ('=', '!='):
+            stream.next()
+            literal_kind, literal = stream.next()
+            if literal_kind != 'string':
+                raise UnsupportedLocatorError(f"Only string literals are supported in {stream.expression!r}")
+            return ('eq' if operator == '=' else 'ne', attribute, literal[1:-1])
+        return ('has', attribute)
+    if kind == 'name' and value in ('contains', 'starts-with') and stream.peek()[1] == '(':
+        stream.next()
+        stream.expect('@')
+        attribute = stream.next()[1]
+        stream.expect(',')
+        literal_kind, literal = stream.next()
+        if literal_kind != 'string':
+            raise UnsupportedLocatorError(f"Only string literals are supported in {stream.expression!r}")
+        stream.expect(')')
+        return (value, attribute, literal[1:-1])
+    if kind == 'name' and value == 'not' and stream.peek()[1] == '(':
+        stream.next()
+        expression = _parse_xpath_or(stream)
+        stream.expect(')')
+        return ('not', expression)
+    if kind == 'name' and value == 'last' and stream.peek()[1] == '(':
+        stream.next()
+        stream.expect(')')
+        return ('last',)
+    raise UnsupportedLocatorError(f"Unsupported XPath predicate near {value!r} in {stream.expression!r}")
+
+
+def _xpath_predicate_matches(node: ET.Element, expression: tuple, position: int, size: int) -> bool:
+    operator = expression[0]
+    if operator == 'position':
+        return position == expression[1]
+    if operator == 'last':
+        return position == size
+    if operator == 'and':
+        return all(_xpath_predicate_matches(node, operand, position, size) for operand in expression[1])
+    if operator == 'or':
+        return any(_xpath_predicate_matches(node, operand, position, size) for operand in expression[1])
+    if operator == 'not':
+        return not _xpath_predicate_matches(node, expression[1], position, size)
+    actual = node.attrib.get(expression[1])
+    if operator == 'has':
+        return actual is not None
+    if operator == 'ne':
+        return actual is not None and actual != expression[2]
+    if actual is None:
+        return False
+    if operator == 'eq':
+        return actual == expression[2]
+    if operator == 'contains':
+        return expression[2] in actual
+    return actual.startswith(expression[2])
+
+
+@lru_cache(maxsize=256)
+def parse_predicate(expression: str) -> tuple:
+    """
+    Parse the NSPredicate subset supported by XCUITest element attributes
+
+    Supported: comparisons (==, !=, <, >, CONTAINS, BEGINSWITH, ENDSWITH, LIKE, MATCHES, IN)
+    with optional [c]/[d] modifiers, combined with AND/OR/NOT and parentheses.
+
+    Raises:
+        UnsupportedLocatorError: If the expression uses anything outside the subset
+    """
+    stream = _TokenStream(_tokenize(_PREDICATE_TOKEN, expression), expression)
+    result = _parse_predicate_or(stream)
+    if not stream.at_end():
+        raise UnsupportedLocatorError(f"Unexpected token {stream.peek()[1]!r} in {expression!r}")
+    return result
+
+
+def _keyword(token: tuple) -> str:
+    kind, value = token
+    if kind == 'name' and value.upper() in _PREDICATE_KEYWORDS:
+        return value.upper()
+    if kind == 'op':
+        return {'&&': 'AND', '||': 'OR', '!': 'NOT'}.get(value, value)
+    return ''
+
+
+def _parse_predicate_or(stream: _TokenStream) -> tuple:
+    operands = [_parse_predicate_and(stream)]
+    while _keyword(stream.peek()) == 'OR':
+        stream.next()
+        operands.append(_parse_predicate_and(stream))
+    return operands[0] if len(operands) == 1 else ('or', tuple(operands))
+
+
+def _parse_predicate_and(stream: _TokenStream) -> tuple:
+    operands = [_parse_predicate_term(stream)]
+    while _keyword(stream.peek()) == 'AND':
+        stream.next()
+        operands.append(_parse_predicate_term(stream))
+    return operands[0] if len(operands) == 1 else ('and', tuple(operands))
+
+
+def _parse_predicate_term(stream: _TokenStream) -> tuple:
+    if _keyword(stream.peek()) == 'NOT':
+        stream.next()
+        return ('not', _parse_predicate_term(stream))
+    if stream.peek()[1] == '(':
+        stream.next()
+        expression = _parse_predicate_or(stream)
+        stream.expect(')')
+        return expression
+    kind, name = stream.next()
+    if kind != 'name' or name not in _PREDICATE_ATTRIBUTES:
+        raise UnsupportedLocatorError(f"Unsupported predicate attribute {name!r} in {stream.expression!r}")
+    operator = _keyword(stream.peek()) or stream.peek()[1]
+    if operator not in ('==', '=', '!=', '<>', '<', '>', '<=', '>=',
+                        'CONTAINS', 'BEGINSWITH', 'ENDSWITH', 'LIKE', 'MATCHES', 'IN'):
+        raise UnsupportedLocatorError(f"Unsupported predicate operator {operator!r} in {stream.expression!r}")
+    stream.next()
+    operator = {'=': '==', '<>': '!='}.get(operator, operator)
+    flags = ''
+    if stream.peek()[0] == 'modifier':
+        flags = stream.next()[1][1:-1]
+    if operator == 'IN':
+        stream.expect('{')
+        values = [_parse_predicate_value(stream)]
+        while stream.peek()[1] == ',':
+            stream.next()
+            values.append(_parse_predicate_value(stream))
+        stream.expect('}')
+        value = tuple(values)
+    else:
+        value = _parse_predicate_value(stream)
+    return ('cmp', _PREDICATE_ATTRIBUTES[name], operator, value, flags)
+
+
+def _parse_predicate_value(stream: _TokenStream):
+    kind, value = stream.next()
+    if kind == 'string':
+        return re.sub(r'\\(.)', r'\1', value[1:-1])
+    if kind == 'number':
+        return float(value) if '.' in value else int(value)
+    keyword = _keyword((kind, value))
+    if keyword in ('TRUE', 'YES'):
+        return True
+    if keyword in ('FALSE', 'NO'):
+        return False
+    raise UnsupportedLocatorError(f"Unsupported predicate value {value!r} in {stream.expression!r}")
+
+
+def _fold(text: str, flags: str) -> str:
+    if 'd' in flags:
+        text = ''.join(c for c in unicodedata.normalize('NFD', text) if not unicodedata.combining(c))
+    if 'c' in flags:
+        text = text.casefold()
+    return text
+
+
+def _compare(actual, operator: str, expected, flags: str) -> bool:
+    if isinstance(expected, tuple):
+        return any(_compare(actual, '==', item, flags) for item in expected)
+    if isinstance(expected, (bool, int, float)) and not isinstance(actual, bool):
+        try:
+            actual = float(actual)
+        except (TypeError, ValueError):
+            return operator == '!='
+        expected = float(expected)
+    elif isinstance(actual, bool):
+        expected = bool(expected) if not isinstance(expected, str) else expected.lower() in ('true', '1', 'yes')
+    elif actual is None:
+        return operator == '!='
+    else:
+        actual, expected = _fold(actual, flags), _fold(str(expected), flags)
+
+    if operator == '==':
+        return actual == expected
+    if operator == '!=':
+        return actual != expected
+    if operator == '<':
+        return actual < expected
+    if operator == '>':
+        return actual > expected
+    if operator == '<=':
+        return actual <= expected
+    if operator == '>=':
+        return actual >= expected
+    if operator == 'CONTAINS':
+        return expected in actual
+    if operator == 'BEGINSWITH':
+        return actual.startswith(expected)
+    if operator == 'ENDSWITH':
+        return actual.endswith(expected)
+    if operator == 'LIKE':
+        return fnmatch.fnmatchcase(actual, expected)
+    return re.fullmatch(expected, actual) is not None
+
+
+def _predicate_matches(node: ET.Element, expression: tuple) -> bool:
+    operator = expression[0]
+    if operator == 'and':
+        return all(_predicate_matches(node, operand) for operand in expression[1])
+    if operator == 'or':
+        return any(_predicate_matches(node, operand) for operand in expression[1])
+    if operator == 'not':
+        return not _predicate_matches(node, expression[1])
+    _, attribute, comparison, expected, flags = expression
+    if attribute == 'type':
+        actual = node.attrib.get('type', node.tag)
+    elif attribute in _BOOLEAN_ATTRIBUTES:
+        actual = node.attrib.get(attribute, 'false') == 'true'
+    else:
+        actual = node.attrib.get(attribute)
+    return _compare(actual, comparison, expected, flags)
+
+
+class PageSnapshot:
+    """
+    Parsed, indexed copy of one driver.page_source used to answer read-only
+    locator queries in-process instead of issuing one WebDriver call per lookup.
+    """
+
+    def __init__(self, page_source: str, generation: int = 0):
+        """
+        Args:
+            page_source: XML returned by driver.page_source
+            generation: Screen generation the source was captured in
+        """
+        self.generation = generation
+        self.root = ET.fromstring(page_source)
+        self._document = ET.Element('#document')
+        self._document.append(self.root)
+        self.elements = [node for node in self.root.iter() if node is not self.root or node.tag != 'AppiumAUT']
+        self._by_name: Dict[str, List[ET.Element]] = {}
+        self._by_type: Dict[str, List[ET.Element]] = {}
+        for node in self.elements:
+            name = node.attrib.get('name')
+            if name is not None:
+                self._by_name.setdefault(name, []).append(node)
+            self._by_type.setdefault(node.attrib.get('type', node.tag), []).append(node)
+
+    def find_all(self, locator_type: str, locator_value: str) -> List[ET.Element]:
+        """
+        Resolve a locator against the snapshot
+
+        Args:
+            locator_type: Locator type
+            locator_value: Locator value
+
+        Returns:
+            List[ET.Element]: Matching nodes in document order
+
+        Raises:
+            UnsupportedLocatorError: If the locator strategy cannot be resolved locally
+        """
+        if locator_type in (AppiumBy.ACCESSIBILITY_ID, AppiumBy.ID, AppiumBy.NAME):
+            return list(self._by_name.get(locator_value, ()))
+        if locator_type == AppiumBy.CLASS_NAME:
+            return list(self._by_type.get(locator_value, ()))
+        if locator_type == AppiumBy.XPATH:
+            return self._evaluate_xpath(parse_xpath(locator_value))
+        if locator_type == AppiumBy.IOS_PREDICATE:
+            expression = parse_predicate(locator_value)
+            return [node for node in self.elements if _predicate_matches(node, expression)]
+        raise UnsupportedLocatorError(f"Locator strategy {locator_type!r} is not supported by page snapshots")
+
+    def fingerprint(self) -> int:
+        """
+        Structural hash of the screen: element types, identifiers, values, visibility and geometry,
+        two snapshots of an idle screen give the same fingerprint
+        """
+        return hash(tuple(
+            (node.tag,) + tuple(node.attrib.get(name) for name in
+                                ('name', 'label', 'value', 'visible', 'x', 'y', 'width', 'height'))
+            for node in self.elements
+        ))
+
+    def is_present(self, locator_type: str, locator_value: str) -> bool:
+        """
+        Check if at least one node matches the locator
+        """
+        return bool(self.find_all(locator_type, locator_value))
+
+    def is_visible(self, locator_type: str, locator_value: str) -> bool:
+        """
+        Check if the first node matching the locator is visible, mirroring find_element + is_displayed
+        """
+        nodes = self.find_all(locator_type, locator_value)
+        return bool(nodes) and nodes[0].attrib.get('visible', 'false') == 'true'
+
+    def _evaluate_xpath(self, steps: tuple) -> List[ET.Element]:
+        context = [self._document]
+        for step in steps:
+            matched = []
+            seen = set()
+            for node in context:
+                parents = node.iter() if step.axis == 'descendant' else (node,)
+                for parent in parents:
+                    group = [child for child in parent if step.tag == '*' or child.tag == step.tag]
+                    for predicate in step.predicates:
+                        group = [child for index, child in enumerate(group, 1)
+                                 if _xpath_predicate_matches(child, predicate, index, len(group))]
+                    for child in group:
+                        if id(child) not in seen:
+                            seen.add(id(child))
+                            matched.append(child)
+            context = matched
+        order = {id(node): index for index, node in enumerate(self.root.iter())}
+        return sorted(context, key=lambda node: order.get(id(node), -1))
@@ -0,0 +1,163 @@
+import copy
+import random
+import time
+from typing import Callable, Optional, Sequence, Tuple, Type
+from urllib3.exceptions import HTTPError as TransportError
+from selenium.common.exceptions import (
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    InvalidSessionIdException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+
+# Retry classifications
+RETRY_STALE = 'stale'
+RETRY_NOT_FOUND = 'not_found'
+SESSION_DEAD = 'session_dead'
+FATAL = 'fatal'
+
+DEFAULT_CLASSIFICATION: Tuple[Tuple[Type[BaseException], str], ...] = (
+    (StaleElementReferenceException, RETRY_STALE),
+    (InvalidSessionIdException, SESSION_DEAD),
+    (NoSuchElementException, RETRY_NOT_FOUND),
+    (TimeoutException, RETRY_NOT_FOUND),
+    (ElementClickInterceptedException, RETRY_NOT_FOUND),
+    (ElementNotInteractableException, RETRY_NOT_FOUND),
+    (ConnectionError, SESSION_DEAD),
+    (TransportError, SESSION_DEAD),
+)
+
+SESSION_DEAD_MESSAGES = (
+    'invalid session id',
+    'session is either terminated or not started',
+    'no such session',
+    'session not created',
+)
+
+
+class RetryPolicy:
+    """
+    Deadline-based retry loop shared by every BaseActions primitive.
+
+    A probe is called until it returns a truthy value (the WebDriverWait convention).
+    Exceptions are classified: stale handles are re-tried immediately once, missing or
+    not-yet-interactable elements are re-tried with exponential backoff and jitter,
+    and a dead session or any unknown error is raised straight away.
+    The total time spent is bounded by a single deadline.
+    """
+
+    def __init__(self, deadline: float = 10, initial_backoff: float = 0.1, max_backoff: float = 1.0,
+                 multiplier: float = 2.0, jitter: float = 0.5, max_attempts: Optional[int] = None,
+                 classification: Sequence[Tuple[Type[BaseException], str]] = DEFAULT_CLASSIFICATION):
+        """
+        Args:
+            deadline: Total time budget of one call (seconds)
+            initial_backoff: Delay before the second attempt (seconds)
+            max_backoff: Upper bound of a single delay (seconds)
+            multiplier: Growth factor of the delay between attempts
+            jitter: Fraction (0.0 ~ 1.0) of each delay that is randomised
+            max_attempts: Optional cap on the number of attempts inside the deadline
+            classification: Ordered (exception type, classification) pairs
+        """
+        self.deadline = deadline
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.max_attempts = max_attempts
+        self.classification = tuple(classification)
+
+    def with_overrides(self, **overrides) -> 'RetryPolicy':
+        """
+        Return a copy of the policy with some settings replaced
+
+        Ex.
+        policy.with_overrides(deadline=3, max_attempts=2)
+        """
+        policy = copy.copy(self)
+        for name, value in overrides.items():
+            if not hasattr(policy, name):
+                raise AttributeError(f"RetryPolicy has no setting '{name}'")
+            setattr(policy, name, value)
+        return policy
+
+    def classify(self, error: BaseException) -> str:
+        """
+        Classify an exception raised by a probe
+
+        Returns:
+            str: One of RETRY_STALE, RETRY_NOT_FOUND, SESSION_DEAD or FATAL
+        """
+        for exception_type, classification in self.classification:
+            if isinstance(error, exception_type):
+                return classification
+        if isinstance(error, WebDriverException):
+            message = str(error.msg or '').lower()
+            if any(text in message for text in SESSION_DEAD_MESSAGES):
+                return SESSION_DEAD
+        return FATAL
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Delay before the next attempt, attempt being the number of failed attempts so far
+        """
+        delay = min(self.max_backoff, self.initial_backoff * (self.multiplier ** max(0, attempt - 1)))
+        return random.uniform(delay * (1 - self.jitter), delay)
+
+    def call(self, probe: Callable, timeout: Optional[float] = None, description: str = "Condition",
+             final_probe: Callable = None):
+        """
+        Call the probe until it returns a truthy value or the deadline expires
+
+        Args:
+            probe: Callable without arguments
+            timeout: Per-call deadline, if not specified, use the policy deadline
+            description: Used in the TimeoutException message
+            final_probe: Optional callable tried once when the deadline expires, e.g. a more expensive lookup
+
+        Returns:
+            The first truthy value returned by the probe
+
+        Raises:
+            TimeoutException: If the deadline or max_attempts is reached
+            Exception: Session-dead and fatal errors raised by the probe
+        """
+        deadline = self.deadline if timeout is None else timeout
+        end_time = time.monotonic() + deadline
+        attempt = 0
+        stale_in_a_row = 0
+        last_error = None
+        while True:
+            attempt += 1
+            try:
+                result = probe()
+                if result:
+                    return result
+                stale_in_a_row = 0
+            except Exception as e:
+                classification = self.classify(e)
+                if classification in (SESSION_DEAD, FATAL):
+                    raise
+                last_error = e
+                stale_in_a_row = stale_in_a_row + 1 if classification == RETRY_STALE else 0
+
+            remaining = end_time - time.monotonic()
+            if remaining <= 0 or (self.max_attempts is not None and attempt >= self.max_attempts):
+                if final_probe is not None:
+                    try:
+                        result = final_probe()
+                        if result:
+                            return result
+                    except Exception as e:
+                        if self.classify(e) in (SESSION_DEAD, FATAL):
+                            raise
+                        last_error = e
+                raise TimeoutException(
+                    f"{description} after {deadline:g} seconds ({attempt} attempts)"
+                ) from last_error
+            # A stale handle only needs a fresh lookup, so the first retry is immediate
+            delay = 0 if stale_in_a_row == 1 else self.backoff(attempt)
+            time.sleep(min(delay, remaining))
@@ -0,0 +1,164 @@
+import heapq
+from collections import namedtuple
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+from appium.webdriver.common.appiumby import AppiumBy
+from pages.base_actions.page_snapshot import PageSnapshot, UnsupportedLocatorError
+
+Strategy = Tuple[str, str]
+
+# Identified screen: anchors is the number of anchors that matched, the more the more specific
+ScreenMatch = namedtuple('ScreenMatch', ['name', 'anchors'])
+# Known way from one screen to another, action is called with the driver
+Transition = namedtuple('Transition', ['source', 'target', 'action', 'cost'])
+
+_NAME_STRATEGIES = (AppiumBy.ACCESSIBILITY_ID, AppiumBy.ID, AppiumBy.NAME)
+
+
+class StructuralFingerprint:
+    """
+    Element types and stable identifiers of the visible elements of one page source snapshot.
+
+    Values are left out, so typing in a field or a counter changing does not change the screen.
+    """
+
+    def __init__(self, snapshot: PageSnapshot):
+        tokens = set()
+        for node in snapshot.elements:
+            name = node.attrib.get('name')
+            if not name or node.attrib.get('visible', 'false') != 'true':
+                continue
+            # A text field reports its content as name when it has no identifier
+            if name == node.attrib.get('value') and node.attrib.get('label') != name:
+                continue
+            tokens.add((node.attrib.get('type', node.tag), name))
+        self.tokens: FrozenSet[Tuple[str, str]] = frozenset(tokens)
+        self.names = frozenset(name for _, name in tokens)
+
+    def __eq__(self, other):
+        return isinstance(other, StructuralFingerprint) and self.tokens == other.tokens
+
+    def __hash__(self):
+        return hash(self.tokens)
+
+
+class Screen:
+    """
+    A screen of the app, recognised by anchor locators that must be visible and optional ones that must not.
+
+    Declaring one on a page object registers it in screen_identifier.
+
+    Ex.
+    class OnboardingPage(BaseActions):
+        WELCOME_SCREEN = Screen('onboarding.welcome', anchors=(OnboardingLocators.GET_STARTED_BUTTON,))
+    """
+
+    def __init__(self, name: str, anchors: Sequence[Strategy], absent: Sequence[Strategy] = ()):
+        """
+        Args:
+            name: Unique screen name
+            anchors: Locators visible on this screen only (together)
+            absent: Locators that are never visible on this screen, used to tell overlays apart
+        """
+        if not anchors:
+            raise ValueError(f"Screen {name} needs at least one anchor")
+        self.name = name
+        self.anchors = tuple(tuple(anchor) for anchor in anchors)
+        self.absent = tuple(tuple(locator) for locator in absent)
+
+    def __repr__(self):
+        return f"<Screen {self.name}>"
+
+    def __set_name__(self, owner, name):
+        screen_identifier.register(self)
+
+    @staticmethod
+    def _visible(locator: Strategy, snapshot: PageSnapshot, fingerprint: StructuralFingerprint) -> bool:
+        locator_type, locator_value = locator
+        if locator_type in _NAME_STRATEGIES:
+            return locator_value in fingerprint.names
+        try:
+            return snapshot.is_visible(locator_type, locator_value)
+        except UnsupportedLocatorError:
+            return False
+
+    def matches(self, snapshot: PageSnapshot, fingerprint: StructuralFingerprint) -> bool:
+        return (all(self._visible(anchor, snapshot, fingerprint) for anchor in self.anchors)
+                and not any(self._visible(locator, snapshot, fingerprint) for locator in self.absent))
+
+
+class ScreenIdentifier:
+    """
+    Tell which registered screen a page source snapshot shows, and how to get from one screen to another.
+
+    Identification is local: one page source fetch answers "which screen am I on?" for every
+    registered screen, the most specific match (most anchors) wins.
+
+    Screens are declared by anchors rather than by whole registered fingerprints: the complete
+    fingerprint of a screen changes with its content (list rows, selected tabs, sheets), while a
+    few identifiers stay put. Identifier anchors are looked up in the structural fingerprint of
+    the snapshot, the other anchors are evaluated on the snapshot itself.
+    """
+
+    def __init__(self):
+        self.screens: Dict[str, Screen] = {}
+        self.transitions: Dict[str, List[Transition]] = {}
+
+    def register(self, screen: Screen) -> Screen:
+        existing = self.screens.get(screen.name)
+        if existing is not None and existing is not screen:
+            raise ValueError(f"Screen {screen.name} is already registered")
+        self.screens[screen.name] = screen
+        return screen
+
+    def register_transition(self, source: str, target: str, action: Callable, cost: float = 1.0):
+        """
+        Declare how to go from one screen to another
+
+        Args:
+            source: Screen name the action starts from
+            target: Screen name the action leads to
+            action: Callable taking the driver
+            cost: Relative cost of the action, routes minimise the total cost
+        """
+        self.transitions.setdefault(source, []).append(Transition(source, target, action, cost))
+
+    def identify(self, snapshot: PageSnapshot) -> Optional[ScreenMatch]:
+        """
+        Screen shown by the snapshot
+
+        Returns:
+            Optional[ScreenMatch]: The most specific registered screen matching, None if no screen matches
+        """
+        fingerprint = StructuralFingerprint(snapshot)
+        matches = [ScreenMatch(screen.name, len(screen.anchors))
+                   for screen in self.screens.values() if screen.matches(snapshot, fingerprint)]
+        return max(matches, key=lambda candidate: candidate.anchors) if matches else None
+
+    def route(self, source: str, target: str) -> Optional[List[Transition]]:
+        """
+        Cheapest sequence of transitions from source to target
+
+        Returns:
+            Optional[List[Transition]]: Transitions to perform in order, empty when already there,
+                                        None if the target cannot be reached
+        """
+        if source == target:
+            return []
+        queue = [(0.0, 0, source, [])]
+        visited = set()
+        counter = 0
+        while queue:
+            cost, _, screen, path = heapq.heappop(queue)
+            if screen == target:
+                return path
+            if screen in visited:
+                continue
+            visited.add(screen)
+            for transition in self.transitions.get(screen, ()):
+                if transition.target not in visited:
+                    counter += 1
+                    heapq.heappush(queue, (cost + transition.cost, counter, transition.target, path + [transition]))
+        return None
+
+
+screen_identifier = ScreenIdentifier()
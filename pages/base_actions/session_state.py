@@ -0,0 +1,52 @@
+import weakref
+from pages.base_actions.element_cache import ElementCache
+from pages.base_actions.implicit_wait import ImplicitWaitManager
+from pages.base_actions.viewport import Viewport
+
+
+class SessionState:
+    """
+    Per-driver bookkeeping shared by every page object bound to the same session.
+
+    Page objects are created per step, so anything that describes the device screen
+    (rather than a single page object) has to live here to survive between steps.
+    """
+
+    def __init__(self, driver):
+        self.snapshot = None
+        self.generation = 0
+        self.element_cache = ElementCache()
+        self.implicit_wait = ImplicitWaitManager(driver)
+        self.viewport = Viewport(driver)
+        # Server commands that answered "unknown command" in this session
+        self.unsupported_commands = set()
+
+
+_states = weakref.WeakKeyDictionary()
+
+
+def get_session_state(driver) -> SessionState:
+    """
+    Return the shared state of the given driver, creating it on first use
+
+    Args:
+        driver: WebDriver instance
+
+    Returns:
+        SessionState: State object shared by all BaseActions bound to the driver
+    """
+    state = _states.get(driver)
+    if state is None:
+        state = SessionState(driver)
+        _states[driver] = state
+    return state
+
+
+def reset_session_state(driver):
+    """
+    Forget the state of the driver, e.g. after it was attached to another server-side session
+
+    Args:
+        driver: WebDriver instance
+    """
+    _states.pop(driver, None)
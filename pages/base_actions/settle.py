@@ -0,0 +1,53 @@
+import time
+from typing import Callable, Hashable
+
+
+class SettleDetector:
+    """
+    Decide the UI is idle when consecutive fingerprints of it are equal.
+
+    A fingerprint is any cheap hashable sample of the screen, e.g. the structural hash of
+    a page source snapshot or the rect and value of one element. Sampling stops as soon as
+    the last stable_samples fingerprints match, or when the cap is reached.
+    """
+
+    def __init__(self, sample: Callable[[], Hashable], interval: float = 0.15, stable_samples: int = 2):
+        """
+        Args:
+            sample: Callable returning the current fingerprint
+            interval: Pause between two samples (seconds)
+            stable_samples: Number of consecutive equal samples meaning the UI is idle
+        """
+        self.sample = sample
+        self.interval = interval
+        self.stable_samples = max(2, stable_samples)
+        self.samples = 0
+        self.elapsed = 0.0
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Sample until the UI is stable or the cap is reached
+
+        Args:
+            timeout: Maximum time spent waiting (seconds)
+
+        Returns:
+            bool: True if the UI settled before the cap, otherwise False
+        """
+        start_time = time.monotonic()
+        end_time = start_time + timeout
+        previous = object()
+        matches = 1
+        self.samples = 0
+        while True:
+            fingerprint = self.sample()
+            self.samples += 1
+            matches = matches + 1 if fingerprint == previous else 1
+            previous = fingerprint
+            self.elapsed = time.monotonic() - start_time
+            if matches >= self.stable_samples:
+                return True
+            remaining = end_time - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.interval, remaining))
@@ -0,0 +1,111 @@
+import weakref
+from collections import namedtuple
+from typing import Optional, Tuple
+
+SafeArea = namedtuple('SafeArea', ['top', 'bottom', 'left', 'right'])
+DeviceProfile = namedtuple('DeviceProfile', ['width', 'height', 'safe_area'])
+
+# Portrait logical size (points) and safe-area insets of the devices we run on
+DEVICE_PROFILES = {
+    'iPhone SE (3rd generation)': DeviceProfile(375, 667, SafeArea(20, 0, 0, 0)),
+    'iPhone 15': DeviceProfile(393, 852, SafeArea(59, 34, 0, 0)),
+    'iPhone 15 Pro': DeviceProfile(393, 852, SafeArea(59, 34, 0, 0)),
+    'iPhone 15 Pro Max': DeviceProfile(430, 932, SafeArea(59, 34, 0, 0)),
+    'iPhone 16': DeviceProfile(393, 852, SafeArea(59, 34, 0, 0)),
+    'iPhone 16 Pro': DeviceProfile(402, 874, SafeArea(62, 34, 0, 0)),
+    'iPhone 16 Pro Max': DeviceProfile(440, 956, SafeArea(62, 34, 0, 0)),
+    'iPhone 17 Pro': DeviceProfile(402, 874, SafeArea(62, 34, 0, 0)),
+}
+NO_SAFE_AREA = SafeArea(0, 0, 0, 0)
+
+
+class Viewport:
+    """
+    Session-scoped window geometry used by every gesture.
+
+    The window size is fetched once per session and reused until invalidate() is called,
+    which BaseActions does when it changes the orientation.
+    """
+
+    def __init__(self, driver):
+        """
+        Args:
+            driver: WebDriver instance the viewport belongs to
+        """
+        self._driver = weakref.ref(driver)
+        self._size: Optional[Tuple[int, int]] = None
+        self.window_size_calls = 0
+
+    def invalidate(self):
+        """
+        Forget the cached window size, e.g. after an orientation change
+        """
+        self._size = None
+
+    @property
+    def cached(self) -> bool:
+        """
+        Whether the window size is known without asking the server
+        """
+        return self._size is not None
+
+    def size(self) -> Tuple[int, int]:
+        """
+        Window width and height, fetched from the server only on first use
+        """
+        if self._size is None:
+            size = self._driver().get_window_size()
+            self.window_size_calls += 1
+            self._size = (size['width'], size['height'])
+        return self._size
+
+    def profile(self) -> Optional[DeviceProfile]:
+        """
+        Device profile matching the deviceName capability of the session, if there is one
+        """
+        capabilities = getattr(self._driver(), 'capabilities', None) or {}
+        device_name = capabilities.get('deviceName') or capabilities.get('appium:deviceName')
+        return DEVICE_PROFILES.get(device_name)
+
+    def safe_area(self) -> SafeArea:
+        """
+        Safe-area insets for the current orientation, all zero for unknown devices
+        """
+        profile = self.profile()
+        if profile is None:
+            return NO_SAFE_AREA
+        width, height = self.size()
+        insets = profile.safe_area
+        if width > height:
+            # Landscape: the notch side moves to the left/right edges and the home indicator shrinks
+            return SafeArea(0, min(insets.bottom, 21), insets.top, insets.top)
+        return insets
+
+    def resolve(self, x: float, y: float, unit: str = 'ratio', element_rect: dict = None,
+                within_safe_area: bool = False) -> Tuple[int, int]:
+        """
+        Resolve a point to window pixels
+
+        Args:
+            x: x coordinate, its meaning depends on unit
+            y: y coordinate, its meaning depends on unit
+            unit: 'ratio' (0.0 ~ 1.0 of the window or element), or 'px' (absolute pixels)
+            element_rect: Optional element rect, ratios are then relative to the element
+            within_safe_area: Apply window ratios to the safe area instead of the full window
+
+        Returns:
+            Tuple[int, int]: Absolute x, y in pixels
+        """
+        if unit == 'px':
+            return int(x), int(y)
+        if unit != 'ratio':
+            raise ValueError(f"Unknown coordinate unit: {unit}")
+        if element_rect is not None:
+            return (int(element_rect['x'] + element_rect['width'] * x),
+                    int(element_rect['y'] + element_rect['height'] * y))
+
+        width, height = self.size()
+        insets = self.safe_area() if within_safe_area else NO_SAFE_AREA
+        usable_width = width - insets.left - insets.right
+        usable_height = height - insets.top - insets.bottom
+        return int(insets.left + usable_width * x), int(insets.top + usable_height * y)
@@ -1,11 +1,22 @@
-import time
 from typing import Optional
 from appium.webdriver.webdriver import WebDriver
 from pages.base_actions.base_action import BaseActions
+from pages.base_actions.screen_identifier import Screen, screen_identifier
 from pages.locators.onboarding_locators import OnboardingLocators
 
 
 class OnboardingPage(BaseActions):
+    WELCOME_SCREEN = Screen('onboarding.welcome',
+                            anchors=(OnboardingLocators.GET_STARTED_BUTTON, OnboardingLocators.TRACK_FINANCES_TEXT))
+    CATEGORIES_SCREEN = Screen('onboarding.categories', anchors=(OnboardingLocators.INCOME_TAB,),
+                               absent=(OnboardingLocators.ADD_CATEGORY_ICON_BUTTON,))
+    # The new category bottom sheet, shown over the categories page
+    NEW_CATEGORY_SHEET = Screen('onboarding.new_category', anchors=(OnboardingLocators.ADD_CATEGORY_ICON_BUTTON,))
+    screen_identifier.register_transition(WELCOME_SCREEN.name, CATEGORIES_SCREEN.name,
+                                          lambda driver: OnboardingPage(driver).click_get_started_button())
+    screen_identifier.register_transition(NEW_CATEGORY_SHEET.name, CATEGORIES_SCREEN.name,
+                                          lambda driver: OnboardingPage(driver).close_bottom_sheet())
+
     def __init__(self, driver: WebDriver):
         super().__init__(driver)
         self.onboarding_locators = OnboardingLocators()
@@ -17,10 +28,8 @@ class OnboardingPage(BaseActions):
             self.onboarding_locators.STICK_TO_BUDGETS_TEXT
         ]
         
-        for element in elements:
-            if not self.wait_for_element_present(*element, timeout=10):
-                return False
-        return True
+        # One compound predicate query per poll for all three texts
+        return self.wait_for_all(*elements, timeout=10)
 
     def is_track_finances_displayed(self) -> bool:
         return self.is_element_visible(*self.onboarding_locators.TRACK_FINANCES_TEXT)
@@ -52,9 +61,7 @@ class OnboardingPage(BaseActions):
         return self
 
     def search_emoji(self, search_text: str) -> 'OnboardingPage':
-        self.wait_for_element_present(*self.onboarding_locators.EMOJI_SEARCH_FIELD)
-        self.clear_text(*self.onboarding_locators.EMOJI_SEARCH_FIELD)
-        self.send_keys_to_element(*self.onboarding_locators.EMOJI_SEARCH_FIELD, search_text)
+        self.set_text(*self.onboarding_locators.EMOJI_SEARCH_FIELD, search_text)
         return self
 
     def click_stock_emoji(self) -> 'OnboardingPage':
@@ -68,9 +75,7 @@ class OnboardingPage(BaseActions):
         return self
 
     def enter_category_name(self, category_name: str) -> 'OnboardingPage':
-        self.wait_for_element_present(*self.onboarding_locators.CATEGORY_NAME_FIELD)
-        self.clear_text(*self.onboarding_locators.CATEGORY_NAME_FIELD)
-        self.send_keys_to_element(*self.onboarding_locators.CATEGORY_NAME_FIELD, category_name)
+        self.set_text(*self.onboarding_locators.CATEGORY_NAME_FIELD, category_name)
         return self
 
     def click_add_category_button(self) -> 'OnboardingPage':
@@ -79,14 +84,11 @@ class OnboardingPage(BaseActions):
         return self
 
     def close_bottom_sheet(self) -> 'OnboardingPage':
-        screen_width, screen_height = self.get_screen_size()
-        self.tap(screen_width * 0.5, screen_height * 0.2)
-        time.sleep(1.5)  
+        self.tap(0.5, 0.2)
+        self.wait_for_settle(timeout=1.5)
         return self
 
     def click_next_button(self) -> 'OnboardingPage':
-        time.sleep(1)
+        self.wait_for_settle(timeout=1)
         self.tap(0.85, 0.92)
         return self
-
- 
\ No newline at end of file
@@ -1,4 +1,5 @@
 from appium.webdriver.common.appiumby import AppiumBy
+from pages.locators.registry import Locator
 
 class OnboardingLocators:
     # Welcome screen elements
@@ -13,12 +14,26 @@ class OnboardingLocators:
     NEW_BUTTON = (AppiumBy.ACCESSIBILITY_ID, "New")
     
     # Emoji search elements
-    EMOJI_SEARCH_FIELD = (AppiumBy.XPATH, '//XCUIElementTypeTextField[@value="Search Emoji"]')
-    STOCK_EMOJI_RESULT = (AppiumBy.XPATH, '//XCUIElementTypeStaticText[@name="📈"]')
+    EMOJI_SEARCH_FIELD = Locator(
+        (AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeTextField' AND value == 'Search Emoji'"),
+        (AppiumBy.IOS_CLASS_CHAIN, '**/XCUIElementTypeTextField[`value == "Search Emoji"`]'),
+        (AppiumBy.XPATH, '//XCUIElementTypeTextField[@value="Search Emoji"]'),
+    )
+    STOCK_EMOJI_RESULT = Locator(
+        (AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeStaticText' AND name == '📈'"),
+        (AppiumBy.XPATH, '//XCUIElementTypeStaticText[@name="📈"]'),
+    )
     
     # Category creation elements
-    CATEGORY_NAME_FIELD = (AppiumBy.XPATH, '//XCUIElementTypeTextField[@value="Category Name"]')
-    ADD_CATEGORY_ICON_BUTTON = (AppiumBy.XPATH, '//XCUIElementTypeButton[@name="plus" and @label="Add"]')
+    CATEGORY_NAME_FIELD = Locator(
+        (AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeTextField' AND value == 'Category Name'"),
+        (AppiumBy.IOS_CLASS_CHAIN, '**/XCUIElementTypeTextField[`value == "Category Name"`]'),
+        (AppiumBy.XPATH, '//XCUIElementTypeTextField[@value="Category Name"]'),
+    )
+    ADD_CATEGORY_ICON_BUTTON = Locator(
+        (AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeButton' AND name == 'plus' AND label == 'Add'"),
+        (AppiumBy.XPATH, '//XCUIElementTypeButton[@name="plus" and @label="Add"]'),
+    )
     CLOSE_BUTTON = (AppiumBy.ACCESSIBILITY_ID, "Close")
     
     
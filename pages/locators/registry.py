@@ -0,0 +1,303 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from selenium.common.exceptions import NoSuchElementException
+from pages.base_actions.file_lock import file_lock
+
+Strategy = Tuple[str, str]
+
+DEFAULT_STATS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "logs",
+                                  "locator_stats.json")
+
+
+class StrategyStats:
+    """
+    Resolution statistics of one strategy of a locator
+    """
+
+    def __init__(self, attempts: int = 0, hits: int = 0, total_latency: float = 0.0):
+        self.attempts = attempts
+        self.hits = hits
+        self.total_latency = total_latency
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.attempts if self.attempts else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.attempts if self.attempts else 0.0
+
+    def record(self, latency: float, hit: bool):
+        self.attempts += 1
+        self.hits += int(hit)
+        self.total_latency += latency
+
+    def merged(self, other: 'StrategyStats') -> 'StrategyStats':
+        return StrategyStats(self.attempts + other.attempts, self.hits + other.hits,
+                             self.total_latency + other.total_latency)
+
+    def to_dict(self) -> dict:
+        return {'attempts': self.attempts, 'hits': self.hits, 'total_latency': round(self.total_latency, 6)}
+
+
+class Locator(tuple):
+    """
+    A (locator_type, locator_value) tuple carrying ordered alternative strategies.
+
+    It unpacks like a plain locator tuple (the first strategy), so page objects keep calling
+    self.click_element(*OnboardingLocators.X); BaseActions finds the alternatives through the
+    registry. Declaring one on a locator class registers it under "Class.ATTRIBUTE".
+
+    Ex.
+    EMOJI_SEARCH_FIELD = Locator(
+        (AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeTextField' AND value == 'Search Emoji'"),
+        (AppiumBy.XPATH, '//XCUIElementTypeTextField[@value="Search Emoji"]'),
+    )
+    """
+
+    def __new__(cls, *strategies: Strategy):
+        if not strategies:
+            raise ValueError("A locator needs at least one strategy")
+        locator = super().__new__(cls, strategies[0])
+        locator.strategies = tuple(tuple(strategy) for strategy in strategies)
+        locator.name = None
+        return locator
+
+    def __set_name__(self, owner, name):
+        self.name = f"{owner.__name__}.{name}"
+        locator_registry.register(self)
+
+
+class LocatorRegistry:
+    """
+    Locators with alternative strategies, and how fast and reliable each strategy has been.
+
+    Statistics are loaded from a local JSON store and the ones recorded by this process are
+    merged back into it by save(). Only the first strategy of the chain is polled, so chains
+    declare the native query first. The other strategies are tried as a fallback inside
+    alternatives(), e.g. for the last attempt of a wait, which measures them; besides, every
+    SAMPLE_EVERY-th hit of the first strategy measures one alternative with fewer than MIN_SAMPLES
+    resolutions. Once every strategy has been measured, the one with a hit rate of at least
+    MIN_HIT_RATE and the lowest mean latency is promoted to the front of its chain.
+    """
+    MIN_SAMPLES = 3
+    MIN_HIT_RATE = 0.9
+    # One extra lookup every SAMPLE_EVERY hits measures the alternatives while the element is on screen
+    SAMPLE_EVERY = 20
+
+    def __init__(self, stats_file: str = None):
+        """
+        Args:
+            stats_file: JSON store of the statistics, default is LOCATOR_STATS_FILE or logs/locator_stats.json
+        """
+        self.stats_file = stats_file or os.getenv('LOCATOR_STATS_FILE', DEFAULT_STATS_FILE)
+        self._locators: Dict[Strategy, Locator] = {}
+        self._stored: Optional[Dict[str, Dict[Strategy, StrategyStats]]] = None
+        self._recorded: Dict[str, Dict[Strategy, StrategyStats]] = defaultdict(dict)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def register(self, locator: Locator):
+        self._locators[tuple(locator)] = locator
+
+    def lookup(self, locator_type: str, locator_value: str) -> Optional[Locator]:
+        """
+        Registered locator whose first strategy is the given one, None for plain locators
+        """
+        return self._locators.get((locator_type, locator_value))
+
+    def _load(self) -> Dict[str, Dict[Strategy, StrategyStats]]:
+        stats = defaultdict(dict)
+        try:
+            with open(self.stats_file, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return stats
+        for name, strategies in data.items():
+            for entry in strategies:
+                stats[name][(entry['type'], entry['value'])] = StrategyStats(
+                    entry['attempts'], entry['hits'], entry['total_latency'])
+        return stats
+
+    def stats(self, locator: Locator) -> Dict[Strategy, StrategyStats]:
+        """
+        Stored plus recorded statistics of every strategy of the locator
+        """
+        if self._stored is None:
+            self._stored = self._load()
+        stored = self._stored.get(locator.name, {})
+        recorded = self._recorded.get(locator.name, {})
+        return {strategy: stored.get(strategy, StrategyStats()).merged(recorded.get(strategy, StrategyStats()))
+                for strategy in locator.strategies}
+
+    def ordered_strategies(self, locator: Locator) -> List[Strategy]:
+        """
+        Strategies in resolution order: the promoted one once every strategy has MIN_SAMPLES
+        resolutions, then the declared order
+        """
+        stats = self.stats(locator)
+        if any(stats[strategy].attempts < self.MIN_SAMPLES for strategy in locator.strategies):
+            return list(locator.strategies)
+        eligible = [strategy for strategy in locator.strategies if stats[strategy].hit_rate >= self.MIN_HIT_RATE]
+        if not eligible:
+            return list(locator.strategies)
+        promoted = min(eligible, key=lambda strategy: stats[strategy].mean_latency)
+        return [promoted] + [strategy for strategy in locator.strategies if strategy != promoted]
+
+    def record(self, locator: Locator, strategy: Strategy, latency: float, hit: bool):
+        with self._lock:
+            self._recorded[locator.name].setdefault(strategy, StrategyStats()).record(latency, hit)
+
+    @contextmanager
+    def alternatives(self):
+        """
+        Let resolve() fall back to the alternative strategies when the first one misses
+
+        Ex.
+        with locator_registry.alternatives():
+            element = find_element(*OnboardingLocators.EMOJI_SEARCH_FIELD)
+        """
+        previous = getattr(self._local, 'alternatives', False)
+        self._local.alternatives = True
+        try:
+            yield
+        finally:
+            self._local.alternatives = previous
+
+    @staticmethod
+    def _attempt(find: Callable, found: Callable, strategy: Strategy):
+        """
+        One lookup: (result, error, latency, hit)
+        """
+        start = time.perf_counter()
+        try:
+            result, error = find(*strategy), None
+        except NoSuchElementException as e:
+            result, error = None, e
+        return result, error, time.perf_counter() - start, error is None and found(result)
+
+    def _sample_alternative(self, locator: Locator, first: Strategy, alternatives: List[Strategy], find: Callable,
+                            found: Callable):
+        """
+        Measure the least sampled alternative while the element is known to be on screen,
+        on every SAMPLE_EVERY-th hit of the first strategy only
+        """
+        stats = self.stats(locator)
+        if stats[first].hits % self.SAMPLE_EVERY:
+            return
+        unsampled = [strategy for strategy in alternatives if stats[strategy].attempts < self.MIN_SAMPLES]
+        if not unsampled:
+            return
+        strategy = min(unsampled, key=lambda candidate: stats[candidate].attempts)
+        _, _, latency, hit = self._attempt(find, found, strategy)
+        self.record(locator, strategy, latency, hit)
+
+    def resolve(self, locator_type: str, locator_value: str, find: Callable, found: Callable = bool):
+        """
+        Resolve a locator through its strategy chain
+
+        Only the first strategy is tried, plus now and then one alternative to measure after a hit. Inside
+        alternatives() a miss falls back to the other strategies, and the first strategy only counts
+        as a miss when one of them found the element, so polling for an element that is not on
+        screen yet does not hurt any strategy.
+
+        Args:
+            locator_type: Type of the first strategy
+            locator_value: Value of the first strategy
+            find: Callable(locator_type, locator_value) doing the lookup
+            found: Whether a lookup result is a hit, bool by default (find_elements returns a list)
+
+        Returns:
+            The result of the first strategy that found the element, or of the last one tried
+
+        Raises:
+            NoSuchElementException: If every strategy tried raised it
+        """
+        locator = self.lookup(locator_type, locator_value)
+        if locator is None or len(locator.strategies) == 1:
+            return find(locator_type, locator_value)
+
+        first, *alternatives = self.ordered_strategies(locator)
+        result, last_error, latency, hit = self._attempt(find, found, first)
+        if hit:
+            self.record(locator, first, latency, True)
+            self._sample_alternative(locator, first, alternatives, find, found)
+            return result
+        if getattr(self._local, 'alternatives', False):
+            misses = [(first, latency)]
+            for strategy in alternatives:
+                result, last_error, latency, hit = self._attempt(find, found, strategy)
+                if hit:
+                    self.record(locator, strategy, latency, True)
+                    for missed_strategy, missed_latency in misses:
+                        self.record(locator, missed_strategy, missed_latency, False)
+                    return result
+                misses.append((strategy, latency))
+        if last_error is not None:
+            raise last_error
+        return result
+
+    def save(self):
+        """
+        Merge the statistics recorded by this process into the store, the read-merge-write being
+        done under the store's file lock so parallel workers keep each other's statistics
+        """
+        with self._lock:
+            if not self._recorded:
+                return
+            with file_lock(self.stats_file):
+                merged = self._load()
+                for name, strategies in self._recorded.items():
+                    for strategy, stats in strategies.items():
+                        merged[name][strategy] = merged[name].get(strategy, StrategyStats()).merged(stats)
+                data = {name: [dict(type=strategy[0], value=strategy[1], **stats.to_dict())
+                               for strategy, stats in strategies.items()]
+                        for name, strategies in sorted(merged.items())}
+                temporary_file = f"{self.stats_file}.{os.getpid()}.tmp"
+                with open(temporary_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                os.replace(temporary_file, self.stats_file)
+            self._stored = merged
+            self._recorded.clear()
+
+    def report(self, limit: int = 10) -> str:
+        """
+        Slowest strategies per locator class, from the store and this process
+
+        Args:
+            limit: Number of strategies listed per locator class
+        """
+        stats = self._load()
+        for name, strategies in self._recorded.items():
+            for strategy, recorded in strategies.items():
+                stats[name][strategy] = stats[name].get(strategy, StrategyStats()).merged(recorded)
+
+        per_owner = defaultdict(list)
+        for name, strategies in stats.items():
+            owner = name.split('.', 1)[0]
+            for strategy, strategy_stats in strategies.items():
+                per_owner[owner].append((strategy_stats.mean_latency, name, strategy, strategy_stats))
+
+        lines = []
+        for owner in sorted(per_owner):
+            lines.append(owner)
+            for mean_latency, name, strategy, strategy_stats in sorted(per_owner[owner], reverse=True)[:limit]:
+                lines.append(f"  {mean_latency * 1000:8.1f} ms  hit rate {strategy_stats.hit_rate:6.1%}  "
+                             f"n={strategy_stats.attempts:<5} {name.split('.', 1)[1]}  {strategy[0]}={strategy[1]}")
+        return '\n'.join(lines) if lines else "No locator statistics recorded yet"
+
+
+locator_registry = LocatorRegistry()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Locator latency report")
+    parser.add_argument('--limit', type=int, default=10, help="strategies listed per locator class")
+    args = parser.parse_args()
+    print(locator_registry.report(args.limit))
@@ -1,10 +1,14 @@
-import time
+import copy
 import pytest
 import unittest
 import os
 from dotenv import dotenv_values
 from appium.webdriver import Remote
 from appium.options.ios import XCUITestOptions
+from pages.base_actions.session_state import get_session_state
+from utils.device_matrix import device_for_worker
+from utils.device_pool import worker_id
+from utils.teardown_pipeline import teardown_pipeline, wait_for_appium_ready
 
 
 # TODO: Move the config and options to a separate file
@@ -83,8 +87,89 @@ else:
         'APPIUM_SERVER_URL', 'http://127.0.0.1:4723')
 
 
+def options_for_slot(slot) -> XCUITestOptions:
+    """
+    Copy of the options pinned to one device slot of the device pool: its UDID, and the
+    WebDriverAgent and MJPEG ports no other worker uses
+    """
+    slot_options = copy.deepcopy(options)
+    slot_options.set_capability('udid', slot.udid)
+    slot_options.set_capability('wdaLocalPort', slot.wda_local_port)
+    slot_options.set_capability('mjpegServerPort', slot.mjpeg_server_port)
+    for name, value in slot.capabilities.items():
+        slot_options.set_capability(name, value)
+    return slot_options
+
+
+def options_for_cloud_device(device) -> XCUITestOptions:
+    """
+    Copy of the BrowserStack options for one device of the DEVICE_MATRIX / DEVICE_COUNT fan-out
+    """
+    device_options = copy.deepcopy(options)
+    device_options.deviceName = device.device_name
+    device_options.os_version = device.os_version
+    bstack_options = dict(device_options.get_capability('bstack:options'))
+    bstack_options.update(deviceName=device.device_name, osVersion=device.os_version,
+                          sessionName=f"{bstack_options['sessionName']} - {device.device_name} {device.os_version}")
+    device_options.set_capability('bstack:options', bstack_options)
+    return device_options
+
+
+def session_id_file() -> str:
+    """
+    File the BrowserStack session id is saved to: the legacy name for a serial run and for the first
+    pytest-xdist worker, a suffixed one for every other worker
+    """
+    worker = worker_id()
+    if worker in ('master', 'gw0'):
+        return 'browserstack_session_id.txt'
+    return f'browserstack_session_id_{worker}.txt'
+
+
+def write_session_id(session_id: str):
+    with open(session_id_file(), 'w') as f:
+        f.write(session_id)
+
+
+class AttachedRemote(Remote):
+    """
+    Remote bound to an existing server-side session instead of creating a new one
+    """
+
+    def __init__(self, command_executor: str, session_id: str, capabilities: dict, **kwargs):
+        self._attached_session = (session_id, capabilities)
+        super().__init__(command_executor, **kwargs)
+
+    def start_session(self, capabilities, browser_profile=None) -> None:
+        self.session_id, self.caps = self._attached_session
+
+
 class AppiumSetup(unittest.TestCase):
-    def setUp(self) -> Remote:
+    # Attached to a session owned by someone else (the session keeper), which tearDown must not quit
+    attached = False
+
+    def attach(self, session_id: str, server_url: str, capabilities: dict = None) -> Remote:
+        """
+        Use an existing session instead of creating one
+
+        Args:
+            session_id: Id of the running session
+            server_url: Appium server the session lives on
+            capabilities: Capabilities the session was created with
+        """
+        self.config = config
+        self.platform = platform
+        self.noReset_bool = noReset_bool
+        self.attached = True
+        self.driver = AttachedRemote(server_url, session_id, capabilities or {}, options=options)
+        get_session_state(self.driver).implicit_wait.set(0)
+        return self.driver
+
+    def setUp(self, slot=None) -> Remote:
+        """
+        Args:
+            slot: DeviceSlot leased from the device pool, default is the single configured device
+        """
         # Setting global variables
         self.config = config
         self.platform = platform
@@ -96,20 +181,40 @@ class AppiumSetup(unittest.TestCase):
                 os.path.dirname(__file__)), "screenshots")
             os.makedirs(screenshots_dir, exist_ok=True)
 
-        self.driver = Remote(appium_server_url, options=options)
-        self.driver.implicitly_wait(int(config.get('IMPLICIT_WAIT', '25')))
+        self.server_url = slot.appium_url if slot is not None else appium_server_url
+        if slot is not None:
+            self.driver = Remote(slot.appium_url, options=options_for_slot(slot))
+        elif is_ci:
+            self.device = device_for_worker(config, worker_id())
+            print(f"Worker {worker_id()} runs on {self.device.device_name} {self.device.os_version}")
+            self.driver = Remote(appium_server_url, options=options_for_cloud_device(self.device))
+        else:
+            self.driver = Remote(appium_server_url, options=options)
+        # The primitives wait explicitly through their retry policy, so the session keeps an implicit
+        # wait of 0 and they never toggle it; set through the tracker so BaseActions knows the value
+        get_session_state(self.driver).implicit_wait.set(0)
 
-        # Save BrowserStack session ID if running in CI
+        # Save BrowserStack session ID if running in CI, synchronously so the file exists for the CI steps reading it
         if is_ci:
-            with open('browserstack_session_id.txt', 'w') as f:
-                f.write(self.driver.session_id)
+            write_session_id(self.driver.session_id)
 
         return self.driver
 
-    def tearDown(self) -> None:
-        if self.driver:
-            self.driver.quit()
-            time.sleep(10)
+    def tearDown(self):
+        """
+        Quit the session in the background, then wait for the local Appium server to be ready
+        for the next session (instead of a fixed sleep)
+
+        Returns:
+            TeardownTask: The quit step, None if there is nothing to quit
+        """
+        if not self.driver or self.attached:
+            return None
+        quit_task = teardown_pipeline.submit("quit session", self.driver.quit)
+        if not is_ci:
+            server_url = getattr(self, 'server_url', appium_server_url)
+            teardown_pipeline.submit("wait for Appium", lambda: wait_for_appium_ready(server_url), after=quit_task)
+        return quit_task
 
 
 if __name__ == '__main__':
@@ -14,14 +14,25 @@ load_dotenv()
 from subprocess import run
 from datetime import datetime
 
-from setup import AppiumSetup
+from setup import AppiumSetup, AttachedRemote
 from utils.logger import logger
 from pages.base_actions.base_action import BaseActions
+from pages.base_actions.adaptive_poller import poll_history
+from pages.locators.registry import locator_registry
+from utils.device_matrix import device_for_worker, device_results
+from utils.device_pool import lease_device, worker_id
 from utils.initial_setup import setup_flow
 from utils.permission_handler import handle_permission_dialogs
+from utils.session_keeper import keeper_session, keeper_url, recreate_keeper_session, reset_keeper_app
+from utils.session_warmer import SessionWarmer, adopt_session, session_alive
+from utils.teardown_pipeline import teardown_pipeline
 
 
 test_summary = []
+# Device slot leased by this worker, None when no device pool is configured
+device_lease = None
+# Creates the driver session in the background from pytest_configure
+session_warmer = None
 
 def pytest_addoption(parser):
     """Add custom command line options"""
@@ -31,11 +42,19 @@ def pytest_addoption(parser):
         default=False,
         help="Skip app reinstallation and setup process"
     )
+    parser.addoption(
+        "--attach",
+        action="store_true",
+        default=False,
+        help="Attach to the session of a running session keeper (python -m utils.session_keeper)"
+    )
     
 def handle_failed_test_reset(item, driver):
     """handle the failed test case to reset the app status"""
     print("test failed, starting to reset app status...")
     try:
+        if driver and not session_alive(driver):
+            replace_dead_session(driver)
         if driver:
             is_ci = os.getenv('IS_CI', 'false').lower() == 'true'
 
@@ -62,11 +81,11 @@ def handle_failed_test_reset(item, driver):
                 
                 if app_path:
                     print(f"Uninstall iOS app: {app_id}")
-                    run(['xcrun', 'simctl', 'uninstall', 'booted', app_id], check=True)
+                    run(['xcrun', 'simctl', 'uninstall', simulator_udid(), app_id], check=True)
                     print("iOS app uninstalled successfully")
                     
                     print(f"Reinstall iOS app: {app_path}")
-                    run(['xcrun', 'simctl', 'install', 'booted', app_path], check=True)
+                    run(['xcrun', 'simctl', 'install', simulator_udid(), app_path], check=True)
                     print("iOS app reinstalled successfully")
                     
                     # Re-execute setup_flow for onboarding
@@ -85,14 +104,49 @@ def handle_failed_test_reset(item, driver):
         print(traceback.format_exc())
 
 
+def replace_dead_session(driver):
+    """Attach the driver to a spare session (or a new one) when its session crashed"""
+    print("Driver session is dead, switching to a replacement session...")
+    if isinstance(driver, AttachedRemote):
+        info = recreate_keeper_session()
+        if info is None or not info.get('session_id'):
+            print("Session keeper could not recreate the session")
+            return
+        adopt_session(driver, AppiumSetup().attach(info['session_id'], info['server_url'], info['capabilities']))
+        print(f"Switched to session {driver.session_id}")
+        return
+    replacement = session_warmer.replacement() if session_warmer is not None else None
+    if replacement is None:
+        print("No replacement session available")
+        return
+    adopt_session(driver, replacement[1])
+    print(f"Switched to session {driver.session_id}")
+
+
 def get_app_id():
     """Get the app bundle ID from environment variables"""
     return os.getenv('IOS_APP_BUNDLE_ID', 'com.rafaelsoh.dime')
 
 
+def device_label():
+    """Device this worker runs on, reported with every test result"""
+    if is_running_in_ci():
+        device = device_for_worker(os.environ, worker_id())
+        return f"{device.device_name} {device.os_version}"
+    if device_lease is not None:
+        return device_lease.slot.name
+    return os.getenv('UDID', 'booted simulator')
+
+
+def simulator_udid():
+    """Simulator of this worker for simctl, the booted one when no device pool is configured"""
+    return device_lease.slot.udid if device_lease is not None else 'booted'
+
+
 @pytest.fixture(scope="session", autouse=True)
 def driver(request):
     """Create driver and reinstall App before each test session"""
+    global device_lease, session_warmer
     print("\n=========== Session Start: Creating driver and preparing environment ===========")
 
     # Get environment variables
@@ -102,12 +156,60 @@ def driver(request):
     # Check if the skipsetup option is enabled
     skip_setup = request.config.getoption("--skipsetup")
 
-    # Check if the previous test failed
-    previous_test_failed = False
-    if hasattr(request.session, 'previous_test_failed'):
-        previous_test_failed = request.session.previous_test_failed
+    # Check if there are tests with the 'onboarding' marker in the current test collection
+    has_onboarding_tag = False
+    for item in request.session.items:
+        if item.get_closest_marker('onboarding'):
+            has_onboarding_tag = True
+            break
+
+    # --- Attach to the session keeper: no new session, no onboarding if it already ran ---
+    if request.config.getoption("--attach"):
+        info = keeper_session()
+        if info is None or not info.get('session_id'):
+            pytest.exit(f"No session keeper answering at {keeper_url()}, start one with: python -m utils.session_keeper")
+        if not skip_setup:
+            # Restart the app left by the previous run, reinstalled when the onboarding is under test
+            info = reset_keeper_app(fresh=has_onboarding_tag)
+            if info is None or info.get('error'):
+                pytest.exit(f"Session keeper could not reset the app: {(info or {}).get('error', 'no answer')}")
+        appium_setup = AppiumSetup()
+        driver = appium_setup.attach(info['session_id'], info['server_url'], info['capabilities'])
+        print(f"Attached to session {driver.session_id}")
+        skip_setup = skip_setup or info.get('onboarded', False)
+        warmer = None
+    else:
+        # --- App cleanup and driver creation, started in the background by pytest_configure ---
+        warmer = session_warmer or start_session_warmer(request.config)
+        appium_setup, driver = warmer.session()
 
-    # --- App cleanup process ---
+    # --- Onboarding process ---
+    if has_onboarding_tag or skip_setup:
+        print("Found tests with onboarding marker or skipsetup flag, skipping onboarding process")
+    else:
+        print("Executing onboarding process...")
+        try:
+            setup_flow(driver)
+            print("Initialization process completed")
+        except Exception as e:
+            print(f"Onboarding process failed: {e}")
+
+    yield driver
+
+    # --- Cleanup at the end of the session (an attached session stays alive in the keeper) ---
+    if warmer is not None:
+        warmer.shutdown()
+        session_warmer = None
+    # Quit, artifact flush and report finalization run in the background, joined (bounded) at exit
+    quit_task = appium_setup.tearDown()
+    if device_lease is not None:
+        # The device goes back to the pool only once its session is gone
+        teardown_pipeline.submit("release device", device_lease.release, after=quit_task)
+        device_lease = None
+    print("\n=========== Session End ===========")
+
+def clean_app(skip_setup):
+    """Reinstall the app on the simulator of this worker"""
     if not skip_setup and not is_running_in_ci():  # Only reinstall if skipsetup is not enabled and not in CI
         try:
             print("Cleaning iOS application...")
@@ -115,8 +217,8 @@ def driver(request):
             app_id = get_app_id()
             
             if app_path:
-                run(['xcrun', 'simctl', 'uninstall', 'booted', app_id], check=True)
-                run(['xcrun', 'simctl', 'install', 'booted', app_path], check=True)
+                run(['xcrun', 'simctl', 'uninstall', simulator_udid(), app_id], check=True)
+                run(['xcrun', 'simctl', 'install', simulator_udid(), app_path], check=True)
             else:
                 print("Please set IOS_APP_PATH in your .env")
         except Exception as e:
@@ -126,37 +228,49 @@ def driver(request):
     else:
         print("Skipping app reinstallation process due to --skipsetup flag")
 
-    # --- Create driver ---
+
+def create_session():
+    """Create one driver session on the device of this worker"""
     appium_setup = AppiumSetup()
-    driver = appium_setup.setUp()
+    driver = appium_setup.setUp(slot=device_lease.slot if device_lease is not None else None)
+    return appium_setup, driver
 
-    # Check if there are tests with the 'onboarding' marker in the current test collection
-    has_onboarding_tag = False
-    for item in request.session.items:
-        if item.get_closest_marker('onboarding'):
-            has_onboarding_tag = True
-            break
 
-    # --- Onboarding process ---
-    if has_onboarding_tag or skip_setup:
-        print("Found tests with onboarding marker or skipsetup flag, skipping onboarding process")
-    else:
-        print("Executing onboarding process...")
-        try:
-            setup_flow(driver)
-            print("Initialization process completed")
-        except Exception as e:
-            print(f"Onboarding process failed: {e}")
+def start_session_warmer(config):
+    """
+    Lease the device of this worker and start the app cleanup and session creation in the background.
+    SPARE_SESSIONS extra sessions are kept warm to replace a crashed one (cloud runs only, a local
+    simulator runs one session at a time).
+    """
+    global device_lease, session_warmer
+    # --- Lease a device of the pool (pytest-xdist workers each get their own) ---
+    if not is_running_in_ci() and device_lease is None:
+        device_lease = lease_device()
 
-    yield driver
+    spares = int(os.getenv('SPARE_SESSIONS', '0'))
+    if spares and not is_running_in_ci():
+        print("SPARE_SESSIONS is ignored on local simulators")
+        spares = 0
+    skip_setup = config.getoption("--skipsetup")
+    session_warmer = SessionWarmer(create_session, spares=spares, prepare=lambda: clean_app(skip_setup)).start()
+    return session_warmer
+
+
+def runs_tests(config):
+    """False on the pytest-xdist controller and for collection-only runs, which never use a driver"""
+    if config.getoption('collectonly', False):
+        return False
+    return hasattr(config, 'workerinput') or not getattr(config.option, 'numprocesses', None)
 
-    # --- Cleanup at the end of the session ---
-    appium_setup.tearDown()
-    print("\n=========== Session End ===========")
 
 def pytest_configure(config):
     """Configure test collection and markers"""
 
+    # Session start-up (20-60 seconds) overlaps with collection instead of blocking the driver fixture
+    if (runs_tests(config) and not config.getoption('--attach')
+            and os.getenv('PREWARM_SESSION', 'true').lower() == 'true'):
+        start_session_warmer(config)
+
     if not config.args:
         logger.info("Configuring test collection for iOS platform")
         config.args = ['tests/steps/ios']
@@ -182,6 +296,22 @@ def pytest_configure(config):
     print(f"Logging configured. Log file: {log_file}")
 
 
+def pytest_unconfigure(config):
+    """
+    Quit the pre-warmed session and release the device when the driver fixture never took them,
+    e.g. no test selected, a collection error or a pytest-xdist worker left without tests
+    """
+    global device_lease, session_warmer
+    quit_task = None
+    if session_warmer is not None:
+        warmer = session_warmer
+        quit_task = teardown_pipeline.submit("quit unused sessions", lambda: warmer.shutdown(wait=True))
+        session_warmer = None
+    if device_lease is not None:
+        teardown_pipeline.submit("release device", device_lease.release, after=quit_task)
+        device_lease = None
+
+
 def pytest_bdd_apply_tag(tag, function):
     if tag == 'order':
         marker = pytest.mark.run(order=int(function.__doc__.split('order=')[1]))
@@ -298,16 +428,18 @@ def pytest_runtest_makereport(item, call):
                 screenshot_path = os.path.join(artifacts_dir, screenshot_name)
 
                 # Save screenshot
-                driver.save_screenshot(screenshot_path)
+                # Grab the screenshot now, write it to disk in the background
+                screenshot = driver.get_screenshot_as_png()
+                teardown_pipeline.submit(f"save {screenshot_name}",
+                                         lambda path=screenshot_path, png=screenshot: write_artifact(path, png))
                 success_msg = f"Screenshot saved to artifacts: {screenshot_path}"
 
                 # Also attach to Allure
-                with open(screenshot_path, 'rb') as f:
-                    allure.attach(
-                        f.read(),
-                        name=f"{test_name}",
-                        attachment_type=allure.attachment_type.PNG
-                    )
+                allure.attach(
+                    screenshot,
+                    name=f"{test_name}",
+                    attachment_type=allure.attachment_type.PNG
+                )
             else:
                 # In local environment, save to screenshots directory
                 screenshots_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "screenshots")
@@ -318,16 +450,18 @@ def pytest_runtest_makereport(item, call):
                 screenshot_path = os.path.join(screenshots_dir, screenshot_name)
 
                 # Save screenshot
-                driver.save_screenshot(screenshot_path)
+                # Grab the screenshot now, write it to disk in the background
+                screenshot = driver.get_screenshot_as_png()
+                teardown_pipeline.submit(f"save {screenshot_name}",
+                                         lambda path=screenshot_path, png=screenshot: write_artifact(path, png))
                 success_msg = f"Screenshot saved: {screenshot_path}"
 
                 # Also attach to Allure for local runs
-                with open(screenshot_path, 'rb') as f:
-                    allure.attach(
-                        f.read(),
-                        name=f"{test_name}",
-                        attachment_type=allure.attachment_type.PNG
-                    )
+                allure.attach(
+                    screenshot,
+                    name=f"{test_name}",
+                    attachment_type=allure.attachment_type.PNG
+                )
 
             print(success_msg)
             logger.info(success_msg)
@@ -352,9 +486,26 @@ def pytest_runtest_makereport(item, call):
 @pytest.hookimpl(hookwrapper=True)
 def pytest_runtest_setup(item):
     item.start_time = time.time()
+    # Travels with the reports to the xdist controller, which merges the results per device
+    item.user_properties.append(('device', device_label()))
     yield
 
 
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    allure.dynamic.tag(dict(item.user_properties).get('device', 'unknown device'))
+    yield
+
+
+def pytest_runtest_logreport(report):
+    """Collect the outcome of every test on the controller, whichever worker ran it"""
+    if os.getenv('PYTEST_XDIST_WORKER') is not None:
+        return
+    if report.when == 'call' or (report.when == 'setup' and not report.passed):
+        device = dict(report.user_properties).get('device', 'unknown device')
+        device_results.record(device, report.nodeid, report.outcome, report.duration)
+
+
 def pytest_bdd_before_step(request, feature, scenario, step, step_func):
     """Record step information before each step"""
     # Get BDD step text
@@ -401,6 +552,23 @@ def pytest_warning_recorded(warning_message, when, nodeid, location):
         return None
     return warning_message
 
+def write_artifact(path, content):
+    """Write a test artifact to disk"""
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Persist the locator latency statistics and poll history, and merge the results of every device"""
+    for store in (locator_registry, poll_history):
+        teardown_pipeline.submit(f"save {type(store).__name__}", store.save)
+
+    # Only the controller (or a serial run) sees the reports of every device
+    if os.getenv('PYTEST_XDIST_WORKER') is None and device_results.results:
+        print(f"\nResults per device:\n{device_results.report()}")
+        teardown_pipeline.submit("finalize device results", device_results.save)
+
+
 def session_finished(session, exitstatus):
     print("\nTest Summary:")
     for feature, scenario, status in test_summary:
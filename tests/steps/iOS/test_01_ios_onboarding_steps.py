@@ -15,7 +15,7 @@ def launch_dime_application(driver):
 @given('I am on the welcome screen')
 def on_welcome_screen(driver):
     onboarding_page = OnboardingPage(driver)
-    assert onboarding_page.wait_for_element_present(*onboarding_page.onboarding_locators.GET_STARTED_BUTTON), \
+    assert onboarding_page.wait_for_screen(OnboardingPage.WELCOME_SCREEN), \
         "Welcome screen did not load properly"
 
 
@@ -36,7 +36,7 @@ def tap_get_started_button(driver):
 @when('I am navigated to the categories page')
 def navigated_to_categories_page(driver):
     onboarding_page = OnboardingPage(driver)
-    assert onboarding_page.wait_for_element_present(*onboarding_page.onboarding_locators.INCOME_TAB), \
+    assert onboarding_page.wait_for_screen(OnboardingPage.CATEGORIES_SCREEN), \
         "Categories page did not load properly"
 
 
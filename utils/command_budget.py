@@ -0,0 +1,116 @@
+import argparse
+import sys
+from collections import namedtuple
+from typing import Callable, Dict, List
+from appium.webdriver.mobilecommand import MobileCommand
+from selenium.webdriver.remote.command import Command
+
+# A primitive sequence and the most server commands it may send; baseline is what it sent
+# before the element cache and the implicit wait tracking
+Budget = namedtuple('Budget', ['name', 'run', 'limit', 'baseline'])
+
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+
+
+class FakeExecutor:
+    """
+    In-process stand-in for the RemoteConnection of a driver: every element lookup finds one
+    visible, enabled element and every other command succeeds, nothing goes over the network
+    """
+
+    def __init__(self):
+        self.commands: List[str] = []
+
+    def execute(self, command: str, params: dict) -> dict:
+        self.commands.append(command)
+        if command == Command.FIND_ELEMENT:
+            return {'status': 0, 'value': {ELEMENT_KEY: 'element-1'}}
+        if command == Command.FIND_ELEMENTS:
+            return {'status': 0, 'value': [{ELEMENT_KEY: 'element-1'}]}
+        if command in (MobileCommand.IS_ELEMENT_DISPLAYED, Command.IS_ELEMENT_ENABLED):
+            return {'status': 0, 'value': True}
+        return {'status': 0, 'value': None}
+
+
+def fake_driver():
+    """
+    Driver bound to a FakeExecutor, set up like AppiumSetup.setUp sets up a real session
+    """
+    from setup import AttachedRemote, options
+    from pages.base_actions.session_state import get_session_state
+
+    driver = AttachedRemote('http://127.0.0.1:1', 'fake-session', {'automationName': 'XCUITest'}, options=options)
+    driver.command_executor = FakeExecutor()
+    get_session_state(driver).implicit_wait.set(0)
+    del driver.command_executor.commands[:]
+    return driver
+
+
+def _wait_and_click(actions):
+    from pages.locators.onboarding_locators import OnboardingLocators
+    actions.wait_for_element_present(*OnboardingLocators.GET_STARTED_BUTTON, timeout=1)
+    actions.click_element(*OnboardingLocators.GET_STARTED_BUTTON)
+
+
+def _click_chained_locator(actions):
+    from pages.locators.onboarding_locators import OnboardingLocators
+    actions.click_element(*OnboardingLocators.EMOJI_SEARCH_FIELD)
+
+
+def _negative_presence(actions):
+    from pages.locators.onboarding_locators import OnboardingLocators
+    actions.driver.command_executor.execute = _missing(actions.driver.command_executor)
+    actions.is_element_present(*OnboardingLocators.EMOJI_SEARCH_FIELD)
+
+
+def _missing(executor: FakeExecutor) -> Callable:
+    def execute(command: str, params: dict) -> dict:
+        executor.commands.append(command)
+        if command == Command.FIND_ELEMENT:
+            return {'status': 404,
+                    'value': {'value': {'error': 'no such element', 'message': 'Fake driver has no element'}}}
+        return {'status': 0, 'value': None}
+    return execute
+
+
+BUDGETS = (
+    # OnboardingPage.click_* used to send implicitly_wait(0), find, is_displayed for the wait, then
+    # find, is_displayed, is_enabled and click; the cached visible handle halves that
+    Budget('wait_for_element_present + click_element', _wait_and_click, limit=4, baseline=7),
+    # A Locator with alternative strategies looks up its first (native) strategy only
+    Budget('click_element on a strategy chain', _click_chained_locator, limit=4, baseline=4),
+    Budget('is_element_present (element absent)', _negative_presence, limit=1, baseline=1),
+)
+
+
+def measure(budget: Budget) -> List[str]:
+    """
+    Commands sent by one budgeted sequence on a fresh fake driver
+    """
+    from pages.base_actions.base_action import BaseActions
+    driver = fake_driver()
+    budget.run(BaseActions(driver, default_timeout=1))
+    return list(driver.command_executor.commands)
+
+
+def check() -> Dict[str, List[str]]:
+    """
+    Run every budget and print the command counts
+
+    Returns:
+        Dict[str, List[str]]: Commands of the sequences over their limit
+    """
+    over = {}
+    for budget in BUDGETS:
+        commands = measure(budget)
+        print(f"{len(commands):3} commands (limit {budget.limit}, baseline {budget.baseline})  {budget.name}: "
+              f"{', '.join(commands)}")
+        if len(commands) > budget.limit:
+            over[budget.name] = commands
+    return over
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check the server command budgets of the BaseActions primitives")
+    parser.parse_args()
+    sys.exit(1 if check() else 0)
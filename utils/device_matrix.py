@@ -0,0 +1,108 @@
+import json
+import os
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+DEFAULT_RESULTS_FILE = os.path.join(ROOT_DIR, "logs", "device_results.json")
+
+# One cloud device of the matrix
+CloudDevice = namedtuple('CloudDevice', ['device_name', 'os_version'])
+
+
+def parse_matrix(matrix: str) -> List[CloudDevice]:
+    """
+    Parse a device matrix setting
+
+    Ex.
+    DEVICE_MATRIX="iPhone 16 Pro@18.2, iPhone 15 Pro@17.5"
+    """
+    devices = []
+    for entry in matrix.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        device_name, _, os_version = entry.partition('@')
+        if not os_version:
+            raise ValueError(f"Device matrix entry {entry!r} has no OS version, expected 'Device Name@OS version'")
+        devices.append(CloudDevice(device_name.strip(), os_version.strip()))
+    return devices
+
+
+def device_matrix(config: Dict[str, Optional[str]]) -> List[CloudDevice]:
+    """
+    Cloud devices the run fans out to: DEVICE_COUNT devices taken from DEVICE_MATRIX, cycling
+    through it when it is shorter, or copies of the default BrowserStack device without a matrix
+
+    Args:
+        config: .env values
+
+    Returns:
+        List[CloudDevice]: One device per concurrent session
+    """
+    matrix = parse_matrix(config.get('DEVICE_MATRIX') or '')
+    if not matrix:
+        matrix = [CloudDevice(config.get('BROWSERSTACK_DEVICE_NAME', 'iPhone 16 Pro'),
+                              config.get('BROWSERSTACK_OS_VERSION', '18.2'))]
+    count = int(config.get('DEVICE_COUNT') or len(matrix))
+    if count < 1:
+        raise ValueError(f"DEVICE_COUNT must be at least 1, got {count}")
+    return [matrix[index % len(matrix)] for index in range(count)]
+
+
+def worker_index(worker_id: str) -> int:
+    """
+    Index of a pytest-xdist worker, "gw2" is 2 and the controller of a serial run is 0
+    """
+    digits = ''.join(c for c in worker_id if c.isdigit())
+    return int(digits) if digits else 0
+
+
+def device_for_worker(config: Dict[str, Optional[str]], worker_id: str) -> CloudDevice:
+    """
+    Cloud device driven by a worker, each worker of a DEVICE_COUNT-wide run gets its own
+    """
+    devices = device_matrix(config)
+    return devices[worker_index(worker_id) % len(devices)]
+
+
+class DeviceResults:
+    """
+    Per-device test outcomes collected on the controller, from the reports of every worker
+    """
+
+    def __init__(self):
+        self.results: Dict[str, List[dict]] = {}
+
+    def record(self, device: str, nodeid: str, outcome: str, duration: float):
+        self.results.setdefault(device, []).append({'test': nodeid, 'outcome': outcome,
+                                                    'duration': round(duration, 2)})
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        summary = {}
+        for device, results in self.results.items():
+            counts = summary.setdefault(device, {'passed': 0, 'failed': 0, 'skipped': 0})
+            for result in results:
+                counts[result['outcome']] = counts.get(result['outcome'], 0) + 1
+        return summary
+
+    def save(self, results_file: str = None) -> str:
+        """
+        Write the merged results of all devices into one JSON report
+        """
+        results_file = results_file or os.getenv('DEVICE_RESULTS_FILE', DEFAULT_RESULTS_FILE)
+        os.makedirs(os.path.dirname(os.path.abspath(results_file)), exist_ok=True)
+        with open(results_file, 'w', encoding='utf-8') as f:
+            json.dump({'summary': self.summary(), 'devices': self.results}, f, indent=2, ensure_ascii=False)
+        return results_file
+
+    def report(self) -> str:
+        lines = []
+        for device, counts in sorted(self.summary().items()):
+            duration = sum(result['duration'] for result in self.results[device])
+            lines.append(f"{device}: {counts['passed']} passed, {counts['failed']} failed, "
+                         f"{counts['skipped']} skipped ({duration:.0f} seconds)")
+        return '\n'.join(lines)
+
+
+device_results = DeviceResults()
@@ -0,0 +1,313 @@
+import json
+import os
+import socket
+import threading
+import time
+import urllib.request
+import uuid
+from collections import namedtuple
+from typing import Callable, List, Optional
+from pages.base_actions.file_lock import file_lock
+
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+DEFAULT_POOL_FILE = os.path.join(ROOT_DIR, "devices.json")
+DEFAULT_LEASE_DIR = os.path.join(ROOT_DIR, "logs", "device_leases")
+
+# One device a worker can drive: its simulator/device, the WebDriverAgent and MJPEG ports
+# reserved for it and the Appium server in charge of it
+DeviceSlot = namedtuple('DeviceSlot', ['name', 'udid', 'wda_local_port', 'mjpeg_server_port', 'appium_url',
+                                       'capabilities'])
+
+
+class DevicePoolExhausted(RuntimeError):
+    """Raised when no device slot could be leased before the timeout"""
+
+
+def load_slots(pool_file: str) -> List[DeviceSlot]:
+    """
+    Read the device slots of a pool file
+
+    Ex. devices.json
+    {
+        "lease_seconds": 600,
+        "devices": [
+            {"name": "sim-1", "udid": "B2DF8E07-...", "wda_local_port": 8101, "mjpeg_server_port": 9101,
+             "appium_url": "http://127.0.0.1:4723", "capabilities": {"platformVersion": "18.2"}}
+        ]
+    }
+    """
+    with open(pool_file, encoding='utf-8') as f:
+        devices = json.load(f)['devices']
+    slots = []
+    for index, device in enumerate(devices, 1):
+        slots.append(DeviceSlot(
+            name=device.get('name', f"device-{index}"),
+            udid=device['udid'],
+            wda_local_port=int(device['wda_local_port']),
+            mjpeg_server_port=int(device['mjpeg_server_port']),
+            appium_url=device.get('appium_url', 'http://127.0.0.1:4723'),
+            capabilities=device.get('capabilities', {}),
+        ))
+    ports = [port for slot in slots for port in (slot.wda_local_port, slot.mjpeg_server_port)]
+    if len(set(ports)) != len(ports):
+        raise ValueError(f"Device slots in {pool_file} share ports, every slot needs its own WDA and MJPEG port")
+    return slots
+
+
+def probe_appium_status(appium_url: str, timeout: float = 3) -> bool:
+    """
+    Check that the Appium server answers /status and reports itself ready
+    """
+    try:
+        with urllib.request.urlopen(f"{appium_url.rstrip('/')}/status", timeout=timeout) as response:
+            status = json.loads(response.read().decode('utf-8') or '{}')
+    except (OSError, ValueError):
+        return False
+    return status.get('value', {}).get('ready', True) is not False
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class DeviceLease:
+    """
+    A device slot held by one worker. The lease file is renewed by a heartbeat thread, so a
+    crashed worker loses its device once the lease expires; a worker whose lease was taken over
+    meanwhile stops renewing it and reports it lost.
+    """
+
+    def __init__(self, pool: 'DevicePool', slot: DeviceSlot, owner: str, worker: str):
+        self.pool = pool
+        self.slot = slot
+        self.owner = owner
+        self.worker = worker
+        self.lost = False
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def __enter__(self) -> 'DeviceLease':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
+
+    def start_heartbeat(self):
+        interval = max(1.0, self.pool.lease_seconds / 3)
+
+        def renew():
+            while not self._stop.wait(interval):
+                if not self.pool._renew_lease(self.slot, self.owner, self.worker):
+                    self.lost = True
+                    print(f"Worker {self.worker} lost the lease of {self.slot.name}, "
+                          f"it is now held by {self.pool._read_lease(self.slot)}")
+                    return
+
+        self._heartbeat = threading.Thread(target=renew, name=f"lease-{self.slot.name}", daemon=True)
+        self._heartbeat.start()
+
+    def release(self):
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join(timeout=1)
+        self.pool._remove_lease(self.slot, self.owner)
+
+
+class DevicePool:
+    """
+    Device slots shared by the pytest-xdist workers of one machine, leased through lock files.
+
+    A lease is a file per slot holding the owner and an expiry. Creating it is atomic, so two
+    workers never get the same slot; an expired lease, or one left by a dead process of this
+    host, is taken over. Every change of an existing lease (take-over, renewal, release) is a
+    compare-and-write made while holding the slot's flock, so two workers taking over the same
+    lease, or a late renewal of its previous owner, cannot both win. Owners are unique per
+    acquire() call, so two pytest runs on one host never share a slot. Before a slot is handed out
+    its Appium server is probed, a slot whose server does not answer is skipped.
+    """
+    def __init__(self, slots: List[DeviceSlot], lease_dir: str = DEFAULT_LEASE_DIR, lease_seconds: float = 600,
+                 probe: Callable[[str], bool] = probe_appium_status):
+        """
+        Args:
+            slots: Device slots of the pool
+            lease_dir: Directory of the lease files, shared by all workers
+            lease_seconds: Lease validity, renewed every third of it while the worker runs
+            probe: Readiness check of an Appium URL
+        """
+        if not slots:
+            raise ValueError("A device pool needs at least one slot")
+        self.slots = slots
+        self.lease_dir = lease_dir
+        self.lease_seconds = lease_seconds
+        self.probe = probe
+        os.makedirs(lease_dir, exist_ok=True)
+
+    @classmethod
+    def from_file(cls, pool_file: str, **settings) -> 'DevicePool':
+        with open(pool_file, encoding='utf-8') as f:
+            settings.setdefault('lease_seconds', json.load(f).get('lease_seconds', 600))
+        return cls(load_slots(pool_file), **settings)
+
+    def _lease_file(self, slot: DeviceSlot) -> str:
+        return os.path.join(self.lease_dir, f"{slot.name}.lease")
+
+    def _lease_content(self, owner: str, worker: str) -> str:
+        return json.dumps({'owner': owner, 'worker': worker, 'host': socket.gethostname(), 'pid': os.getpid(),
+                           'expires': time.time() + self.lease_seconds})
+
+    def _read_lease(self, slot: DeviceSlot) -> Optional[dict]:
+        try:
+            with open(self._lease_file(slot), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Being written by its owner right now
+            return {'owner': None, 'expires': time.time() + self.lease_seconds}
+
+    def _write_lease(self, slot: DeviceSlot, owner: str, worker: str):
+        temporary_file = f"{self._lease_file(slot)}.{owner.replace(':', '_')}.tmp"
+        with open(temporary_file, 'w', encoding='utf-8') as f:
+            f.write(self._lease_content(owner, worker))
+        os.replace(temporary_file, self._lease_file(slot))
+
+    def _locked(self, slot: DeviceSlot, timeout: float = 5):
+        """
+        Hold the lock of a slot while its lease is read and changed
+
+        Raises:
+            TimeoutError: If the lock could not be taken in time
+        """
+        return file_lock(self._lease_file(slot), timeout=timeout)
+
+    def _renew_lease(self, slot: DeviceSlot, owner: str, worker: str) -> bool:
+        """
+        Extend the lease if it is still held by owner
+
+        Returns:
+            bool: False if the lease was taken over or removed
+        """
+        try:
+            with self._locked(slot):
+                lease = self._read_lease(slot)
+                if lease is None or lease.get('owner') != owner:
+                    return False
+                self._write_lease(slot, owner, worker)
+                return True
+        except TimeoutError as e:
+            # Keep the lease, the next heartbeat tries again before it expires
+            print(f"Lease renewal of {slot.name} skipped: {e}")
+            return True
+
+    def _remove_lease(self, slot: DeviceSlot, owner: str):
+        try:
+            with self._locked(slot):
+                lease = self._read_lease(slot)
+                if lease is not None and lease.get('owner') == owner:
+                    os.remove(self._lease_file(slot))
+        except TimeoutError as e:
+            # The lease expires on its own
+            print(f"Lease of {slot.name} not released: {e}")
+
+    def _is_abandoned(self, lease: dict) -> bool:
+        if lease.get('expires', 0) < time.time():
+            return True
+        return lease.get('host') == socket.gethostname() and not _pid_alive(lease.get('pid', 0))
+
+    def _take_over(self, slot: DeviceSlot, owner: str, worker: str) -> bool:
+        """
+        Replace an abandoned lease, checking under the slot lock that it is still the abandoned one
+        """
+        try:
+            with self._locked(slot):
+                lease = self._read_lease(slot)
+                if lease is None or not self._is_abandoned(lease):
+                    return False
+                print(f"Taking over the expired lease of {slot.name} from {lease.get('worker', lease.get('owner'))}")
+                self._write_lease(slot, owner, worker)
+                return True
+        except TimeoutError:
+            return False
+
+    def _claim(self, slot: DeviceSlot, owner: str, worker: str) -> bool:
+        try:
+            descriptor = os.open(self._lease_file(slot), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return self._take_over(slot, owner, worker)
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+            f.write(self._lease_content(owner, worker))
+        return True
+
+    def _candidates(self, worker: str) -> List[DeviceSlot]:
+        # gw2 starts with the third slot, so workers spread over the slots without contention
+        digits = ''.join(c for c in worker if c.isdigit())
+        start = int(digits) % len(self.slots) if digits else 0
+        return self.slots[start:] + self.slots[:start]
+
+    def acquire(self, worker: str, timeout: float = 300, interval: float = 2) -> DeviceLease:
+        """
+        Lease a free slot whose Appium server is ready, waiting for one to be released
+
+        Args:
+            worker: Worker id, e.g. the PYTEST_XDIST_WORKER value, used as a label and to pick the first slot
+            timeout: Maximum waiting time (seconds)
+            interval: Time between two rounds over the slots (seconds)
+
+        Returns:
+            DeviceLease: The leased slot, its lease is renewed until release()
+
+        Raises:
+            DevicePoolExhausted: If no slot could be leased before the timeout
+        """
+        # The worker id repeats across concurrent runs, the owner is unique to this lease
+        owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        end_time = time.monotonic() + timeout
+        while True:
+            for slot in self._candidates(worker):
+                if not self._claim(slot, owner, worker):
+                    continue
+                if not self.probe(slot.appium_url):
+                    print(f"Appium server of {slot.name} is not ready at {slot.appium_url}, skipping it")
+                    self._remove_lease(slot, owner)
+                    continue
+                lease = DeviceLease(self, slot, owner, worker)
+                lease.start_heartbeat()
+                print(f"Worker {worker} leased {slot.name} (udid {slot.udid}, wda {slot.wda_local_port}, "
+                      f"mjpeg {slot.mjpeg_server_port}, {slot.appium_url})")
+                return lease
+            if time.monotonic() >= end_time:
+                raise DevicePoolExhausted(f"No device slot available for {worker} after {timeout} seconds")
+            time.sleep(interval)
+
+
+def worker_id() -> str:
+    """
+    pytest-xdist worker id, "master" when the run is not distributed
+    """
+    return os.getenv('PYTEST_XDIST_WORKER', 'master')
+
+
+def lease_device(pool_file: str = None, timeout: float = None) -> Optional[DeviceLease]:
+    """
+    Lease a device for the current worker when a pool file is configured
+
+    Args:
+        pool_file: Pool file, default is DEVICE_POOL_FILE or devices.json
+        timeout: Maximum waiting time (seconds), default is DEVICE_LEASE_TIMEOUT or 300
+
+    Returns:
+        Optional[DeviceLease]: The lease, None without a pool file (single device runs)
+    """
+    pool_file = pool_file or os.getenv('DEVICE_POOL_FILE', DEFAULT_POOL_FILE)
+    if not os.path.exists(pool_file):
+        return None
+    if timeout is None:
+        timeout = float(os.getenv('DEVICE_LEASE_TIMEOUT', '300'))
+    return DevicePool.from_file(pool_file).acquire(worker_id(), timeout=timeout)
@@ -1,7 +1,25 @@
 # initial_setup.py
 
 import os
-from pages.iOS.onboarding_page import OnboardingPage
+from pages.base_actions.flow import FlowExecutor, click, enter_text, tap, verify
+from pages.locators.onboarding_locators import OnboardingLocators
+
+# Same sequence as the onboarding feature, declared so FlowExecutor can plan the commands
+ONBOARDING_FLOW = [
+    verify(OnboardingLocators.TRACK_FINANCES_TEXT, OnboardingLocators.ANALYZE_EXPENDITURE_TEXT,
+           OnboardingLocators.STICK_TO_BUDGETS_TEXT, description="Verifying welcome screen elements"),
+    click(OnboardingLocators.GET_STARTED_BUTTON, "Clicking Get Started button"),
+    click(OnboardingLocators.INCOME_TAB, "Switching to Income tab"),
+    click(OnboardingLocators.PAYCHECK_OPTION, "Clicking Paycheck option"),
+    click(OnboardingLocators.NEW_BUTTON, "Clicking New button"),
+    enter_text(OnboardingLocators.EMOJI_SEARCH_FIELD, "stock", "Searching for stock emoji"),
+    click(OnboardingLocators.STOCK_EMOJI_RESULT, "Selecting stock emoji"),
+    click(OnboardingLocators.ADD_CATEGORY_ICON_BUTTON, "Clicking add icon button"),
+    enter_text(OnboardingLocators.CATEGORY_NAME_FIELD, "Stock", "Entering category name 'Stock'"),
+    click(OnboardingLocators.ADD_CATEGORY_ICON_BUTTON, "Clicking add category button"),
+    tap(0.5, 0.2, "Closing bottom sheet"),
+    tap(0.85, 0.92, "Clicking next button to complete onboarding"),
+]
 
 def setup_flow(driver):
     """
@@ -35,62 +53,19 @@ def setup_flow(driver):
 
 
 def complete_onboarding_flow(driver) -> bool:
+    """
+    Run ONBOARDING_FLOW through the flow executor and print the planned versus executed command count
+    """
     try:
-        onboarding_page = OnboardingPage(driver)
-        
-        # 1. Verify welcome screen elements
-        print("Step 1: Verifying welcome screen elements...")
-        if not onboarding_page.verify_welcome_screen_elements():
-            print("Welcome screen elements verification failed")
+        result = FlowExecutor(driver).run(ONBOARDING_FLOW)
+        print(result.report())
+        if not result.success:
+            print(f"Onboarding flow failed: {result.failed_operation.description}")
             return False
-        
-        # 2. Click Get Started
-        print("Step 2: Clicking Get Started button...")
-        onboarding_page.click_get_started_button()
-        
-        # 3. Switch to Income tab
-        print("Step 3: Switching to Income tab...")
-        onboarding_page.click_income_tab()
-        
-        # 4. Click Paycheck option
-        print("Step 4: Clicking Paycheck option...")
-        onboarding_page.click_paycheck_option()
-        
-        # 5. Click New button
-        print("Step 5: Clicking New button...")
-        onboarding_page.click_new_button()
-        
-        # 6. Search stock emoji
-        print("Step 6: Searching for stock emoji...")
-        onboarding_page.search_emoji("stock")
-        
-        # 7. Select stock emoji
-        print("Step 7: Selecting stock emoji...")
-        onboarding_page.click_stock_emoji()
-        
-        # 8. Click add icon button
-        print("Step 8: Clicking add icon button...")
-        onboarding_page.click_add_icon_button()
-        
-        # 9. Enter category name
-        print("Step 9: Entering category name 'Stock'...")
-        onboarding_page.enter_category_name("Stock")
-        
-        # 10. Click add category button
-        print("Step 10: Clicking add category button...")
-        onboarding_page.click_add_category_button()
-        
-        # 11. Close bottom sheet
-        print("Step 11: Closing bottom sheet...")
-        onboarding_page.close_bottom_sheet()
-        
-        # 12. Click next button to complete onboarding
-        print("Step 12: Clicking next button to complete onboarding...")
-        onboarding_page.click_next_button()
-        
+
         print("Complete onboarding flow finished successfully!")
         return True
-        
+
     except Exception as e:
         print(f"Onboarding flow failed: {str(e)}")
         return False
@@ -0,0 +1,256 @@
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+DEFAULT_KEEPER_URL = 'http://127.0.0.1:4799'
+
+
+def keeper_url() -> str:
+    return os.getenv('SESSION_KEEPER_URL', DEFAULT_KEEPER_URL).rstrip('/')
+
+
+def _request(path: str, method: str = 'GET', timeout: float = 5) -> Optional[dict]:
+    request = urllib.request.Request(f"{keeper_url()}{path}", method=method, data=b'' if method == 'POST' else None)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        # The keeper answered with an error, e.g. {'error': ...} when a reset failed
+        try:
+            return json.loads(e.read().decode('utf-8'))
+        except ValueError:
+            return {'error': f"HTTP {e.code}"}
+    except (OSError, ValueError):
+        return None
+
+
+def keeper_session(timeout: float = 300) -> Optional[dict]:
+    """
+    Session of the running session keeper, recreated by the keeper first if it died
+
+    Returns:
+        Optional[dict]: session_id, server_url, capabilities and onboarded flag, None if no keeper answers
+    """
+    return _request('/session', timeout=timeout)
+
+
+def reset_keeper_app(fresh: bool = False, timeout: float = 300) -> Optional[dict]:
+    """
+    Ask the keeper to reset the app before an attached run
+
+    Args:
+        fresh: Reinstall the app and leave it on the welcome screen, for runs that go through the onboarding
+        timeout: Maximum waiting time (seconds)
+
+    Returns:
+        Optional[dict]: Session info after the reset, None if no keeper answers
+    """
+    return _request(f"/reset?fresh={int(fresh)}", method='POST', timeout=timeout)
+
+
+def recreate_keeper_session(timeout: float = 300) -> Optional[dict]:
+    """
+    Ask the keeper for a new session, e.g. when the current one stopped answering
+    """
+    return _request('/recreate', method='POST', timeout=timeout)
+
+
+class SessionKeeper:
+    """
+    Long-lived owner of one driver session, so local pytest runs attach to it instead of paying
+    for the app reinstall, the session start, the onboarding and the teardown on every run.
+
+    The session is pinged every HEALTH_INTERVAL seconds, which also keeps Appium's
+    newCommandTimeout from expiring between runs, and recreated when it stops answering.
+    Each attached run first resets the app through POST /reset: a restart that keeps the onboarded
+    state, or with fresh=1 a reinstall that leaves the app on the welcome screen.
+
+    Ex.
+    python -m utils.session_keeper --onboard
+    pytest --attach tests/steps/iOS/test_01_ios_onboarding_steps.py
+    """
+    HEALTH_INTERVAL = 20
+
+    def __init__(self, onboard: bool = False):
+        """
+        Args:
+            onboard: Run the onboarding flow after creating a session, so attached runs can skip it
+        """
+        self.onboard = onboard
+        self.appium_setup = None
+        self.driver = None
+        self.server_url = None
+        self.onboarded = False
+        self.created_at = 0.0
+        self.recreations = 0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+
+    def _create(self):
+        # Imported here, setup reads .env and builds the capabilities on import
+        from setup import AppiumSetup, appium_server_url
+        from utils.initial_setup import setup_flow
+
+        self.appium_setup = AppiumSetup()
+        self.driver = self.appium_setup.setUp()
+        self.server_url = appium_server_url
+        self.created_at = time.time()
+        self.onboarded = False
+        print(f"Session keeper created session {self.driver.session_id}")
+        if self.onboard:
+            try:
+                setup_flow(self.driver)
+                self.onboarded = True
+            except Exception as e:
+                print(f"Onboarding failed, attached runs will go through it: {e}")
+
+    def _quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                print(f"Failed to quit session {self.driver.session_id}: {e}")
+        self.driver = None
+
+    def alive(self) -> bool:
+        from utils.session_warmer import session_alive
+        with self._lock:
+            return self.driver is not None and session_alive(self.driver)
+
+    def ensure_session(self) -> dict:
+        """
+        Current session, recreated when it does not answer
+        """
+        with self._lock:
+            if not self.alive():
+                if self.driver is not None:
+                    print(f"Session {self.driver.session_id} is dead, recreating it")
+                    self.recreations += 1
+                    self.driver = None
+                self._create()
+            return self.info()
+
+    def reset(self, fresh: bool = False) -> dict:
+        """
+        Put the app back in a known state for the next attached run
+
+        The app is terminated and started again. With fresh it is reinstalled in between, so it
+        starts on the welcome screen; otherwise the onboarding is run again if it is not done yet.
+
+        Args:
+            fresh: Reinstall the app (IOS_APP_PATH), for runs that go through the onboarding
+
+        Raises:
+            ValueError: If fresh is requested without IOS_APP_PATH
+        """
+        from setup import config
+        from utils.initial_setup import setup_flow
+
+        with self._lock:
+            self.ensure_session()
+            app_id = config.get('IOS_APP_BUNDLE_ID', 'com.rafaelsoh.dime')
+            self.driver.terminate_app(app_id)
+            if fresh:
+                app_path = config.get('IOS_APP_PATH')
+                if not app_path:
+                    raise ValueError("A fresh app needs IOS_APP_PATH in .env")
+                self.driver.remove_app(app_id)
+                self.driver.install_app(app_path)
+                self.onboarded = False
+            self.driver.activate_app(app_id)
+            print(f"Session keeper reset {app_id}{' (reinstalled)' if fresh else ''}")
+            if not fresh and self.onboard and not self.onboarded:
+                try:
+                    setup_flow(self.driver)
+                    self.onboarded = True
+                except Exception as e:
+                    print(f"Onboarding failed, the attached run will go through it: {e}")
+            return self.info()
+
+    def recreate(self) -> dict:
+        with self._lock:
+            self._quit()
+            self.recreations += 1
+            self._create()
+            return self.info()
+
+    def info(self) -> dict:
+        return {'session_id': self.driver.session_id if self.driver is not None else None,
+                'server_url': self.server_url,
+                'capabilities': self.driver.caps if self.driver is not None else {},
+                'onboarded': self.onboarded, 'created_at': self.created_at, 'recreations': self.recreations}
+
+    def _watch(self):
+        while not self._stop.wait(self.HEALTH_INTERVAL):
+            try:
+                self.ensure_session()
+            except Exception as e:
+                print(f"Session keeper health check failed: {e}")
+
+    def serve(self, port: int):
+        keeper = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, value: dict, status: int = 200):
+                payload = json.dumps(value).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _handle(self, action):
+                try:
+                    self._reply(action())
+                except Exception as e:
+                    self._reply({'error': str(e)}, 500)
+
+            def do_GET(self):
+                if self.path == '/health':
+                    return self._handle(lambda: {'alive': keeper.alive(), **keeper.info()})
+                if self.path == '/session':
+                    return self._handle(keeper.ensure_session)
+                self._reply({'error': f"Unknown path {self.path}"}, 404)
+
+            def do_POST(self):
+                path, _, query = self.path.partition('?')
+                if path == '/reset':
+                    return self._handle(lambda: keeper.reset(fresh='fresh=1' in query.split('&')))
+                if path == '/recreate':
+                    return self._handle(keeper.recreate)
+                if path == '/shutdown':
+                    self._reply({'stopping': True})
+                    return threading.Thread(target=server.shutdown, daemon=True).start()
+                self._reply({'error': f"Unknown path {self.path}"}, 404)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.ensure_session()
+        threading.Thread(target=self._watch, name='session-keeper-health', daemon=True).start()
+        print(f"Session keeper listening on http://127.0.0.1:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            server.server_close()
+            with self._lock:
+                self._quit()
+            print("Session keeper stopped")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Keep one driver session alive for fast local pytest runs")
+    parser.add_argument('--port', type=int, default=int(keeper_url().rsplit(':', 1)[-1]))
+    parser.add_argument('--onboard', action='store_true', help="run the onboarding flow on each new session")
+    args = parser.parse_args()
+    SessionKeeper(onboard=args.onboard).serve(args.port)
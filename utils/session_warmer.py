@@ -0,0 +1,152 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+from selenium.common.exceptions import WebDriverException
+from urllib3.exceptions import HTTPError
+from pages.base_actions.session_state import reset_session_state
+
+# (AppiumSetup, driver) pair returned by the session factory
+WarmSession = Tuple[object, object]
+
+
+def session_alive(driver) -> bool:
+    """
+    Check that the server-side session of the driver still answers, with one cheap command
+    """
+    try:
+        driver.get_window_rect()
+        return True
+    except (WebDriverException, HTTPError, OSError):
+        return False
+
+
+def adopt_session(driver, replacement) -> None:
+    """
+    Attach the driver object to the server-side session of another driver.
+
+    Page objects, fixtures and hooks keep the same driver object, so they all switch to
+    the new session at once.
+
+    Args:
+        driver: WebDriver instance whose session died
+        replacement: WebDriver instance of a ready session
+    """
+    driver.session_id = replacement.session_id
+    driver.command_executor = replacement.command_executor
+    driver.caps = replacement.caps
+    reset_session_state(driver)
+
+
+class SessionWarmer:
+    """
+    Create driver sessions in background threads, so the 20-60 seconds a session takes to start
+    overlap with test collection and app cleanup instead of blocking the driver fixture.
+
+    The primary session is started first, then `spares` extra sessions are kept warm to replace
+    a session that crashed without waiting for a new one.
+
+    Ex.
+    warmer = SessionWarmer(create_session, spares=1).start()
+    appium_setup, driver = warmer.session()
+    """
+
+    def __init__(self, create_session: Callable[[], WarmSession], spares: int = 0, prepare: Callable = None):
+        """
+        Args:
+            create_session: Factory creating one session, returns its (AppiumSetup, driver) pair
+            spares: Number of spare sessions kept ready
+            prepare: Called in the background before the primary session is created, e.g. the app cleanup
+        """
+        self.create_session = create_session
+        self.spares = spares
+        self.prepare = prepare
+        self._executor = ThreadPoolExecutor(max_workers=1 + spares, thread_name_prefix='session-warmer')
+        self._primary: Optional[Future] = None
+        self._spare_sessions: List[Future] = []
+        self._handed_out = False
+        self.started_at: Optional[float] = None
+
+    def _timed_create(self, prepare: bool = False) -> WarmSession:
+        start_time = time.monotonic()
+        if prepare and self.prepare is not None:
+            self.prepare()
+        session = self.create_session()
+        print(f"Driver session {session[1].session_id} ready after {time.monotonic() - start_time:.1f} seconds")
+        return session
+
+    def start(self) -> 'SessionWarmer':
+        self.started_at = time.monotonic()
+        self._primary = self._executor.submit(self._timed_create, True)
+        self._spare_sessions = [self._executor.submit(self._timed_create) for _ in range(self.spares)]
+        return self
+
+    def session(self, timeout: float = None) -> WarmSession:
+        """
+        Wait for the primary session
+
+        Args:
+            timeout: Maximum waiting time (seconds), None waits as long as the creation takes
+
+        Returns:
+            WarmSession: (AppiumSetup, driver) of the primary session
+
+        Raises:
+            Exception: The error of the session creation
+        """
+        if self._primary is None:
+            self.start()
+        wait_start = time.monotonic()
+        session = self._primary.result(timeout=timeout)
+        self._handed_out = True
+        waited = time.monotonic() - wait_start
+        print(f"Driver fixture waited {waited:.1f} seconds for the pre-warmed session "
+              f"({time.monotonic() - self.started_at - waited:.1f} seconds of start-up overlapped)")
+        return session
+
+    def replacement(self, timeout: float = None) -> Optional[WarmSession]:
+        """
+        Take a spare session and start warming the next one; without spares a session is created now
+
+        Returns:
+            Optional[WarmSession]: A ready session, None if it could not be created
+        """
+        if self._spare_sessions:
+            spare = self._spare_sessions.pop(0)
+            self._spare_sessions.append(self._executor.submit(self._timed_create))
+            try:
+                return spare.result(timeout=timeout)
+            except Exception as e:
+                print(f"Spare session failed to start, creating one now: {e}")
+        try:
+            return self.create_session()
+        except Exception as e:
+            print(f"Replacement session failed to start: {e}")
+            return None
+
+    def shutdown(self, wait: bool = False):
+        """
+        Quit the spare sessions that are ready and drop the ones still starting; the primary session
+        is handled the same way when session() never handed it out
+
+        Args:
+            wait: Block until the sessions still starting are created and quit, e.g. before their device is released
+        """
+        futures = list(self._spare_sessions)
+        if self._primary is not None and not self._handed_out:
+            futures.append(self._primary)
+            self._primary = None
+        for future in futures:
+            if future.cancel():
+                continue
+            future.add_done_callback(self._quit_session)
+        self._spare_sessions = []
+        self._executor.shutdown(wait=wait)
+
+    @staticmethod
+    def _quit_session(future: Future):
+        if future.exception() is None:
+            appium_setup, _ = future.result()
+            try:
+                appium_setup.driver.quit()
+            except Exception as e:
+                print(f"Failed to quit unused session: {e}")
@@ -0,0 +1,146 @@
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+EMPTY_SOURCE = ('<?xml version="1.0" encoding="UTF-8"?><AppiumAUT><XCUIElementTypeApplication '
+                'type="XCUIElementTypeApplication" name="Stand-in" visible="true"/></AppiumAUT>')
+
+
+class StandInHub:
+    """
+    Local stand-in for a cloud WebDriver hub, to exercise the DEVICE_COUNT fan-out without devices.
+
+    Sessions take session_delay seconds to start, like on a cloud grid, and the hub records how
+    many ran at the same time. Element lookups fail with "no such element", every other command
+    succeeds with a null value.
+
+    Ex.
+    python -m utils.stand_in_hub --port 4444 --session-delay 20
+    BROWSERSTACK_HUB_URL=http://127.0.0.1:4444/wd/hub DEVICE_COUNT=3 pytest -n auto
+    """
+
+    def __init__(self, port: int = 4444, session_delay: float = 0.0, host: str = '127.0.0.1'):
+        self.session_delay = session_delay
+        self.sessions: Dict[str, dict] = {}
+        self.created = 0
+        self.max_concurrent = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/wd/hub"
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'created': self.created, 'active': len(self.sessions), 'max_concurrent': self.max_concurrent}
+
+    def start(self) -> 'StandInHub':
+        threading.Thread(target=self.server.serve_forever, name='stand-in-hub', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _create_session(self, body: dict) -> dict:
+        time.sleep(self.session_delay)
+        capabilities = body.get('capabilities', {}).get('alwaysMatch', {})
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self.sessions[session_id] = capabilities
+            self.created += 1
+            self.max_concurrent = max(self.max_concurrent, len(self.sessions))
+        return {'sessionId': session_id, 'capabilities': capabilities}
+
+    def _handler(self):
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, value, status: int = 200):
+                payload = json.dumps({'value': value}).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _parts(self):
+                path = self.path.split('?')[0]
+                if path.startswith('/wd/hub'):
+                    path = path[len('/wd/hub'):]
+                return [part for part in path.split('/') if part]
+
+            def _body(self) -> dict:
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    return json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    return {}
+
+            def _session_command(self, parts, method: str):
+                if parts[1] not in hub.sessions:
+                    return self._reply({'error': 'invalid session id', 'message': f"Unknown session {parts[1]}"},
+                                       404)
+                command = parts[2:]
+                if not command and method == 'DELETE':
+                    with hub._lock:
+                        hub.sessions.pop(parts[1], None)
+                    return self._reply(None)
+                if command and command[0] in ('element', 'elements') and len(command) == 1:
+                    if command[0] == 'elements':
+                        return self._reply([])
+                    return self._reply({'error': 'no such element', 'message': "Stand-in hub has no elements"},
+                                       404)
+                if command == ['source']:
+                    return self._reply(EMPTY_SOURCE)
+                if command == ['window', 'rect']:
+                    return self._reply({'x': 0, 'y': 0, 'width': 393, 'height': 852})
+                return self._reply(None)
+
+            def do_GET(self):
+                parts = self._parts()
+                if parts == ['status']:
+                    return self._reply({'ready': True, 'message': 'Stand-in hub is ready', **hub.stats()})
+                if len(parts) >= 2 and parts[0] == 'session':
+                    return self._session_command(parts, 'GET')
+                return self._reply({'error': 'unknown command', 'message': self.path}, 404)
+
+            def do_POST(self):
+                parts = self._parts()
+                body = self._body()
+                if parts == ['session']:
+                    return self._reply(hub._create_session(body))
+                if len(parts) >= 2 and parts[0] == 'session':
+                    return self._session_command(parts, 'POST')
+                return self._reply({'error': 'unknown command', 'message': self.path}, 404)
+
+            def do_DELETE(self):
+                parts = self._parts()
+                if len(parts) >= 2 and parts[0] == 'session':
+                    return self._session_command(parts, 'DELETE')
+                return self._reply({'error': 'unknown command', 'message': self.path}, 404)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local stand-in for a cloud WebDriver hub")
+    parser.add_argument('--port', type=int, default=4444)
+    parser.add_argument('--session-delay', type=float, default=0.0, help="session start time (seconds)")
+    args = parser.parse_args()
+    hub = StandInHub(args.port, args.session_delay)
+    print(f"Stand-in hub listening on {hub.url}")
+    try:
+        hub.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Stand-in hub stopped: {hub.stats()}")
@@ -0,0 +1,129 @@
+import atexit
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+from utils.device_pool import probe_appium_status
+
+
+class TeardownTask:
+    """
+    One background teardown step, started once the task it depends on finished
+    """
+
+    def __init__(self, name: str, action: Callable, after: 'TeardownTask' = None):
+        self.name = name
+        self.action = action
+        self.after = after
+        self.error: Optional[Exception] = None
+        self.elapsed = 0.0
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"teardown-{name}", daemon=True)
+
+    def _run(self):
+        if self.after is not None:
+            self.after.done.wait()
+        start_time = time.monotonic()
+        try:
+            self.action()
+        except Exception as e:
+            self.error = e
+            print(f"Teardown step '{self.name}' failed: {e}")
+        finally:
+            self.elapsed = time.monotonic() - start_time
+            self.done.set()
+
+
+class TeardownPipeline:
+    """
+    Session quit, artifact flush and report finalization running in background threads, so the
+    end of the test session does not wait for them one after the other.
+
+    Tasks are daemon threads: join() waits for them with a bound, and is registered to run at
+    interpreter exit, so a hanging quit or upload can delay the exit by at most the bound.
+
+    Ex.
+    quit_task = teardown_pipeline.submit("quit session", driver.quit)
+    teardown_pipeline.submit("release device", lease.release, after=quit_task)
+    """
+
+    def __init__(self, join_timeout: float = None):
+        """
+        Args:
+            join_timeout: Bound of the join at exit (seconds), default is TEARDOWN_JOIN_TIMEOUT or 60
+        """
+        if join_timeout is None:
+            join_timeout = float(os.getenv('TEARDOWN_JOIN_TIMEOUT', '60'))
+        self.join_timeout = join_timeout
+        self.tasks: List[TeardownTask] = []
+        self._lock = threading.Lock()
+        atexit.register(self.join)
+
+    def submit(self, name: str, action: Callable, after: TeardownTask = None) -> TeardownTask:
+        """
+        Start a teardown step in the background
+
+        Args:
+            name: Step name, used in the logs
+            action: Callable without arguments
+            after: Step that must finish first
+
+        Returns:
+            TeardownTask: The started step
+        """
+        task = TeardownTask(name, action, after)
+        with self._lock:
+            self.tasks.append(task)
+        task.thread.start()
+        return task
+
+    def join(self, timeout: float = None) -> bool:
+        """
+        Wait for the submitted steps
+
+        Args:
+            timeout: Maximum waiting time for all steps together (seconds), default is join_timeout
+
+        Returns:
+            bool: True if every step finished
+        """
+        deadline = time.monotonic() + (self.join_timeout if timeout is None else timeout)
+        with self._lock:
+            tasks = list(self.tasks)
+        for task in tasks:
+            task.done.wait(max(0.0, deadline - time.monotonic()))
+        pending = [task.name for task in tasks if not task.done.is_set()]
+        if pending:
+            print(f"Teardown steps still running after the join timeout: {', '.join(pending)}")
+            return False
+        with self._lock:
+            finished = [task for task in self.tasks if task.done.is_set()]
+            self.tasks = [task for task in self.tasks if not task.done.is_set()]
+        if finished:
+            print("Teardown: " + ", ".join(f"{task.name} {task.elapsed:.1f}s" for task in finished))
+        return True
+
+
+def wait_for_appium_ready(appium_url: str, timeout: float = 30, interval: float = 0.5) -> bool:
+    """
+    Poll the Appium server /status until it reports ready, instead of sleeping a fixed time after quit
+
+    Args:
+        appium_url: Appium server URL
+        timeout: Maximum waiting time (seconds)
+        interval: Time between two probes (seconds)
+
+    Returns:
+        bool: True if the server is ready before the timeout
+    """
+    end_time = time.monotonic() + timeout
+    while True:
+        if probe_appium_status(appium_url, timeout=min(3.0, timeout)):
+            return True
+        if time.monotonic() >= end_time:
+            print(f"Appium server at {appium_url} not ready after {timeout} seconds")
+            return False
+        time.sleep(interval)
+
+
+teardown_pipeline = TeardownPipeline()